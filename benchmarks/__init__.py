@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""qtsass benchmark suite.
+
+Run all benchmarks and compare them against the stored baseline:
+
+    python -m benchmarks
+
+Store new baseline timings after an intended performance change:
+
+    python -m benchmarks --save
+"""
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Run the qtsass benchmarks and compare them to a stored baseline.
+
+The baseline stores the time of each benchmark relative to the calibration
+workload of the machine it was measured on, so that it can be compared on
+other machines.
+"""
+
+# Standard library imports
+import argparse
+import fnmatch
+import json
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+# Local imports
+from benchmarks.pipeline import BENCHMARKS, calibration
+
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+BASELINE_FORMAT = 2
+DEFAULT_THRESHOLD = 0.25
+QUICK_MAX_SIZE = 1000
+
+
+def create_parser():
+    """Create the benchmark runner's cli parser."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark the qtsass compile pipeline.',
+    )
+    parser.add_argument(
+        '-k',
+        '--filter',
+        type=str,
+        default='*',
+        help='Only run benchmarks matching this glob pattern.',
+    )
+    parser.add_argument(
+        '--quick',
+        action='store_true',
+        help='Skip benchmarks larger than {} items.'.format(QUICK_MAX_SIZE),
+    )
+    parser.add_argument(
+        '--baseline',
+        type=str,
+        default=BASELINE_FILE,
+        help='Path to the baseline json file.',
+    )
+    parser.add_argument(
+        '--save',
+        action='store_true',
+        help='Store the results as the new baseline.',
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help='Allowed slowdown relative to the baseline before failing.',
+    )
+    return parser
+
+
+def calibrate():
+    """Return the time in seconds of the calibration workload."""
+    seconds = measure(calibration(), repeat=5)
+    print('{:<45} {:>12.6f} ms\n'.format('calibration', seconds * 1000))
+    sys.stdout.flush()
+    return seconds
+
+
+def load_baseline(path):
+    """Return the dict of relative timings stored in path.
+
+    Baselines of another format, or a missing file, yield None.
+    """
+    if not os.path.isfile(path):
+        return None
+
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or data.get('format') != BASELINE_FORMAT:
+        return None
+    return data['benchmarks']
+
+
+def measure(fn, repeat=3):
+    """Return the best time in seconds of a single call to fn."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run_benchmarks(pattern='*', quick=False):
+    """Run all benchmarks matching pattern and return a dict of timings."""
+    results = {}
+    for name, setup, size in BENCHMARKS:
+        if not fnmatch.fnmatch(name, pattern):
+            continue
+        if quick and size is not None and size > QUICK_MAX_SIZE:
+            continue
+
+        tmpdir = tempfile.mkdtemp(prefix='qtsass-bench-')
+        try:
+            results[name] = measure(setup(size, tmpdir))
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        print('{:<45} {:>12.6f} ms'.format(name, results[name] * 1000))
+        sys.stdout.flush()
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print a comparison to baseline and return the regressed names.
+
+    :param results: Dict of timings relative to the calibration workload.
+    :param baseline: Dict of relative timings loaded from a baseline.
+    :param threshold: Allowed slowdown before a benchmark regressed.
+    """
+    regressions = []
+    print('\n{:<45} {:>8}'.format('Benchmark', 'Ratio'))
+    for name, seconds in sorted(results.items()):
+        if name not in baseline:
+            continue
+        ratio = seconds / baseline[name]
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = '  REGRESSED'
+        print('{:<45} {:>8.2f}{}'.format(name, ratio, flag))
+    return regressions
+
+
+def main():
+    """Benchmark runner entry point."""
+    args = create_parser().parse_args()
+    seconds = calibrate()
+    results = run_benchmarks(args.filter, args.quick)
+    relative = {name: t / seconds for name, t in results.items()}
+
+    baseline = load_baseline(args.baseline)
+    if args.save:
+        baseline = baseline or {}
+        baseline.update(relative)
+        with open(args.baseline, 'w') as f:
+            json.dump(
+                {'format': BASELINE_FORMAT, 'benchmarks': baseline},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+        print('\nSaved baseline to {}'.format(args.baseline))
+        sys.exit(0)
+
+    if baseline is None:
+        print('\nNo baseline found, run with --save to create one.')
+        sys.exit(0)
+
+    regressions = compare(relative, baseline, args.threshold)
+    if regressions:
+        print('\n{} benchmark(s) regressed by more than {:.0%}'.format(
+            len(regressions), args.threshold))
+        sys.exit(1)
+
+    print('\nNo regressions.')
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
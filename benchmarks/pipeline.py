@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Benchmarks for each stage of the qtsass compile pipeline.
+
+Each benchmark is a setup function taking a size and a temporary directory
+and returning the callable to time. The calibration workload does not use
+qtsass, benchmark timings are stored relative to it.
+"""
+
+# Standard library imports
+import os
+import subprocess
+import sys
+import time
+
+# Third party imports
+import sass
+
+# Local imports
+from benchmarks import synthetic
+from qtsass import api, conformers, delta, functions, importers, minify
+from qtsass.watchers import fingerprints, snapshots
+
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(__file__), '..', 'examples')
+RULE_SIZES = (10, 100, 1000, 10000, 100000)
+GRADIENT_SIZES = (10, 100, 1000, 10000)
+DEPTHS = (1, 10, 50)
+ENTRY_SIZES = (1, 10, 50)
+TREE_SIZES = (1000, 20000)
+BENCHMARKS = []
+
+
+def benchmark(sizes=(None,)):
+    """Register a benchmark setup function for each size."""
+
+    def decorate(fn):
+        for size in sizes:
+            name = fn.__name__
+            if size is not None:
+                name = '{}[{}]'.format(name, size)
+            BENCHMARKS.append((name, fn, size))
+        return fn
+
+    return decorate
+
+
+def calibration():
+    """Return a reference workload using only libsass and the stdlib.
+
+    Timings divided by the time of this workload can be compared across
+    machines, since changes to qtsass do not affect it.
+    """
+    string = ''.join(
+        '.widget{0} {{ color: #{1:06x}; padding: {2}px; }}\n'.format(
+            i, i * 4099 % 0xffffff, i % 16)
+        for i in range(1000)
+    )
+
+    def run():
+        css = sass.compile(string=string)
+        sorted(css.split())
+
+    return run
+
+
+@benchmark(RULE_SIZES)
+def scss_conform_rules(size, tmpdir):
+    string = synthetic.rules(size)
+    return lambda: conformers.scss_conform(string)
+
+
+@benchmark(GRADIENT_SIZES)
+def scss_conform_gradients(size, tmpdir):
+    string = synthetic.gradients(size)
+    return lambda: conformers.scss_conform(string)
+
+
+@benchmark(RULE_SIZES)
+def qt_conform_rules(size, tmpdir):
+    css = api.compile(synthetic.rules(size))
+    return lambda: conformers.qt_conform(css)
+
+
+@benchmark((100, 10000))
+def minify_rules(size, tmpdir):
+    css = api.compile(synthetic.rules(size))
+    return lambda: minify.minify(css)
+
+
+@benchmark((100, 1000))
+def minify_gradients(size, tmpdir):
+    css = api.compile(synthetic.gradients(size))
+    return lambda: minify.minify(css)
+
+
+@benchmark((100, 10000))
+def delta_diff(size, tmpdir):
+    old = api.compile(synthetic.rules(size))
+    new = api.compile(synthetic.rules(size).replace('#button0 ', '#b '))
+    return lambda: delta.diff(old, new)
+
+
+@benchmark()
+def rgba(size, tmpdir):
+    args = [sass.SassNumber(v, '') for v in (10, 20, 30, 0.5)]
+    return lambda: functions.rgba(*args)
+
+
+@benchmark()
+def rgba_from_color(size, tmpdir):
+    color = sass.SassColor(10.0, 20.0, 30.0, 0.5)
+    return lambda: functions.rgba_from_color(color)
+
+
+def _stops(n):
+    return sass.SassList([
+        sass.SassList([
+            sass.SassNumber(i / float(n), ''),
+            sass.SassColor(float(i % 256), 0.0, 255.0, 1.0),
+        ], sass.SASS_SEPARATOR_SPACE) for i in range(n)
+    ], sass.SASS_SEPARATOR_COMMA)
+
+
+@benchmark((2, 100))
+def qlineargradient(size, tmpdir):
+    coords = [sass.SassNumber(v, '') for v in (0, 0, 0, 1)]
+    stops = _stops(size)
+    return lambda: functions.qlineargradient(*(coords + [stops]))
+
+
+@benchmark((2, 100))
+def qradialgradient(size, tmpdir):
+    coords = [sass.SassNumber(v, '') for v in (0.5, 0.5, 1, 0.5, 0.5)]
+    stops = _stops(size)
+    return lambda: functions.qradialgradient('pad', *(coords + [stops]))
+
+
+@benchmark((10, 1000))
+def format_stops(size, tmpdir):
+    stops = _stops(size)[0]
+    return lambda: functions.format_stops(stops)
+
+
+@benchmark((1, 10))
+def qss_importer(size, tmpdir):
+    include_paths = []
+    for i in range(size):
+        path = os.path.join(tmpdir, 'include{}'.format(i))
+        os.makedirs(path)
+        include_paths.append(path)
+    with open(os.path.join(include_paths[-1], '_partial.scss'), 'w') as f:
+        f.write(synthetic.rules(10))
+
+    importer = importers.qss_importer(*include_paths)
+    return lambda: importer('partial')
+
+
+@benchmark(RULE_SIZES)
+def compile_rules(size, tmpdir):
+    string = synthetic.rules(size)
+    return lambda: api.compile(string)
+
+
+@benchmark(GRADIENT_SIZES)
+def compile_gradients(size, tmpdir):
+    string = synthetic.gradients(size)
+    return lambda: api.compile(string)
+
+
+@benchmark((100, 1000))
+def compile_palette(size, tmpdir):
+    string = synthetic.palette(size)
+    return lambda: api.compile(string)
+
+
+@benchmark(DEPTHS)
+def compile_filename_import_chain(size, tmpdir):
+    entry = synthetic.import_chain(tmpdir, size)
+    return lambda: api.compile_filename(entry)
+
+
+@benchmark()
+def compile_filename_complex(size, tmpdir):
+    entry = os.path.join(EXAMPLES_DIR, 'complex', 'dark.scss')
+    return lambda: api.compile_filename(entry)
+
+
+@benchmark((1000, 10000))
+def compile_filename_write(size, tmpdir):
+    entry = os.path.join(tmpdir, 'rules.scss')
+    with open(entry, 'w') as f:
+        f.write(synthetic.rules(size))
+    output = os.path.join(tmpdir, 'rules.css')
+    return lambda: api.compile_filename(entry, output)
+
+
+@benchmark((1000, 10000))
+def compile_filename_stream(size, tmpdir):
+    entry = os.path.join(tmpdir, 'rules.scss')
+    with open(entry, 'w') as f:
+        f.write(synthetic.rules(size))
+    output = os.path.join(tmpdir, 'rules.css')
+    return lambda: api.compile_filename(entry, output, stream=True)
+
+
+@benchmark(ENTRY_SIZES)
+def compile_filename_themes(size, tmpdir):
+    entries = synthetic.theme_tree(tmpdir, size)
+    return lambda: [api.compile_filename(entry) for entry in entries]
+
+
+@benchmark(ENTRY_SIZES)
+def compile_variants_themes(size, tmpdir):
+    entry = synthetic.theme_tree(tmpdir, 1)[0]
+    variables = {'theme{}'.format(i): {'index': i} for i in range(size)}
+    return lambda: api.compile_variants(entry, variables)
+
+
+@benchmark(ENTRY_SIZES)
+def compile_dirname_themes(size, tmpdir):
+    src = os.path.join(tmpdir, 'src')
+    os.makedirs(src)
+    synthetic.theme_tree(src, size)
+    output = os.path.join(tmpdir, 'output')
+    return lambda: api.compile_dirname(src, output)
+
+
+@benchmark()
+def compile_dirname_complex(size, tmpdir):
+    src = os.path.join(EXAMPLES_DIR, 'complex')
+    output = os.path.join(tmpdir, 'output')
+    return lambda: api.compile_dirname(src, output)
+
+
+@benchmark(TREE_SIZES)
+def snapshot_take(size, tmpdir):
+    synthetic.project_tree(tmpdir, size)
+    return lambda: snapshots.take(tmpdir, depth=2)
+
+
+@benchmark(TREE_SIZES)
+def snapshot_poll(size, tmpdir):
+    synthetic.project_tree(tmpdir, size)
+
+    # Backdate directories so their listings are reused between polls
+    old = time.time() - 60
+    for root, _, _ in os.walk(tmpdir):
+        os.utime(root, (old, old))
+    state = {'snapshot': snapshots.take(tmpdir, depth=2)}
+
+    def poll():
+        snapshot = snapshots.take(tmpdir, depth=2, prev=state['snapshot'])
+        snapshots.diff(state['snapshot'], snapshot)
+        state['snapshot'] = snapshot
+
+    return poll
+
+
+@benchmark((100, 1000))
+def fingerprints_touch(size, tmpdir):
+    synthetic.project_tree(tmpdir, size)
+    store = fingerprints.FingerprintStore()
+    store.seed(tmpdir)
+    changes = {
+        path: 'Changed'
+        for path in snapshots.take(tmpdir, depth=2)
+        if os.path.isfile(path)
+    }
+
+    def touch_and_filter():
+        for path in changes:
+            os.utime(path)
+        store.filter(changes)
+
+    return touch_and_filter
+
+
+def _import(statement):
+    command = [sys.executable, '-c', statement]
+    return lambda: subprocess.check_call(command)
+
+
+@benchmark()
+def import_python(size, tmpdir):
+    return _import('pass')
+
+
+@benchmark()
+def import_qtsass(size, tmpdir):
+    return _import('import qtsass')
+
+
+@benchmark()
+def import_qtsass_compile(size, tmpdir):
+    return _import('from qtsass import compile')
+
+
+@benchmark()
+def import_qtsass_cli(size, tmpdir):
+    return _import('import qtsass.cli')
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Generate synthetic QtSASS stylesheets of scaling size."""
+
+# Standard library imports
+import os
+
+
+RULE_TEMPLATE = """
+QWidget#widget{i}:!enabled {{
+    background: rgba({r}, {g}, {b}, 0.5);
+    color: rgb({b}, {g}, {r});
+    padding: {p}px;
+}}
+"""
+GRADIENT_TEMPLATE = """
+QPushButton#button{i}:hover {{
+    background: qlineargradient(
+        x1: 0, y1: 0, x2: 0, y2: 1,
+        stop: 0 rgba({r}, {g}, {b}, 100%),
+        stop: 1 rgb({b}, {g}, {r})
+    );
+    border-color: qradialgradient(
+        spread: pad, cx: 0.5, cy: 0.5, radius: 1, fx: 0.5, fy: 0.5,
+        stop: 0 red,
+        stop: 1 blue
+    );
+}}
+"""
+
+
+def _format(template, i):
+    return template.format(
+        i=i,
+        r=i % 256,
+        g=(i * 7) % 256,
+        b=(i * 13) % 256,
+        p=i % 16,
+    )
+
+
+def rules(n):
+    """Return a stylesheet with n plain rules."""
+    return ''.join(_format(RULE_TEMPLATE, i) for i in range(n))
+
+
+def gradients(n):
+    """Return a stylesheet with n rules each holding two gradients."""
+    return ''.join(_format(GRADIENT_TEMPLATE, i) for i in range(n))
+
+
+def palette(n, stops=64, distinct=8):
+    """Return a stylesheet with n rules holding gradients of many stops.
+
+    Only distinct different gradients are used, like a palette shared by the
+    widgets of a theme.
+    """
+    gradients = []
+    for i in range(distinct):
+        stops_str = ', '.join(
+            'stop: {:.3f} rgba({}, {}, {}, {}%)'.format(
+                j / float(stops),
+                (i * 31 + j) % 256,
+                (i * 7 + j * 3) % 256,
+                (j * 13) % 256,
+                j % 100,
+            ) for j in range(stops))
+        gradients.append(
+            'qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1, {})'.format(stops_str))
+    return ''.join(
+        'QFrame#frame{} {{\n    background: {};\n}}\n'.format(
+            i, gradients[i % distinct])
+        for i in range(n))
+
+
+def import_chain(root, depth, rules_per_file=10):
+    """Write an entry file importing a chain of depth partials.
+
+    :returns: Path to the entry file.
+    """
+    for level in range(depth):
+        content = rules(rules_per_file)
+        if level + 1 < depth:
+            content = "@import 'level{}';\n".format(level + 1) + content
+        path = os.path.join(root, '_level{}.scss'.format(level))
+        with open(path, 'w') as f:
+            f.write(content)
+
+    entry = os.path.join(root, 'entry.scss')
+    with open(entry, 'w') as f:
+        f.write("@import 'level0';\n")
+    return entry
+
+
+def theme_tree(root, entries, partials=5, rules_per_file=20):
+    """Write a tree of entry files sharing the same partials.
+
+    :returns: List of entry file paths.
+    """
+    imports = []
+    for i in range(partials):
+        with open(os.path.join(root, '_partial{}.scss'.format(i)), 'w') as f:
+            f.write(rules(rules_per_file))
+        imports.append("@import 'partial{}';".format(i))
+
+    paths = []
+    for i in range(entries):
+        path = os.path.join(root, 'theme{}.scss'.format(i))
+        with open(path, 'w') as f:
+            f.write('$index: {};\n'.format(i))
+            f.write('\n'.join(imports))
+        paths.append(path)
+    return paths
+
+
+def project_tree(root, files, dirs=10, stylesheets=0.05):
+    """Write a project tree where only a fraction of files are stylesheets.
+
+    The tree is 2 levels deep, with dirs subdirectories in each level.
+    """
+    leaves = []
+    for i in range(dirs):
+        for j in range(dirs):
+            path = os.path.join(root, 'pkg{}'.format(i), 'mod{}'.format(j))
+            os.makedirs(path)
+            leaves.append(path)
+
+    every = max(1, int(round(1 / stylesheets)))
+    for i in range(files):
+        ext = '.scss' if i % every == 0 else '.py'
+        path = os.path.join(leaves[i % len(leaves)], 'file{}{}'.format(i, ext))
+        with open(path, 'w') as f:
+            f.write('')
@@ -25,13 +25,7 @@ from __future__ import absolute_import
 import logging
 
 # Local imports
-from qtsass.api import (
-    compile,
-    compile_dirname,
-    compile_filename,
-    enable_logging,
-    watch,
-)
+from qtsass.logs import enable_logging
 
 
 # yapf: enable
@@ -40,6 +34,60 @@ from qtsass.api import (
 logging.getLogger(__name__).addHandler(logging.NullHandler())
 enable_logging()
 
+# Public names loaded from their module on first access, so that importing
+# qtsass does not import sass, the watchers or any Qt bindings.
+_LAZY_ATTRIBUTES = {
+    'compile': 'qtsass.api',
+    'compile_dirname': 'qtsass.api',
+    'compile_filename': 'qtsass.api',
+    'compile_variants': 'qtsass.api',
+    'watch': 'qtsass.api',
+    'CompileCache': 'qtsass.cache',
+    'CompileStats': 'qtsass.stats',
+    'SourceMap': 'qtsass.sourcemaps',
+}
+_LAZY_SUBMODULES = (
+    'aio',
+    'api',
+    'bundle',
+    'cache',
+    'conformers',
+    'delta',
+    'functions',
+    'graph',
+    'importers',
+    'minify',
+    'sourcemaps',
+    'stats',
+    'watchers',
+)
+
+__all__ = ['enable_logging'] + sorted(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    """Import public names and submodules on first access."""
+    import importlib
+
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name])
+        value = getattr(module, name)
+    elif name in _LAZY_SUBMODULES:
+        value = importlib.import_module(__name__ + '.' + name)
+    else:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(
+            __name__, name))
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """List lazily imported names along with the module's globals."""
+    return sorted(
+        set(globals()) | set(_LAZY_ATTRIBUTES) | set(_LAZY_SUBMODULES))
+
+
 # Constants
 __version__ = '0.5.0.dev0'
 
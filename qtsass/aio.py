@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Asyncio versions of the qtsass api.
+
+Compiles are offloaded to an executor so that they never block the event
+loop. By default the loop's default executor is used. libsass holds the GIL
+while compiling, so pass a ProcessPoolExecutor to compile on several cores.
+
+.. code-block:: python
+
+    >>> import asyncio
+    >>> import qtsass.aio
+    >>> css = asyncio.run(qtsass.aio.compile('QWidget {color: red;}'))
+"""
+
+# yapf: disable
+
+from __future__ import absolute_import
+
+# Standard library imports
+import asyncio
+import functools
+import logging
+import os
+
+# Third party imports
+import sass
+
+# Local imports
+from qtsass import api
+from qtsass.graph import DEFAULT_GRAPH_FILENAME, DependencyGraph
+from qtsass.importers import ImportCache
+
+
+# yapf: enable
+
+# Constants
+DEFAULT_CONCURRENCY = 4
+
+# Logger setup
+_log = logging.getLogger(__name__)
+
+
+def _run(executor, fn, *args, **kwargs):
+    """Run fn in executor returning an awaitable of its result."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(fn, *args, **kwargs)
+    return loop.run_in_executor(executor, call)
+
+
+async def compile(string, executor=None, **kwargs):
+    """Conform and Compile QtSASS source code to CSS in an executor.
+
+    :param string: QtSASS source code to conform and compile.
+    :param executor: Optional concurrent.futures.Executor to compile in.
+    :param kwargs: Keyword arguments to pass to qtsass.compile
+    :returns: CSS string
+    """
+    return await _run(executor, api.compile, string, **kwargs)
+
+
+async def compile_filename(input_file,
+                           output_file=None,
+                           executor=None,
+                           **kwargs):
+    """Compile and return a QtSASS file as Qt compliant CSS in an executor.
+
+    :param input_file: Path to QtSass file.
+    :param output_file: Optional path to write Qt compliant CSS.
+    :param executor: Optional concurrent.futures.Executor to compile in.
+    :param kwargs: Keyword arguments to pass to qtsass.compile
+    :returns: CSS string
+    """
+    return await _run(executor, api.compile_filename, input_file, output_file,
+                      **kwargs)
+
+
+async def compile_dirname(input_dir,
+                          output_dir,
+                          incremental=False,
+                          concurrency=DEFAULT_CONCURRENCY,
+                          executor=None,
+                          changed_paths=None,
+                          graph=None,
+                          **kwargs):
+    """Compiles QtSASS files in a directory including subdirectories.
+
+    Works like :func:`qtsass.compile_dirname` but compiles up to concurrency
+    entry files at a time in an executor. Outputs are written from the event
+    loop as entry files finish compiling, and a sass.CompileError listing
+    every file that failed is raised once all files have been compiled.
+
+    :param input_dir: Directory containing QtSass files.
+    :param output_dir: Directory to write compiled Qt compliant CSS files to.
+    :param incremental: Only recompile entry files with changed dependencies.
+    :param concurrency: Maximum number of entry files compiled at once.
+    :param executor: Optional concurrent.futures.Executor to compile in.
+    :param changed_paths: Optional paths of changed files.
+    :param graph: Optional DependencyGraph to record imports to.
+    :param kwargs: Keyword arguments to pass to sass.compile
+    :returns: Dict mapping the path of each css file written to its css
+    """
+    kwargs.setdefault('include_paths', [input_dir])
+    stats = kwargs.pop('stats', None)
+    import_cache = kwargs.pop('import_cache', None) or ImportCache()
+
+    if incremental and graph is None:
+        graph_path = os.path.join(output_dir, DEFAULT_GRAPH_FILENAME)
+        graph = DependencyGraph(graph_path)
+
+    entries, jobs = api._dirname_jobs(input_dir, output_dir, kwargs, graph,
+                                      changed_paths, incremental)
+    results = {}
+    errors = []
+    semaphore = asyncio.Semaphore(concurrency or DEFAULT_CONCURRENCY)
+
+    async def compile_job(job):
+        job_kwargs = dict(job[2], import_cache=import_cache)
+        async with semaphore:
+            try:
+                result = await _run(
+                    executor,
+                    api._compile_entry,
+                    job[0],
+                    job_kwargs,
+                    stats is not None,
+                )
+            except Exception as e:
+                _log.error('Failed to compile {}'.format(
+                    os.path.normpath(job[0])))
+                errors.append('{}: {}'.format(job[0], e))
+                return
+        api._finish_entry(job, result, results, graph, stats, incremental)
+
+    try:
+        await asyncio.gather(*[compile_job(job) for job in jobs])
+        if graph is not None:
+            graph.prune(entries)
+    finally:
+        if graph is not None:
+            graph.save()
+
+    if errors:
+        raise sass.CompileError('Failed to compile {} file(s):\n{}'.format(
+            len(errors), '\n'.join(errors)))
+
+    return results
+
+
+def watch(source,
+          destination,
+          compiler=None,
+          interval=1,
+          executor=None,
+          fingerprints=None):
+    """Watch a source file or directory, compiling QtSass files when modified.
+
+    Returns an :class:`qtsass.watchers.aio.AsyncWatcher` yielding a tuple of
+    the changes and the compiled css for every batch of changes. Polls are
+    run in the loop's default executor, so they never block the event loop.
+
+    The compiler defaults to the async compile_filename when source is a file
+    and the async compile_dirname when source is a directory, compiling in
+    executor. When watching a directory with the default compiler only the
+    entry files affected by the changes are compiled.
+
+    .. code-block:: python
+
+        >>> watcher = qtsass.aio.watch('dark.scss', 'dark.css')
+        >>> async for changes, css in watcher:
+        ...     app.setStyleSheet(css)
+
+    :param source: Path to source QtSass file or directory.
+    :param destination: Path to output css file or directory.
+    :param compiler: Compile function (optional)
+    :param interval: Number of seconds to sleep between polls.
+    :param executor: Optional concurrent.futures.Executor to compile in.
+    :param fingerprints: FingerprintStore or path to persist one (optional)
+    :returns: qtsass.watchers.aio.AsyncWatcher instance
+    """
+    from qtsass.watchers.aio import AsyncWatcher
+
+    kwargs = {}
+    if compiler is None:
+        kwargs['import_cache'] = ImportCache()
+        kwargs['executor'] = executor
+
+    if os.path.isfile(source):
+        watch_dir = os.path.dirname(source)
+        compiler = compiler or compile_filename
+    elif os.path.isdir(source):
+        watch_dir = source
+        if compiler is None:
+            compiler = compile_dirname
+            kwargs['changed_paths'] = None
+            kwargs['graph'] = DependencyGraph()
+    else:
+        raise ValueError('source arg must be a dirname or filename...')
+
+    if isinstance(fingerprints, str):
+        from qtsass.watchers.fingerprints import FingerprintStore
+        fingerprints = FingerprintStore(fingerprints)
+
+    return AsyncWatcher(
+        watch_dir,
+        compiler,
+        (source, destination),
+        kwargs,
+        interval=interval,
+        executor=executor,
+        fingerprints=fingerprints,
+    )
@@ -14,16 +14,31 @@ from __future__ import absolute_import, print_function
 
 # Standard library imports
 from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
 import logging
 import os
+import tempfile
+import threading
+import time
 
 # Third party imports
 import sass
 
 # Local imports
-from qtsass.conformers import qt_conform, scss_conform
-from qtsass.functions import qlineargradient, qradialgradient, rgba
-from qtsass.importers import qss_importer
+from qtsass.cache import default_cache, make_key
+from qtsass.conformers import iter_qt_conform, qt_conform, scss_conform
+from qtsass.functions import (
+    color_table_info,
+    qlineargradient,
+    qradialgradient,
+    rgba,
+)
+from qtsass.graph import DEFAULT_GRAPH_FILENAME, DependencyGraph
+from qtsass.importers import ImportCache, norm_path, qss_importer
+from qtsass.logs import enable_logging  # noqa: F401
+from qtsass.minify import minify as minify_qss
+from qtsass.sourcemaps import DEFAULT_SOURCE, OffsetMap, SourceMapBuilder
+from qtsass.stats import CompileStats, measure
 
 
 # yapf: enable
@@ -35,12 +50,30 @@ DEFAULT_CUSTOM_FUNCTIONS = {
     'rgba': rgba
 }
 DEFAULT_SOURCE_COMMENTS = False
+WRITE_BUFFER_SIZE = 1 << 16
+
+# Keyword arguments of the qtsass api that do not affect the compiled css
+NON_OPTION_KWARGS = (
+    'cache',
+    'dependencies',
+    'import_cache',
+    'source_map',
+    'stats',
+    'stream',
+)
 
 # Logger setup
 _log = logging.getLogger(__name__)
 
 
-def compile(string, **kwargs):
+def compile(string,
+            cache=None,
+            dependencies=None,
+            stats=None,
+            import_cache=None,
+            source_map=None,
+            minify=False,
+            **kwargs):
     """
     Conform and Compile QtSASS source code to CSS.
 
@@ -54,10 +87,116 @@ def compile(string, **kwargs):
         >>> qtsass.compile("QWidget {background: rgb(0, 0, 0);}")
         QWidget {background:black;}
 
+    Pass a :class:`qtsass.cache.CompileCache` as cache, or True to use the
+    shared default cache, to reuse the result of previous compiles of the
+    same source and keyword arguments. Compiles passing objects that can not
+    be keyed, like bound methods or instances of user classes, are not
+    cached.
+
+    Pass a :class:`qtsass.stats.CompileStats` as stats to record the time
+    spent in each stage of the compile. No instrumentation is installed when
+    stats is None.
+
+    Pass a :class:`qtsass.sourcemaps.SourceMap` as source_map to map the
+    returned css to the QtSASS sources it was compiled from, without
+    source_comments. The cache is not used when a source map is requested.
+
+    When minify is True the css is minified with
+    :func:`qtsass.minify.minify`, which produces the smallest stylesheet Qt
+    parses to the same rules. Source maps are not supported when minifying.
+
     :param string: QtSASS source code to conform and compile.
+    :param cache: Optional CompileCache or True to use the default cache.
+    :param dependencies: Optional set collecting the paths of imported files.
+    :param stats: Optional CompileStats to record timings and counters to.
+    :param import_cache: Optional ImportCache shared between compiles.
+    :param source_map: Optional SourceMap to fill.
+    :param minify: Minify the css.
     :param kwargs: Keyword arguments to pass to sass.compile
     :returns: CSS string
     """
+    if stats is not None:
+        start = time.perf_counter()
+        stats.compiles += 1
+        stats.input_size += len(string.encode('utf-8'))
+
+    if cache is True:
+        cache = default_cache
+
+    builder = scss_offsets = qss_offsets = None
+    if source_map is not None:
+        if minify:
+            raise ValueError('source_map is not supported when minifying')
+        cache = None
+        builder = SourceMapBuilder(source_map)
+        scss_offsets = OffsetMap()
+        qss_offsets = OffsetMap()
+
+    if cache is not None:
+        key = cache.make_key(string,
+                             dict(kwargs, minify=True) if minify else kwargs)
+        if key is None:
+            cache = None
+
+    if cache is not None:
+        css = cache.get(key, dependencies)
+        if css is not None:
+            _log.debug('Compile cache hit %s', key)
+            if stats is not None:
+                stats.cache_hits += 1
+                stats.output_size += len(css.encode('utf-8'))
+                stats.timings['total'] += time.perf_counter() - start
+            return css
+
+        if dependencies is None:
+            dependencies = set()
+
+    # Conform QtSass source code
+    try:
+        with measure(stats, 'scss_conform'):
+            scss = scss_conform(string, scss_offsets)
+    except Exception:
+        _log.error('Failed to conform source code')
+        raise
+
+    if builder is not None:
+        builder.add_source(source_map.source or DEFAULT_SOURCE, string, scss,
+                           scss_offsets)
+
+    css = _sass_compile(scss, dependencies, stats, import_cache, kwargs,
+                        builder)
+
+    with measure(stats, 'qt_conform'):
+        qss = qt_conform(css, qss_offsets)
+
+        if minify:
+            qss = minify_qss(qss)
+
+    if builder is not None:
+        builder.build(css, qss, qss_offsets)
+    css = qss
+
+    if cache is not None:
+        cache.set(key, css, dependencies)
+
+    if stats is not None:
+        stats.output_size += len(css.encode('utf-8'))
+        stats.timings['total'] += time.perf_counter() - start
+
+    return css
+
+
+def _sass_compile(scss,
+                  dependencies,
+                  stats,
+                  import_cache,
+                  kwargs,
+                  source_map=None):
+    """Compile conformed scss with sass.compile returning css.
+
+    Adds the qtsass importer and custom functions to kwargs. The source map
+    generated by libsass is loaded into the source_map builder if any.
+    """
     kwargs.setdefault('source_comments', DEFAULT_SOURCE_COMMENTS)
     kwargs.setdefault('custom_functions', [])
     kwargs.setdefault('importers', [])
@@ -65,8 +204,14 @@ def compile(string, **kwargs):
 
     # Add QtSass importers
     if isinstance(kwargs['importers'], Sequence):
-        kwargs['importers'] = (list(kwargs['importers']) +
-                               [(0, qss_importer(*kwargs['include_paths']))])
+        importer = qss_importer(
+            *kwargs['include_paths'],
+            dependencies=dependencies,
+            stats=stats,
+            cache=import_cache,
+            source_map=source_map,
+        )
+        kwargs['importers'] = list(kwargs['importers']) + [(0, importer)]
     else:
         raise ValueError('Expected Sequence for importers '
                          'got {}'.format(type(kwargs['importers'])))
@@ -83,12 +228,18 @@ def compile(string, **kwargs):
         raise ValueError('Expected Sequence or Mapping for custom_functions '
                          'got {}'.format(type(kwargs['custom_functions'])))
 
-    # Conform QtSass source code
-    try:
-        kwargs['string'] = scss_conform(string)
-    except Exception:
-        _log.error('Failed to conform source code')
-        raise
+    if stats is not None:
+        from inspect import getfullargspec
+        kwargs['custom_functions'] = {
+            sass.SassFunction(
+                name,
+                getfullargspec(fn).args,
+                stats.wrap_function(name, fn),
+            )
+            for name, fn in kwargs['custom_functions'].items()
+        }
+
+    kwargs['string'] = scss
 
     if _log.isEnabledFor(logging.DEBUG):
         from pprint import pformat
@@ -99,14 +250,47 @@ def compile(string, **kwargs):
         _log.debug('Conformed scss:\n{}'.format(kwargs['string']))
 
     # Compile QtSass source code
+    if stats is not None:
+        colors = color_table_info()
     try:
-        return qt_conform(sass.compile(**kwargs))
+        with measure(stats, 'sass'):
+            if source_map is None:
+                css = sass.compile(**kwargs)
+            else:
+                css = _sass_compile_mapped(kwargs, source_map)
     except sass.CompileError:
         _log.error('Failed to compile source code')
         raise
 
+    if stats is not None:
+        stats.record_colors(colors, color_table_info())
+
+    return css
+
 
-def compile_filename(input_file, output_file=None, **kwargs):
+def _sass_compile_mapped(kwargs, source_map):
+    """Compile kwargs['string'] loading the source map into source_map.
+
+    libsass only generates source maps of files, so the scss is compiled
+    from a temporary file.
+    """
+    kwargs = dict(kwargs)
+    scss = kwargs.pop('string')
+    ext = '.sass' if kwargs.pop('indented', False) else '.scss'
+    with tempfile.TemporaryDirectory(prefix='qtsass-') as directory:
+        entry = os.path.join(directory, 'entry' + ext)
+        with open(entry, 'w', encoding='utf-8') as f:
+            f.write(scss)
+        css, sass_map = sass.compile(
+            filename=entry,
+            source_map_filename=os.path.join(directory, 'entry.css.map'),
+            omit_source_map_url=True,
+            **kwargs)
+    source_map.load_sass_map(sass_map, directory, entry)
+    return css
+
+
+def compile_filename(input_file, output_file=None, stream=False, **kwargs):
     """Compile and return a QtSASS file as Qt compliant CSS.
     Optionally save to a file.
 
@@ -116,34 +300,187 @@ def compile_filename(input_file, output_file=None, **kwargs):
         >>> qtsass.compile_filename("dummy.scss", "dummy.css")
         >>> css = qtsass.compile_filename("dummy.scss")
 
+    When stream is True the css is conformed and written to output_file one
+    block of rules at a time, without holding the whole Qt compliant CSS in
+    memory, and None is returned. The cache is not used when streaming.
+
+    When minify is True the whole css is minified before being written, so
+    streaming does not lower peak memory.
+
+    A :class:`qtsass.sourcemaps.SourceMap` passed as source_map is named
+    after input_file, unless it has a source name, and after output_file.
+    Source maps are not supported when streaming.
+
     :param input_file: Path to QtSass file.
     :param output_file: Optional path to write Qt compliant CSS.
+    :param stream: Stream the CSS to output_file instead of returning it.
     :param kwargs: Keyword arguments to pass to sass.compile
-    :returns: CSS string
+    :returns: CSS string or None when streaming
     """
     input_root = os.path.abspath(os.path.dirname(input_file))
     kwargs.setdefault('include_paths', [input_root])
 
+    source_map = kwargs.get('source_map')
+    if source_map is not None:
+        if source_map.source is None:
+            source_map.source = norm_path(os.path.abspath(input_file))
+        if source_map.file is None and output_file is not None:
+            source_map.file = os.path.basename(output_file)
+
+    _log.info('Compiling {}...'.format(os.path.normpath(input_file)))
+    if stream:
+        if output_file is None:
+            raise ValueError('stream requires an output_file')
+        if source_map is not None:
+            raise ValueError('source_map is not supported when streaming')
+        _compile_stream(input_file, output_file, **kwargs)
+        return None
+
     with open(input_file, 'r') as f:
         string = f.read()
 
-    _log.info('Compiling {}...'.format(os.path.normpath(input_file)))
     css = compile(string, **kwargs)
 
     if output_file is not None:
-        output_root = os.path.abspath(os.path.dirname(output_file))
-        if not os.path.isdir(output_root):
-            os.makedirs(output_root)
-
-        with open(output_file, 'w') as css_file:
-            css_file.write(css)
-            _log.info('Created CSS file {}'.format(
-                os.path.normpath(output_file)))
+        _write_css(output_file, css)
 
     return css
 
 
-def compile_dirname(input_dir, output_dir, **kwargs):
+def _compile_stream(input_file,
+                    output_file,
+                    cache=None,
+                    dependencies=None,
+                    stats=None,
+                    import_cache=None,
+                    minify=False,
+                    **kwargs):
+    """Compile input_file writing the conformed css to output_file."""
+    with open(input_file, 'r') as f:
+        string = f.read()
+
+    if stats is not None:
+        start = time.perf_counter()
+        stats.compiles += 1
+        stats.input_size += len(string.encode('utf-8'))
+
+    try:
+        with measure(stats, 'scss_conform'):
+            scss = scss_conform(string)
+    except Exception:
+        _log.error('Failed to conform source code')
+        raise
+
+    # Only the conformed scss and the css are alive while compiling
+    del string
+    css = _sass_compile(scss, dependencies, stats, import_cache, kwargs)
+    del scss, kwargs
+
+    if minify:
+        with measure(stats, 'qt_conform'):
+            chunks = iter([minify_qss(qt_conform(css))])
+    else:
+        chunks = iter_qt_conform(css)
+    with _open_atomic(output_file) as css_file:
+        while True:
+            with measure(stats, 'qt_conform'):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            css_file.write(chunk)
+            if stats is not None:
+                stats.output_size += len(chunk.encode('utf-8'))
+    _log.info('Created CSS file {}'.format(os.path.normpath(output_file)))
+
+    if stats is not None:
+        stats.timings['total'] += time.perf_counter() - start
+
+
+@contextmanager
+def _open_atomic(output_file):
+    """Open a buffered temporary file replacing output_file once closed.
+
+    Readers of output_file never see a partially written file. The temporary
+    file is removed when an exception is raised while writing.
+    """
+    output_root = os.path.abspath(os.path.dirname(output_file))
+    if not os.path.isdir(output_root):
+        os.makedirs(output_root)
+
+    tmp_file = '{}.{}.{}.tmp'.format(output_file, os.getpid(),
+                                     threading.get_ident())
+    try:
+        with open(tmp_file, 'w', buffering=WRITE_BUFFER_SIZE) as css_file:
+            yield css_file
+        try:
+            os.chmod(tmp_file, os.stat(output_file).st_mode & 0o7777)
+        except OSError:
+            pass
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+        raise
+
+
+def _write_css(output_file, css, only_if_changed=False):
+    """Atomically write css to output_file creating parent directories.
+
+    :param output_file: Path to write Qt compliant CSS.
+    :param css: CSS string
+    :param only_if_changed: Skip writing when output_file has the same content
+    :returns: True if the file was written
+    """
+    if only_if_changed and os.path.isfile(output_file):
+        with open(output_file, 'r') as css_file:
+            if css_file.read() == css:
+                _log.debug('Unchanged CSS file {}'.format(
+                    os.path.normpath(output_file)))
+                return False
+
+    with _open_atomic(output_file) as css_file:
+        css_file.write(css)
+    _log.info('Created CSS file {}'.format(os.path.normpath(output_file)))
+
+    return True
+
+
+_process_import_cache = None
+
+
+def _with_process_import_cache(kwargs):
+    """Return kwargs using the ImportCache of this process if it has none."""
+    global _process_import_cache
+    if 'import_cache' not in kwargs:
+        if _process_import_cache is None:
+            _process_import_cache = ImportCache()
+        kwargs = dict(kwargs, import_cache=_process_import_cache)
+    return kwargs
+
+
+def _compile_entry(input_file, kwargs, collect_stats=False):
+    """Compile an entry file returning its css, imported files and stats.
+
+    Module level so that it can be pickled by a ProcessPoolExecutor. Worker
+    processes share an ImportCache between all the entries they compile.
+    """
+    kwargs = _with_process_import_cache(kwargs)
+    dependencies = set()
+    stats = CompileStats() if collect_stats else None
+    css = compile_filename(
+        input_file, dependencies=dependencies, stats=stats, **kwargs)
+    return css, dependencies, stats
+
+
+def compile_dirname(input_dir,
+                    output_dir,
+                    incremental=False,
+                    workers=1,
+                    changed_paths=None,
+                    graph=None,
+                    **kwargs):
     """Compiles QtSASS files in a directory including subdirectories.
 
     .. code-block:: python
@@ -151,89 +488,395 @@ def compile_dirname(input_dir, output_dir, **kwargs):
         >>> import qtsass
         >>> qtsass.compile_dirname("./scss", "./css")
 
+    In incremental mode the files imported by each entry file are recorded in
+    a dependency graph persisted to the output directory. Subsequent calls
+    only recompile entry files when they or one of their imports changed, and
+    outputs are only written when their content differs.
+
+    When workers is greater than 1 entry files are compiled in a process
+    pool. Any custom_functions and importers must then be picklable. Outputs
+    are written in a deterministic order and a sass.CompileError listing
+    every file that failed is raised once all files have been compiled.
+
+    A CompileStats passed as stats accumulates the statistics of all files,
+    including those compiled in worker processes. Imported files are resolved
+    and conformed once per run, or once per worker process, unless an
+    ImportCache is passed as import_cache.
+
+    When changed_paths is given only the entry files among them and the
+    entry files importing one of them, according to graph, are compiled.
+    Entry files missing from the graph are always compiled. A graph kept in
+    memory between calls, as the directory watcher does, records the imports
+    of every compiled file.
+
     :param input_dir: Directory containing QtSass files.
     :param output_dir: Directory to write compiled Qt compliant CSS files to.
+    :param incremental: Only recompile entry files with changed dependencies.
+    :param workers: Number of processes to use, None for one per cpu.
+    :param changed_paths: Optional paths of changed files.
+    :param graph: Optional DependencyGraph to record imports to.
     :param kwargs: Keyword arguments to pass to sass.compile
+    :returns: Dict mapping the path of each css file written to its css
     """
     kwargs.setdefault('include_paths', [input_dir])
+    workers = workers or os.cpu_count() or 1
+    stats = kwargs.pop('stats', None)
+    import_cache = kwargs.pop('import_cache', None) or ImportCache()
+
+    if incremental and graph is None:
+        graph_path = os.path.join(output_dir, DEFAULT_GRAPH_FILENAME)
+        graph = DependencyGraph(graph_path)
+
+    entries, jobs = _dirname_jobs(input_dir, output_dir, kwargs, graph,
+                                  changed_paths, incremental)
+    results = {}
+
+    def finish(job, result):
+        _finish_entry(job, result, results, graph, stats, incremental)
+
+    collect_stats = stats is not None
+    try:
+        if workers == 1 or len(jobs) < 2:
+            for job in jobs:
+                job_kwargs = dict(job[2], import_cache=import_cache)
+                finish(job, _compile_entry(job[0], job_kwargs, collect_stats))
+        else:
+            _compile_parallel(jobs, workers, finish, collect_stats)
+
+        if graph is not None:
+            graph.prune(entries)
+    finally:
+        if graph is not None:
+            graph.save()
+
+    return results
+
+
+def _dirname_jobs(input_dir,
+                  output_dir,
+                  kwargs,
+                  graph=None,
+                  changed_paths=None,
+                  incremental=False):
+    """Return the entry files in input_dir and the jobs compiling them.
+
+    Each job is a tuple of the entry file, the output file, the kwargs to
+    compile it with and the key identifying those options in graph.
+    """
+    # Entry files affected by changed_paths, None when all are affected
+    affected = None
+    if changed_paths is not None and graph is not None:
+        changed_paths = set(os.path.abspath(p) for p in changed_paths)
+        if not any(os.path.isdir(p) for p in changed_paths):
+            affected = changed_paths | graph.dependents(changed_paths)
 
     def is_valid(file_name):
         return not file_name.startswith('_') and file_name.endswith('.scss')
 
-    for root, _, files in os.walk(input_dir):
+    entries = []
+    jobs = []
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
         relative_root = os.path.relpath(root, input_dir)
         output_root = os.path.join(output_dir, relative_root)
         fkwargs = dict(kwargs)
         fkwargs['include_paths'] = fkwargs['include_paths'] + [root]
-
-        for file_name in [f for f in files if is_valid(f)]:
+        options = None
+        if graph is not None:
+            options = make_key('', {
+                k: v
+                for k, v in fkwargs.items() if k not in NON_OPTION_KWARGS
+            })
+
+        for file_name in sorted(f for f in files if is_valid(f)):
             scss_path = os.path.join(root, file_name)
             css_file = os.path.splitext(file_name)[0] + '.css'
-            css_path = os.path.join(output_root, css_file)
+            css_path = os.path.normpath(os.path.join(output_root, css_file))
+            entries.append(scss_path)
+
+            if (affected is not None and scss_path in graph
+                    and os.path.abspath(scss_path) not in affected):
+                continue
+
+            # Options that can not be keyed never match a previous run
+            if (incremental and options is not None
+                    and graph.is_fresh(scss_path, css_path, options)):
+                _log.debug('Skipping unchanged {}'.format(
+                    os.path.normpath(scss_path)))
+                continue
+
+            jobs.append((scss_path, css_path, fkwargs, options))
+
+    return entries, jobs
+
+
+def _finish_entry(job,
+                  result,
+                  results,
+                  graph=None,
+                  stats=None,
+                  incremental=False):
+    """Write the css compiled by a job and record it in results and graph."""
+    scss_path, css_path, _, options = job
+    css, dependencies, job_stats = result
+    if stats is not None:
+        stats.merge(job_stats)
+    _write_css(css_path, css, only_if_changed=incremental)
+    results[css_path] = css
+    if graph is not None:
+        graph.update(scss_path, css_path, dependencies, options)
+
+
+def _compile_parallel(jobs,
+                      workers,
+                      finish,
+                      collect_stats=False,
+                      compile_job=_compile_entry):
+    """Compile jobs in a process pool calling finish in submission order."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    errors = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        futures = [
+            pool.submit(compile_job, job[0], job[2], collect_stats)
+            for job in jobs
+        ]
+        for job, future in zip(jobs, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                _log.error('Failed to compile {}'.format(
+                    os.path.normpath(job[0])))
+                errors.append('{}: {}'.format(job[0], e))
+                continue
+            finish(job, result)
+
+    if errors:
+        raise sass.CompileError('Failed to compile {} file(s):\n{}'.format(
+            len(errors), '\n'.join(errors)))
+
+
+def compile_variants(entry, variables, workers=1, **kwargs):
+    """Compile variants of an entry file differing only in their variables.
 
-            if not os.path.isdir(output_root):
-                os.makedirs(output_root)
+    .. code-block:: python
 
-            compile_filename(scss_path, css_path, **fkwargs)
+        >>> import qtsass
+        >>> qtsass.compile_variants("theme.scss", {
+        ...     "dark": {"defaults": {"background": "#000"}},
+        ...     "light": {"defaults": {"background": "#fff"}},
+        ... })
+        {'dark': '...', 'light': '...'}
+
+    The entry file is read and conformed once, and its imports are resolved
+    and conformed once for all variants, or once per worker process. The
+    variables of each variant are declared before the content of the entry
+    file, so they override variables declared with !default. Values are
+    converted with :func:`sass_value`.
+
+    A sass.CompileError listing every variant that failed is raised once all
+    variants have been compiled.
+
+    :param entry: Path to QtSass entry file.
+    :param variables: Dict mapping variant names to dicts of variables.
+    :param workers: Number of processes to use, None for one per cpu.
+    :param kwargs: Keyword arguments to pass to sass.compile
+    :returns: Dict mapping variant names to Qt compliant CSS strings
+    """
+    input_root = os.path.abspath(os.path.dirname(entry))
+    kwargs.setdefault('include_paths', [input_root])
+    workers = workers or os.cpu_count() or 1
+    stats = kwargs.pop('stats', None)
+    dependencies = kwargs.pop('dependencies', None)
+    import_cache = kwargs.pop('import_cache', None) or ImportCache()
+
+    with open(entry, 'r') as f:
+        string = f.read()
+
+    _log.info('Compiling {} variant(s) of {}...'.format(
+        len(variables), os.path.normpath(entry)))
+    try:
+        with measure(stats, 'scss_conform'):
+            scss = scss_conform(string)
+    except Exception:
+        _log.error('Failed to conform source code')
+        raise
+
+    jobs = [(name, None, dict(kwargs, string=declare_variables(values) + scss))
+            for name, values in variables.items()]
+    results = {}
+
+    def finish(job, result):
+        css, variant_dependencies, variant_stats = result
+        results[job[0]] = css
+        if dependencies is not None:
+            dependencies.update(variant_dependencies)
+        if stats is not None:
+            stats.merge(variant_stats)
+
+    collect_stats = stats is not None
+    if workers == 1 or len(jobs) < 2:
+        errors = []
+        for job in jobs:
+            job_kwargs = dict(job[2], import_cache=import_cache)
+            try:
+                result = _compile_variant(job[0], job_kwargs, collect_stats)
+            except Exception as e:
+                _log.error('Failed to compile variant {}'.format(job[0]))
+                errors.append('{}: {}'.format(job[0], e))
+                continue
+            finish(job, result)
+
+        if errors:
+            raise sass.CompileError(
+                'Failed to compile {} variant(s):\n{}'.format(
+                    len(errors), '\n'.join(errors)))
+    else:
+        _compile_parallel(jobs, workers, finish, collect_stats,
+                          _compile_variant)
+
+    return results
+
+
+def _compile_variant(name, kwargs, collect_stats=False):
+    """Compile the conformed scss of a variant passed as kwargs['string'].
+
+    Module level so that it can be pickled by a ProcessPoolExecutor.
+    """
+    kwargs = dict(_with_process_import_cache(kwargs))
+    scss = kwargs.pop('string')
+    import_cache = kwargs.pop('import_cache')
+    dependencies = set()
+    stats = CompileStats() if collect_stats else None
+    if stats is not None:
+        start = time.perf_counter()
+        stats.compiles += 1
+        stats.input_size += len(scss.encode('utf-8'))
 
+    _log.debug('Compiling variant {}...'.format(name))
+    css = _sass_compile(scss, dependencies, stats, import_cache, kwargs)
 
-def enable_logging(level=None, handler=None):
-    """Enable logging for qtsass.
+    with measure(stats, 'qt_conform'):
+        css = qt_conform(css)
 
-    Sets the qtsass logger's level to:
-        1. the provided logging level
-        2. logging.DEBUG if the QTSASS_DEBUG envvar is a True value
-        3. logging.WARNING
+    if stats is not None:
+        stats.output_size += len(css.encode('utf-8'))
+        stats.timings['total'] += time.perf_counter() - start
+
+    return css, dependencies, stats
+
+
+def declare_variables(variables):
+    r"""Return scss declaring a dict of variables.
 
     .. code-block:: python
-        >>> import logging
-        >>> import qtsass
-        >>> handler = logging.StreamHandler()
-        >>> formatter = logging.Formatter('%(level)-8s: %(name)s> %(message)s')
-        >>> handler.setFormatter(formatter)
-        >>> qtsass.enable_logging(level=logging.DEBUG, handler=handler)
-
-    :param level: Optional logging level
-    :param handler: Optional handler to add
-    """
-    if level is None:
-        debug = os.environ.get('QTSASS_DEBUG', False)
-        if debug in ('1', 'true', 'True', 'TRUE', 'on', 'On', 'ON'):
-            level = logging.DEBUG
-        else:
-            level = logging.WARNING
 
-    logger = logging.getLogger('qtsass')
-    logger.setLevel(level)
-    if handler:
-        logger.addHandler(handler)
-    _log.debug('logging level set to {}.'.format(level))
+        >>> declare_variables({'accent': '#3daee9', 'radius': 2})
+        '$accent: #3daee9;\n$radius: 2;\n'
+
+    :param variables: Dict mapping variable names to values.
+    :returns: SCSS string
+    """
+    return ''.join('${}: {};\n'.format(name.lstrip('$'), sass_value(value))
+                   for name, value in variables.items())
+
 
+def sass_value(value):
+    """Convert a Python value to a sass literal.
 
-def watch(source, destination, compiler=None, Watcher=None):
+    Strings are used as is, so they may hold any sass expression. Quote them
+    to get a sass string. Dicts become maps and lists or tuples become comma
+    separated lists.
+
+    :param value: str, int, float, bool, None, dict, list or tuple.
+    :returns: SCSS string
+    """
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float, str)):
+        return str(value)
+    if isinstance(value, Mapping):
+        return '({})'.format(', '.join('{}: {}'.format(key, sass_value(item))
+                                       for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        items = [sass_value(item) for item in value]
+        if len(items) == 1:
+            return '({},)'.format(items[0])
+        return '({})'.format(', '.join(items))
+    raise ValueError('Can not convert {} to a sass value'.format(type(value)))
+
+
+def watch(source,
+          destination,
+          compiler=None,
+          Watcher=None,
+          skip_unchanged=False,
+          fingerprints=None,
+          minify=False):
     """
     Watches a source file or directory, compiling QtSass files when modified.
 
     The compiler function defaults to compile_filename when source is a file
-    and compile_dirname when source is a directory.
+    and compile_dirname when source is a directory. The default compilers
+    share an ImportCache for the lifetime of the watcher.
+
+    When watching a directory with the default compiler, only the changed
+    entry files and the entry files importing a changed file are compiled.
+    Callbacks receive a dict mapping each compiled css file to its css.
+
+    When skip_unchanged is True, callbacks are not called with outputs
+    identical to the previously dispatched ones, which avoids restyling an
+    application when a change does not affect its stylesheet.
+
+    Pass a :class:`qtsass.watchers.fingerprints.FingerprintStore`, or the
+    path of a file to persist one to, as fingerprints to ignore changes of
+    files whose contents did not change, like touched files or files
+    restored by a git checkout.
+
+    When minify is True, minify is passed to the compiler.
 
     :param source: Path to source QtSass file or directory.
     :param destination: Path to output css file or directory.
     :param compiler: Compile function (optional)
     :param Watcher: Defaults to qtsass.watchers.Watcher (optional)
+    :param skip_unchanged: Skip dispatching unchanged outputs (optional)
+    :param fingerprints: FingerprintStore or path to persist one (optional)
+    :param minify: Minify the compiled css (optional)
     :returns: qtsass.watchers.Watcher instance
     """
+    kwargs = {}
+    if minify:
+        kwargs['minify'] = True
+    if compiler is None:
+        kwargs['import_cache'] = ImportCache()
+
     if os.path.isfile(source):
         watch_dir = os.path.dirname(source)
         compiler = compiler or compile_filename
     elif os.path.isdir(source):
         watch_dir = source
-        compiler = compiler or compile_dirname
+        if compiler is None:
+            compiler = compile_dirname
+            kwargs['changed_paths'] = None
+            kwargs['graph'] = DependencyGraph()
     else:
         raise ValueError('source arg must be a dirname or filename...')
 
     if Watcher is None:
         from qtsass.watchers import Watcher
 
-    watcher = Watcher(watch_dir, compiler, (source, destination))
+    if isinstance(fingerprints, str):
+        from qtsass.watchers.fingerprints import FingerprintStore
+        fingerprints = FingerprintStore(fingerprints)
+
+    watcher = Watcher(
+        watch_dir,
+        compiler,
+        (source, destination),
+        kwargs,
+        skip_unchanged=skip_unchanged,
+        fingerprints=fingerprints,
+    )
     return watcher
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Precompiled stylesheet bundles.
+
+A bundle stores the compiled css of several entry files, the variants, in a
+single file so that applications can load their stylesheet at startup
+without importing sass or compiling anything.
+
+.. code-block:: python
+
+    >>> # At build time, or with: qtsass bundle ./scss -o theme.qssb
+    >>> from qtsass import bundle
+    >>> bundle.write_bundle('theme.qssb', ['./scss/dark.scss'])
+
+    >>> # At runtime
+    >>> css = bundle.load_stylesheet('theme.qssb', 'dark')
+
+The file starts with a magic string and the size of a json index, followed
+by the index and the utf-8 encoded css of every variant. The index records
+where each variant's css is stored and the sha1 of its entry file and every
+file it imported. Paths are stored relative to the bundle's directory.
+
+Bundles are read through mmap and only the requested variant is decoded.
+Only the standard library is imported, unless a stale variant needs to be
+compiled again.
+"""
+
+# yapf: disable
+
+from __future__ import absolute_import
+
+# Standard library imports
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+
+
+# yapf: enable
+
+# Constants
+BUNDLE_FORMAT = 1
+MAGIC = b'QTSASSB\x00'
+HEADER = struct.Struct('<8sI')
+
+# Logger setup
+_log = logging.getLogger(__name__)
+
+
+class BundleError(ValueError):
+    """Raised when a bundle can not be read or a variant is missing."""
+
+
+class StaleBundleError(BundleError):
+    """Raised when the sources of a variant changed since it was bundled."""
+
+
+def file_hash(path):
+    """Return the sha1 hex digest of a file's content."""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _relpath(path, root):
+    try:
+        return os.path.relpath(path, root).replace('\\', '/')
+    except ValueError:
+        # Paths on different drives
+        return os.path.abspath(path)
+
+
+def _find_entries(path):
+    """Return a list of (variant, entry file) tuples found in path."""
+    if os.path.isfile(path):
+        name = os.path.splitext(os.path.basename(path))[0]
+        return [(name, path)]
+
+    entries = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for file_name in sorted(files):
+            if file_name.startswith('_') or not file_name.endswith('.scss'):
+                continue
+            entry = os.path.join(root, file_name)
+            name = os.path.splitext(_relpath(entry, path))[0]
+            entries.append((name, entry))
+    return entries
+
+
+def write_bundle(path, sources, **kwargs):
+    """Compile entry files and write their css to a bundle.
+
+    :param path: Path of the bundle to write.
+    :param sources: QtSASS entry files or directories containing them.
+        Entry files are named after their path relative to the directory
+        they were found in, without their extension.
+    :param kwargs: Keyword arguments to pass to sass.compile
+    :returns: List of the bundled variant names
+    """
+    from qtsass.api import compile_filename
+
+    root = os.path.dirname(os.path.abspath(path))
+    index = {}
+    blobs = []
+    offset = 0
+    for source in sources:
+        for name, entry in _find_entries(source):
+            if name in index:
+                raise BundleError('Duplicate variant {}'.format(name))
+            dependencies = set()
+            css = compile_filename(entry, dependencies=dependencies, **kwargs)
+            data = css.encode('utf-8')
+            deps = sorted(dependencies | {os.path.abspath(entry)})
+            index[name] = {
+                'entry': _relpath(entry, root),
+                'offset': offset,
+                'size': len(data),
+                'deps': {_relpath(dep, root): file_hash(dep)
+                         for dep in deps},
+            }
+            blobs.append(data)
+            offset += len(data)
+
+    from qtsass import __version__
+
+    header = json.dumps({
+        'format': BUNDLE_FORMAT,
+        'version': __version__,
+        'variants': index,
+    },
+                        sort_keys=True).encode('utf-8')
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(header)))
+        f.write(header)
+        for data in blobs:
+            f.write(data)
+    os.replace(tmp_path, path)
+    _log.info('Created bundle {} with {} variant(s)'.format(path, len(index)))
+    return sorted(index)
+
+
+class Bundle(object):
+    """Read only access to the variants of a bundle.
+
+    .. code-block:: python
+
+        >>> with Bundle('theme.qssb') as bundle:
+        ...     css = bundle.load('dark')
+
+    :param path: Path to the bundle.
+    """
+
+    def __init__(self, path):
+        """Open the bundle and read its index."""
+        self.path = path
+        self.root = os.path.dirname(os.path.abspath(path))
+        with open(path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise BundleError('{} is empty'.format(path))
+
+        try:
+            magic, size = HEADER.unpack_from(self._mmap)
+            if magic != MAGIC:
+                raise BundleError('{} is not a qtsass bundle'.format(path))
+            start = HEADER.size
+            header = json.loads(self._mmap[start:start + size].decode('utf-8'))
+            if header.get('format') != BUNDLE_FORMAT:
+                raise BundleError('Unsupported bundle format {}'.format(
+                    header.get('format')))
+            self.version = header['version']
+            self._variants = dict(header['variants'])
+        except struct.error:
+            self.close()
+            raise BundleError('{} is truncated'.format(path))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            # UnicodeDecodeError and JSONDecodeError are ValueErrors
+            self.close()
+            raise BundleError('{} has a corrupt header: {}'.format(path, e))
+        except BundleError:
+            self.close()
+            raise
+
+        self._data_start = start + size
+
+    def __enter__(self):
+        """Return the bundle."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the bundle."""
+        self.close()
+
+    def __contains__(self, name):
+        """Check if the bundle contains a variant."""
+        return name in self._variants
+
+    @property
+    def variants(self):
+        """Get the sorted names of all variants."""
+        return sorted(self._variants)
+
+    def close(self):
+        """Release the bundle's memory map."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def entry(self, name):
+        """Return the path to the entry file of a variant."""
+        return os.path.join(self.root, self._record(name)['entry'])
+
+    def is_fresh(self, name):
+        """Check if the sources of a variant are unchanged.
+
+        Sources missing on disk, for example in an application shipped
+        without its scss files, are not considered changed.
+        """
+        for path, value in self._record(name)['deps'].items():
+            path = os.path.join(self.root, path)
+            try:
+                if file_hash(path) != value:
+                    return False
+            except OSError:
+                continue
+        return True
+
+    def load(self, name, verify=True):
+        """Return the css of a variant.
+
+        :param name: Name of the variant.
+        :param verify: Check that the variant's sources are unchanged.
+        :raises StaleBundleError: when verify is True and the sources changed
+        """
+        record = self._record(name)
+        if verify and not self.is_fresh(name):
+            raise StaleBundleError('Variant {} of {} is stale'.format(
+                name, self.path))
+
+        start = self._data_start + record['offset']
+        return self._mmap[start:start + record['size']].decode('utf-8')
+
+    def _record(self, name):
+        try:
+            return self._variants[name]
+        except KeyError:
+            raise BundleError('{} has no variant {}'.format(self.path, name))
+
+
+def load_stylesheet(path, name, source=None, verify=True, **kwargs):
+    """Return the css of a bundled variant, compiling it when stale.
+
+    The variant's entry file is compiled when the bundle is stale. When the
+    bundle can not be read, source is compiled if given.
+
+    :param path: Path to the bundle.
+    :param name: Name of the variant.
+    :param source: Optional entry file compiled when the bundle is unusable.
+    :param verify: Check that the variant's sources are unchanged.
+    :param kwargs: Keyword arguments to pass to sass.compile when compiling
+    """
+    try:
+        with Bundle(path) as bundle:
+            try:
+                return bundle.load(name, verify)
+            except StaleBundleError as e:
+                _log.info('{}, compiling...'.format(e))
+                source = bundle.entry(name)
+    except (OSError, BundleError) as e:
+        if source is None:
+            raise
+        _log.info('Failed to load {} from {}: {}'.format(name, path, e))
+
+    from qtsass.api import compile_filename
+    return compile_filename(source, **kwargs)
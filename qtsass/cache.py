@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Content-addressed cache for compiled stylesheets."""
+
+# yapf: disable
+
+from __future__ import absolute_import
+
+# Standard library imports
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+import functools
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+
+
+# yapf: enable
+
+# Constants
+DEFAULT_MAXSIZE = 128
+CACHE_FORMAT = 1
+
+# Logger setup
+_log = logging.getLogger(__name__)
+
+
+class Uncacheable(Exception):
+    """Raised when compile kwargs can not be turned into a stable key."""
+
+
+def _normalize_const(const):
+    """Return a stable string of a code object constant."""
+    if hasattr(const, 'co_code'):
+        return _normalize_code(const)
+    if isinstance(const, tuple):
+        return '({})'.format(','.join(_normalize_const(c) for c in const))
+    if isinstance(const, frozenset):
+        # Sorted since the iteration order of strings varies across processes
+        return '{{{}}}'.format(','.join(
+            sorted(_normalize_const(c) for c in const)))
+    return repr(const)
+
+
+def _normalize_code(code):
+    """Return a hash of a code object, its constants and names."""
+    digest = hashlib.sha1(code.co_code)
+    for const in code.co_consts:
+        digest.update(_normalize_const(const).encode('utf-8'))
+    digest.update(repr(code.co_names).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _normalize_callable(value):
+    """Convert a callable to a json serializable value.
+
+    Functions are identified by their qualified name and a hash of their
+    code, closure and defaults, so that editing a function or building
+    functions from different values in a loop yields different keys.
+    """
+    sass = sys.modules.get('sass')
+    if sass is not None and isinstance(value, sass.SassFunction):
+        return [
+            value.name,
+            _normalize(value.arguments),
+            _normalize(value.callable_),
+        ]
+    if isinstance(value, functools.partial):
+        return [
+            _normalize(value.func),
+            _normalize(value.args),
+            _normalize(value.keywords),
+        ]
+
+    name = '{}.{}'.format(
+        getattr(value, '__module__', None),
+        getattr(value, '__qualname__', None),
+    )
+    if getattr(value, '__self__', None) is not None:
+        # Bound methods depend on the state of their instance
+        if not isinstance(value.__self__, type(sys)):
+            raise Uncacheable('Bound method {}'.format(name))
+        return name
+
+    code = getattr(value, '__code__', None)
+    if code is None:
+        if not hasattr(value, '__qualname__'):
+            raise Uncacheable('Callable object {!r}'.format(value))
+        # Builtin functions and classes
+        return name
+
+    closure = [cell.cell_contents for cell in value.__closure__ or ()]
+    return [
+        name,
+        _normalize_code(code),
+        _normalize(closure),
+        _normalize(value.__defaults__),
+        _normalize(value.__kwdefaults__),
+    ]
+
+
+def _normalize(value):
+    """Convert a sass.compile keyword argument to a json serializable value.
+
+    Callables are normalized by :func:`_normalize_callable`, include paths
+    and other sequences are normalized item by item and mappings are sorted
+    by key.
+
+    :raises Uncacheable: when value contains objects whose state can not be
+        keyed, like instances of user classes.
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    if callable(value):
+        return _normalize_callable(value)
+    if isinstance(value, Mapping):
+        return [[str(k), _normalize(v)] for k, v in sorted(value.items())]
+    if isinstance(value, (Sequence, set, frozenset)):
+        items = [_normalize(v) for v in value]
+        if not isinstance(value, Sequence):
+            items.sort(key=json.dumps)
+        return items
+    raise Uncacheable('Object {!r}'.format(value))
+
+
+def fingerprint(path):
+    """Return a [mtime_ns, size] pair for path or None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def make_key(string, kwargs):
+    """Return a hash of a source string and normalized compile kwargs.
+
+    Returns None when the kwargs contain objects that can not be keyed, the
+    compile must not be cached then.
+    """
+    from qtsass import __version__
+
+    kwargs = dict(kwargs)
+    include_paths = kwargs.get('include_paths', [])
+    if isinstance(include_paths, str):
+        include_paths = [include_paths]
+    kwargs['include_paths'] = [os.path.abspath(p) for p in include_paths]
+
+    try:
+        normalized = _normalize(kwargs)
+    except (Uncacheable, RecursionError) as e:
+        _log.debug('Not caching compile: %s', e)
+        return None
+
+    data = json.dumps(
+        [CACHE_FORMAT, __version__, string, normalized],
+        sort_keys=True,
+    )
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class CompileCache(object):
+    """An LRU cache mapping QtSASS source and options to compiled QSS.
+
+    Entries are keyed on a hash of the source string and the normalized
+    keyword arguments passed to :func:`qtsass.compile`. Files resolved by the
+    qtsass importer are recorded along with each entry and validated on
+    lookup, so editing an imported partial invalidates every entry that
+    depends on it. Files read by user supplied importers are not tracked.
+
+    When a cache directory is provided, entries are also persisted to disk
+    and survive across processes. The disk tier is not size limited.
+
+    .. code-block:: python
+
+        >>> import qtsass
+        >>> cache = qtsass.CompileCache(maxsize=64)
+        >>> css = qtsass.compile("QWidget {color: red;}", cache=cache)
+        >>> cache.stats
+        {'hits': 0, 'misses': 1, 'evictions': 0, 'size': 1}
+
+    :param maxsize: Maximum number of entries kept in memory.
+    :param directory: Optional directory used to persist entries.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, directory=None):
+        """Initialize the cache."""
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        """Return the number of entries held in memory."""
+        return len(self._entries)
+
+    @property
+    def stats(self):
+        """Get a dict of cache statistics."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+        }
+
+    def make_key(self, string, kwargs):
+        """Return the cache key for a source string and compile kwargs.
+
+        Returns None when the compile can not be cached.
+        """
+        return make_key(string, kwargs)
+
+    def get(self, key, dependencies=None):
+        """Return the cached css for key or None on a miss.
+
+        :param key: Key returned by :meth:`make_key`
+        :param dependencies: Optional set to add the entry's dependencies to
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._read(key)
+
+            if entry is None or not self._is_valid(entry):
+                self._discard(key)
+                self.misses += 1
+                return None
+
+            self._store(key, entry)
+            self.hits += 1
+            if dependencies is not None:
+                dependencies.update(entry['deps'])
+            return entry['css']
+
+    def set(self, key, css, dependencies=()):
+        """Store css under key.
+
+        :param key: Key returned by :meth:`make_key`
+        :param css: Compiled css string
+        :param dependencies: Paths of files the css was compiled from
+        """
+        entry = {
+            'css': css,
+            'deps': {path: fingerprint(path)
+                     for path in dependencies},
+        }
+        with self._lock:
+            self._store(key, entry)
+            self._write(key, entry)
+
+    def invalidate(self, string=None, **kwargs):
+        """Invalidate cache entries.
+
+        With no arguments all entries are removed, otherwise only the entry
+        matching the given source string and compile kwargs is removed.
+        """
+        with self._lock:
+            if string is None:
+                keys = list(self._entries.keys())
+                if self.directory and os.path.isdir(self.directory):
+                    keys.extend(
+                        os.path.splitext(f)[0]
+                        for f in os.listdir(self.directory)
+                        if f.endswith('.json'))
+            else:
+                keys = [self.make_key(string, kwargs)]
+                keys = [key for key in keys if key is not None]
+
+            for key in keys:
+                self._discard(key)
+
+    def clear(self):
+        """Remove all entries and reset statistics."""
+        self.invalidate()
+        self.hits = self.misses = self.evictions = 0
+
+    def _is_valid(self, entry):
+        for path, value in entry['deps'].items():
+            if fingerprint(path) != value:
+                _log.debug('Cache entry invalidated by %s', path)
+                return False
+        return True
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _discard(self, key):
+        self._entries.pop(key, None)
+        path = self._path(key)
+        if path and os.path.isfile(path):
+            os.remove(path)
+
+    def _path(self, key):
+        if self.directory:
+            return os.path.join(self.directory, key + '.json')
+
+    def _read(self, key):
+        path = self._path(key)
+        if not path or not os.path.isfile(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            _log.debug('Failed to read cache entry %s', path)
+            return None
+
+    def _write(self, key, entry):
+        path = self._path(key)
+        if not path:
+            return
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+
+default_cache = CompileCache()
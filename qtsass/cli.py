@@ -20,13 +20,9 @@ import sys
 import time
 
 # Local imports
-from qtsass.api import (
-    compile,
-    compile_dirname,
-    compile_filename,
-    enable_logging,
-    watch,
-)
+from qtsass import daemon
+from qtsass.logs import enable_logging
+from qtsass.stats import CompileStats
 
 
 # yapf: enable
@@ -34,6 +30,15 @@ from qtsass.api import (
 _log = logging.getLogger(__name__)
 
 
+def jobs_count(value):
+    """Parse the number of processes of -j/--jobs."""
+    jobs = int(value)
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(
+            'must be 0 or a positive number, got {}'.format(value))
+    return jobs
+
+
 def create_parser():
     """Create qtsass's cli parser."""
     parser = argparse.ArgumentParser(
@@ -57,6 +62,49 @@ def create_parser():
         action='store_true',
         help='If set, recompile when the source file changes.',
     )
+    parser.add_argument(
+        '-f',
+        '--fingerprints',
+        type=str,
+        help='When watching, ignore files rewritten with identical contents '
+        'and persist their content hashes to this file across restarts.',
+    )
+    parser.add_argument(
+        '-m',
+        '--minify',
+        action='store_true',
+        help='Minify the generated Qt compliant CSS.',
+    )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=jobs_count,
+        default=1,
+        help='Number of processes used to compile a directory. Defaults to '
+        '1, which compiles in the current process, and 0 starts one process '
+        'per cpu.',
+    )
+    parser.add_argument(
+        '-p',
+        '--profile',
+        action='store_true',
+        help='Print the time spent in each compile stage to stderr.',
+    )
+    parser.add_argument(
+        '-s',
+        '--socket',
+        type=str,
+        default=os.environ.get(daemon.SOCKET_ENV),
+        help='Forward the compile to the daemon started by "qtsass serve" '
+        'listening on this socket, compiling locally when none is '
+        'listening. Defaults to ${}.'.format(daemon.SOCKET_ENV),
+    )
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Forward the compile to the daemon listening on the default '
+        'socket of "qtsass serve", unless -s/--socket is given.',
+    )
     parser.add_argument(
         '-d',
         '--debug',
@@ -66,12 +114,136 @@ def create_parser():
     return parser
 
 
-def main():
-    """CLI entry point."""
-    args = create_parser().parse_args()
+def create_serve_parser():
+    """Create the parser of the qtsass serve command."""
+    parser = argparse.ArgumentParser(
+        prog='QtSASS serve',
+        description='Serve compile requests from "qtsass --socket" clients.',
+    )
+    parser.add_argument(
+        '-s',
+        '--socket',
+        type=str,
+        default=os.environ.get(daemon.SOCKET_ENV,
+                               daemon.default_socket_path()),
+        help='The path of the Unix domain socket to listen on.',
+    )
+    parser.add_argument(
+        '--stop',
+        action='store_true',
+        help='Stop the daemon listening on the socket.',
+    )
+    parser.add_argument(
+        '-d',
+        '--debug',
+        action='store_true',
+        help='Set the logging level to DEBUG.',
+    )
+    return parser
+
+
+def print_stats(stats):
+    """Print a CompileStats breakdown to stderr."""
+    if stats is not None:
+        print(stats.format(), file=sys.stderr)
+
 
-    # Setup CLI logging
-    debug = os.environ.get('QTSASS_DEBUG', args.debug)
+def create_bundle_parser():
+    """Create the parser of the qtsass bundle command."""
+    parser = argparse.ArgumentParser(
+        prog='QtSASS bundle',
+        description='Compile SASS stylesheets into a precompiled bundle.',
+    )
+    parser.add_argument(
+        'input',
+        type=str,
+        nargs='+',
+        help='SASS stylesheet files or directories containing them.',
+    )
+    parser.add_argument(
+        '-o',
+        '--output',
+        type=str,
+        required=True,
+        help='The path of the generated bundle.',
+    )
+    parser.add_argument(
+        '-d',
+        '--debug',
+        action='store_true',
+        help='Set the logging level to DEBUG.',
+    )
+    return parser
+
+
+def bundle(argv):
+    """Run the qtsass bundle command."""
+    from qtsass.bundle import write_bundle
+
+    args = create_bundle_parser().parse_args(argv)
+    setup_logging(args.debug)
+
+    for path in args.input:
+        if not os.path.exists(path):
+            print('Error: input must be a file or a directory')
+            sys.exit(1)
+
+    write_bundle(args.output, args.input)
+    sys.exit(0)
+
+
+def forward(args):
+    """Forward a compile to a daemon returning the exit code.
+
+    :raises daemon.DaemonError: when the daemon can not serve the request
+    """
+    message = {
+        'command': 'compile',
+        'input': os.path.abspath(args.input),
+        'output': os.path.abspath(args.output) if args.output else None,
+        'jobs': args.jobs,
+        'profile': args.profile,
+        'minify': args.minify,
+    }
+    for response in daemon.request(args.socket, message):
+        if 'css' in response:
+            print(response['css'])
+        elif 'output' in response:
+            _log.info('Created CSS file {}'.format(response['output']))
+        elif not response['ok']:
+            print('Error: {}'.format(response['error']))
+            return 1
+        elif response.get('stats'):
+            print(response['stats'], file=sys.stderr)
+    return 0
+
+
+def serve(argv):
+    """Run the qtsass serve command."""
+    args = create_serve_parser().parse_args(argv)
+    setup_logging(args.debug)
+
+    if args.stop:
+        try:
+            daemon.stop(args.socket)
+        except daemon.DaemonError as e:
+            print('Error: {}'.format(e))
+            sys.exit(1)
+        sys.exit(0)
+
+    try:
+        daemon.Daemon(args.socket).serve_forever()
+    except daemon.DaemonError as e:
+        print('Error: {}'.format(e))
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+    sys.exit(0)
+
+
+def setup_logging(debug):
+    """Set up CLI logging."""
+    debug = os.environ.get('QTSASS_DEBUG', debug)
     if debug in ('1', 'true', 'True', 'TRUE', 'on', 'On', 'ON', True):
         level = logging.DEBUG
     else:
@@ -86,8 +258,32 @@ def main():
     logging.root.addHandler(handler)
     logging.root.setLevel(level)
 
+
+def main():
+    """CLI entry point."""
+    if sys.argv[1:2] == ['serve']:
+        return serve(sys.argv[2:])
+    if sys.argv[1:2] == ['bundle']:
+        return bundle(sys.argv[2:])
+
+    args = create_parser().parse_args()
+    setup_logging(args.debug)
+
+    if args.daemon and not args.socket:
+        args.socket = daemon.default_socket_path()
+
+    if args.socket and not args.watch:
+        try:
+            sys.exit(forward(args))
+        except daemon.DaemonError as e:
+            _log.debug('Compiling locally: {}'.format(e))
+
+    # Imported here so that forwarding to a daemon does not import sass
+    from qtsass.api import compile, compile_dirname, compile_filename, watch
+
     file_mode = os.path.isfile(args.input)
     dir_mode = os.path.isdir(args.input)
+    stats = CompileStats() if args.profile else None
 
     if file_mode and not args.output:
         with open(args.input, 'r') as f:
@@ -96,13 +292,22 @@ def main():
         css = compile(
             string,
             include_paths=os.path.abspath(os.path.dirname(args.input)),
+            stats=stats,
+            minify=args.minify,
         )
         print(css)
+        print_stats(stats)
         sys.exit(0)
 
     elif file_mode:
         _log.debug('compile_filename({}, {})'.format(args.input, args.output))
-        compile_filename(args.input, args.output)
+        compile_filename(
+            args.input,
+            args.output,
+            stream=True,
+            stats=stats,
+            minify=args.minify,
+        )
 
     elif dir_mode and not args.output:
         print('Error: missing required option: -o/--output')
@@ -110,16 +315,29 @@ def main():
 
     elif dir_mode:
         _log.debug('compile_dirname({}, {})'.format(args.input, args.output))
-        compile_dirname(args.input, args.output)
+        compile_dirname(
+            args.input,
+            args.output,
+            workers=args.jobs,
+            stats=stats,
+            minify=args.minify,
+        )
 
     else:
         print('Error: input must be a file or a directory')
         sys.exit(1)
 
+    print_stats(stats)
+
     if args.watch:
         _log.info('qtsass is watching {}...'.format(args.input))
 
-        watcher = watch(args.input, args.output)
+        watcher = watch(
+            args.input,
+            args.output,
+            fingerprints=args.fingerprints,
+            minify=args.minify,
+        )
         watcher.start()
         try:
             while True:
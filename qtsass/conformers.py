@@ -13,14 +13,46 @@
 from __future__ import absolute_import, print_function
 
 # Standard library imports
+from functools import lru_cache
 import re
 
 
 # yapf: enable
 
+# Constants
+CHUNK_SIZE = 1 << 16
+STOPS_CACHE_SIZE = 1024
+
+
+class LazyPattern(object):
+    """Descriptor compiling a regular expression on first access."""
+
+    def __init__(self, pattern, flags=0):
+        """Store the pattern and flags to compile."""
+        self.pattern = pattern
+        self.flags = flags
+        self._compiled = None
+
+    def __get__(self, instance, owner):
+        """Return the compiled pattern."""
+        if self._compiled is None:
+            self._compiled = re.compile(self.pattern, self.flags)
+        return self._compiled
+
 
 class Conformer(object):
-    """Base class for all text transformations."""
+    """Base class for all text transformations.
+
+    Conformers declare the literal tokens that start the text they rewrite.
+    The :class:`ConformerEngine` finds all tokens of all conformers in a
+    single scan and calls :meth:`to_scss` or :meth:`to_qss` with just the
+    matched text. Tokens ending with "(" match up to the balanced closing
+    parenthesis. Conformers leaving the tokens as None are applied to the
+    whole input after the scan.
+    """
+
+    scss_tokens = None
+    qss_tokens = None
 
     def to_scss(self, qss):
         """Transform some qss to valid scss."""
@@ -34,6 +66,9 @@ class Conformer(object):
 class NotConformer(Conformer):
     """Conform QSS "!" in selectors."""
 
+    scss_tokens = (':!', )
+    qss_tokens = (':_qnot_', )
+
     def to_scss(self, qss):
         """Replace "!" in selectors with "_qnot_"."""
         return qss.replace(':!', ':_qnot_')
@@ -43,12 +78,45 @@ class NotConformer(Conformer):
         return css.replace(':_qnot_', ':!')
 
 
+_STOPS_DELIMITERS = re.compile(r'[(),]')
+
+
+@lru_cache(maxsize=STOPS_CACHE_SIZE)
+def _conform_stops(group):
+    """
+    Take a qss str with stops and returns the values.
+
+    Only visits parentheses and commas, and reuses the result for identical
+    stops, which are common in themes sharing a palette.
+
+      'stop: 0 red, stop: 1 blue' => '0 red, 1 blue'
+    """
+    parts = []
+    start = 0
+    bracket_level = 0
+    for match in _STOPS_DELIMITERS.finditer(group):
+        char = match.group()
+        if char == '(':
+            bracket_level += 1
+        elif char == ')':
+            bracket_level -= 1
+        elif not bracket_level:
+            parts.append(group[start:match.start()])
+            start = match.end()
+    parts.append(group[start:])
+
+    return ', '.join(part.split(':', 1)[1].strip() for part in parts if part)
+
+
 class QLinearGradientConformer(Conformer):
     """Conform QSS qlineargradient function."""
 
+    scss_tokens = ('qlineargradient(', )
+    qss_tokens = ()
+
     _DEFAULT_COORDS = ('x1', 'y1', 'x2', 'y2')
 
-    qss_pattern = re.compile(
+    qss_pattern = LazyPattern(
         r'qlineargradient\('
         r'((?:(?:\s+)?(?:x1|y1|x2|y2):(?:\s+)?[0-9A-Za-z$_\.-]+,?)+)'  # coords
         r'((?:(?:\s+)?stop:.*,?)+(?:\s+)?)?'  # stops
@@ -82,24 +150,7 @@ class QLinearGradientConformer(Conformer):
 
           'stop: 0 red, stop: 1 blue' => '0 red, 1 blue'
         """
-        new_group = []
-        split = [""]
-        bracket_level = 0
-        for char in group:
-            if not bracket_level and char == ",":
-                split.append("")
-                continue
-            elif char == "(":
-                bracket_level += 1
-            elif char == ")":
-                bracket_level -= 1
-            split[-1] += char
-
-        for part in split:
-            if part:
-                _, value = part.split(':', 1)
-                new_group.append(value.strip())
-        return ', '.join(new_group)
+        return _conform_stops(group)
 
     def to_scss(self, qss):
         """
@@ -133,9 +184,12 @@ class QLinearGradientConformer(Conformer):
 class QRadialGradientConformer(Conformer):
     """Conform QSS qradialgradient function."""
 
+    scss_tokens = ('qradialgradient(', )
+    qss_tokens = ()
+
     _DEFAULT_COORDS = ('cx', 'cy', 'radius', 'fx', 'fy')
 
-    qss_pattern = re.compile(
+    qss_pattern = LazyPattern(
         r'qradialgradient\('
         # spread
         r'((?:(?:\s+)?(?:spread):(?:\s+)?[0-9A-Za-z$_\.-]+,?)+)?'
@@ -190,24 +244,7 @@ class QRadialGradientConformer(Conformer):
 
           'stop: 0 red, stop: 1 blue' => '0 red, 1 blue'
         """
-        new_group = []
-        split = [""]
-        bracket_level = 0
-        for char in group:
-            if not bracket_level and char == ",":
-                split.append("")
-                continue
-            elif char == "(":
-                bracket_level += 1
-            elif char == ")":
-                bracket_level -= 1
-            split[-1] += char
-
-        for part in split:
-            if part:
-                _, value = part.split(':', 1)
-                new_group.append(value.strip())
-        return ', '.join(new_group)
+        return _conform_stops(group)
 
     def to_scss(self, qss):
         """
@@ -240,27 +277,159 @@ class QRadialGradientConformer(Conformer):
         return css
 
 
+_PARENS_PATTERN = re.compile(r'[()]')
+
+
+def _find_closing_paren(string, pos):
+    """Return the index after the parenthesis closing an open one at pos-1."""
+    level = 1
+    for match in _PARENS_PATTERN.finditer(string, pos):
+        if match.group() == '(':
+            level += 1
+        else:
+            level -= 1
+            if not level:
+                return match.end()
+    return -1
+
+
+class ConformerEngine(object):
+    """Apply a list of Conformers in a single linear scan.
+
+    :param conformers: List of Conformer instances in order of definition.
+    """
+
+    def __init__(self, conformers):
+        """Build the token patterns of conformers."""
+        self.conformers = list(conformers)
+        self._scss = self._build('scss_tokens', self.conformers)
+        self._qss = self._build('qss_tokens', self.conformers[::-1])
+
+    @staticmethod
+    def _build(attr, conformers):
+        tokens = {}
+        others = []
+        for conformer in conformers:
+            conformer_tokens = getattr(conformer, attr)
+            if conformer_tokens is None:
+                others.append(conformer)
+                continue
+            for token in conformer_tokens:
+                tokens.setdefault(token, conformer)
+
+        pattern = None
+        if tokens:
+            pattern = re.compile('|'.join(
+                re.escape(token)
+                for token in sorted(tokens, key=len, reverse=True)))
+
+        return pattern, tokens, others
+
+    @staticmethod
+    def _rewrite(string, pattern, tokens, method, offsets=None):
+        if pattern is None:
+            return string
+
+        buffer = []
+        pos = 0
+        output = 0
+        match = pattern.search(string)
+        while match:
+            start, end = match.span()
+            token = match.group()
+            if token.endswith('('):
+                end = _find_closing_paren(string, end)
+                if end < 0:
+                    break
+
+            copied = string[pos:start]
+            rewritten = getattr(tokens[token], method)(string[start:end])
+            if offsets is not None:
+                offsets.add(output, pos, True)
+                output += len(copied)
+                offsets.add(output, start, False)
+                output += len(rewritten)
+            buffer.append(copied)
+            buffer.append(rewritten)
+            pos = end
+            match = pattern.search(string, pos)
+
+        if not buffer:
+            return string
+
+        if offsets is not None:
+            offsets.add(output, pos, True)
+        buffer.append(string[pos:])
+        return ''.join(buffer)
+
+    def to_scss(self, qss, offsets=None):
+        """Transform qss to valid scss.
+
+        :param offsets: Optional OffsetMap recording the rewritten text.
+        """
+        pattern, tokens, others = self._scss
+        conformed = self._rewrite(qss, pattern, tokens, 'to_scss', offsets)
+        for conformer in others:
+            conformed = conformer.to_scss(conformed)
+        return conformed
+
+    def to_qss(self, css, offsets=None):
+        """Transform css to valid qss.
+
+        :param offsets: Optional OffsetMap recording the rewritten text.
+        """
+        pattern, tokens, others = self._qss
+        conformed = css
+        for conformer in others:
+            conformed = conformer.to_qss(conformed)
+        return self._rewrite(conformed, pattern, tokens, 'to_qss', offsets)
+
+    def iter_qss(self, css, chunk_size=CHUNK_SIZE):
+        """Transform css to valid qss, yielding it in chunks.
+
+        Chunks are at least chunk_size characters long and end at a closing
+        brace, so no conformer token spans two chunks.
+        """
+        pos = 0
+        length = len(css)
+        while pos < length:
+            end = css.find('}', pos + chunk_size)
+            end = length if end < 0 else end + 1
+            yield self.to_qss(css[pos:end])
+            pos = end
+
+
 conformers = [c() for c in Conformer.__subclasses__() if c is not Conformer]
+_engine = None
+
 
+def get_engine():
+    """Get a ConformerEngine for the current list of conformers."""
+    global _engine
+    if _engine is None or _engine.conformers != conformers:
+        _engine = ConformerEngine(conformers)
+    return _engine
 
-def scss_conform(input_str):
+
+def scss_conform(input_str, offsets=None):
     """
     Conform qss to valid scss.
 
     Runs the to_scss method of all Conformer subclasses on the input_str.
     Conformers are run in order of definition.
 
+    Pass a :class:`qtsass.sourcemaps.OffsetMap` as offsets to record the
+    offsets of the scss in the input_str. Conformers without tokens are
+    assumed to keep the offsets of the text they transform.
+
     :param input_str: QSS string
+    :param offsets: Optional OffsetMap to fill.
     :returns: Valid SCSS string
     """
-    conformed = input_str
-    for conformer in conformers:
-        conformed = conformer.to_scss(conformed)
-
-    return conformed
+    return get_engine().to_scss(input_str, offsets)
 
 
-def qt_conform(input_str):
+def qt_conform(input_str, offsets=None):
     """
     Conform css to valid qss.
 
@@ -268,10 +437,22 @@ def qt_conform(input_str):
     Conformers are run in reverse order.
 
     :param input_str: CSS string
+    :param offsets: Optional OffsetMap recording the offsets of the qss in
+        the input_str.
     :returns: Valid QSS string
     """
-    conformed = input_str
-    for conformer in conformers[::-1]:
-        conformed = conformer.to_qss(conformed)
+    return get_engine().to_qss(input_str, offsets)
 
-    return conformed
+
+def iter_qt_conform(input_str, chunk_size=CHUNK_SIZE):
+    """
+    Conform css to valid qss one block of rules at a time.
+
+    Yields the same qss as qt_conform in chunks of about chunk_size
+    characters, so the whole qss string is never held in memory.
+
+    :param input_str: CSS string
+    :param chunk_size: Minimum number of characters per chunk
+    :returns: Generator of valid QSS strings
+    """
+    return get_engine().iter_qss(input_str, chunk_size)
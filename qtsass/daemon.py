@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""A compile daemon serving requests over a Unix domain socket.
+
+``qtsass serve`` keeps a process with warm import and compile caches running,
+and ``qtsass --socket`` forwards compiles to it instead of compiling locally.
+This saves the interpreter startup, imports and cold caches of every
+invocation.
+
+Messages are json objects, one per line. The client sends a single request
+and the daemon answers with any number of messages, the last one having
+``"done": true``::
+
+    > {"protocol": 1, "version": "0.5.0", "command": "compile",
+    >  "input": "/abs/dark.scss", "output": null, "jobs": 1, "profile": false}
+    < {"css": "..."}
+    < {"done": true, "ok": true, "stats": null}
+
+The client module level functions only import the standard library, so that
+forwarding a request stays cheap.
+
+The daemon reads and writes the paths its clients send, so only processes of
+the user running it may talk to it. The socket is created in a directory only
+accessible to the user and is only readable and writable by the user. Where
+the platform reports the credentials of the peer, the daemon rejects clients
+and clients reject daemons running as another user.
+"""
+
+# yapf: disable
+
+from __future__ import absolute_import
+
+# Standard library imports
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+
+
+# yapf: enable
+
+# Constants
+PROTOCOL = 1
+SOCKET_ENV = 'QTSASS_SOCKET'
+
+# Logger setup
+_log = logging.getLogger(__name__)
+
+
+class DaemonError(Exception):
+    """Raised when a daemon can not serve a request."""
+
+
+def default_socket_path():
+    """Return the default path of the daemon's socket for this user.
+
+    The socket is placed in $XDG_RUNTIME_DIR when it is set, otherwise in a
+    qtsass-<uid> directory of the temporary directory.
+    """
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, 'qtsass.sock')
+
+    import tempfile
+
+    user = getattr(os, 'getuid', lambda: os.environ.get('USERNAME', ''))()
+    return os.path.join(tempfile.gettempdir(), 'qtsass-{}'.format(user),
+                        'qtsass.sock')
+
+
+def peer_uid(sock):
+    """Return the uid of the process at the other end of a connected sock.
+
+    Returns None when the platform does not report peer credentials.
+    """
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+
+    creds = struct.Struct('3i')
+    data = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, creds.size)
+    return creds.unpack(data)[1]
+
+
+def _is_current_user(uid):
+    return uid is None or not hasattr(os, 'getuid') or uid == os.getuid()
+
+
+def _read_version():
+    # Read the version without importing qtsass, which imports sass
+    path = os.path.join(os.path.dirname(__file__), '__init__.py')
+    with open(path, 'r') as f:
+        for line in f:
+            if line.startswith('__version__'):
+                return line.split('=')[1].strip().strip('\'"')
+
+
+# Read once, so a daemon keeps reporting the version it is running
+VERSION = _read_version()
+
+
+def _send(sock_file, message):
+    sock_file.write(json.dumps(message).encode('utf-8') + b'\n')
+    sock_file.flush()
+
+
+def request(path, message, timeout=None):
+    """Send a request to the daemon listening on path.
+
+    Yields every message sent back by the daemon, including the final one.
+
+    :param path: Path to the daemon's socket.
+    :param message: Dict containing the command and its arguments.
+    :param timeout: Optional timeout of socket operations in seconds.
+    :raises DaemonError: when no daemon is listening or it rejects the
+        request.
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        raise DaemonError('Unix domain sockets are not supported')
+
+    message = dict({'protocol': PROTOCOL, 'version': VERSION}, **message)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        owner = os.stat(path).st_uid
+        sock.connect(path)
+        peer = peer_uid(sock)
+    except OSError as e:
+        sock.close()
+        raise DaemonError('No daemon listening on {}: {}'.format(path, e))
+
+    if not _is_current_user(owner) or not _is_current_user(peer):
+        sock.close()
+        raise DaemonError(
+            'Daemon listening on {} runs as another user'.format(path))
+
+    try:
+        with sock, sock.makefile('rwb') as sock_file:
+            _send(sock_file, message)
+            for line in sock_file:
+                response = json.loads(line.decode('utf-8'))
+                if response.get('rejected'):
+                    raise DaemonError(response['error'])
+                yield response
+                if response.get('done'):
+                    return
+    except OSError as e:
+        raise DaemonError('Connection to daemon failed: {}'.format(e))
+
+    raise DaemonError('Daemon closed the connection')
+
+
+def ping(path, timeout=1):
+    """Return True if a daemon is listening on path."""
+    try:
+        for _ in request(path, {'command': 'ping'}, timeout):
+            pass
+    except DaemonError:
+        return False
+    return True
+
+
+def stop(path, timeout=5):
+    """Ask the daemon listening on path to shut down."""
+    for _ in request(path, {'command': 'shutdown'}, timeout):
+        pass
+
+
+class Daemon(object):
+    """Serves compile requests with shared warm caches.
+
+    Requests are handled in a thread per connection. Compiles are serialized
+    since libsass holds the GIL while compiling. Connections of processes
+    running as another user are rejected.
+
+    :param path: Path of the Unix domain socket to listen on.
+    """
+
+    def __init__(self, path=None):
+        """Initialize the daemon and its caches."""
+        from qtsass.cache import CompileCache
+        from qtsass.importers import ImportCache
+
+        self.path = path or default_socket_path()
+        self.cache = CompileCache()
+        self.import_cache = ImportCache()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def serve_forever(self):
+        """Listen on the socket until a shutdown request is received."""
+        import socketserver
+
+        if not hasattr(socketserver, 'ThreadingUnixStreamServer'):
+            raise DaemonError('Unix domain sockets are not supported')
+
+        socket_dir = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.isdir(socket_dir):
+            os.makedirs(socket_dir, 0o700)
+
+        if os.path.exists(self.path):
+            if ping(self.path):
+                raise DaemonError('A daemon is already listening on {}'.format(
+                    self.path))
+            os.unlink(self.path)
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                try:
+                    if _is_current_user(peer_uid(self.connection)):
+                        return daemon.handle(self.rfile, self.wfile)
+
+                    _log.warning('Rejected a client running as another user')
+                    _send(self.wfile, {
+                        'rejected': True,
+                        'error': 'Client runs as another user',
+                    })
+                except OSError:
+                    _log.debug('Client closed the connection', exc_info=True)
+
+        self._server = socketserver.ThreadingUnixStreamServer(
+            self.path, Handler)
+        os.chmod(self.path, 0o600)
+        self._server.daemon_threads = True
+        _log.info('qtsass is serving on {}...'.format(self.path))
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def shutdown(self):
+        """Stop serving, must be called from another thread."""
+        if self._server is not None:
+            self._server.shutdown()
+
+    def handle(self, rfile, wfile):
+        """Read one request from rfile and write the responses to wfile."""
+        line = rfile.readline()
+        try:
+            message = json.loads(line.decode('utf-8'))
+        except ValueError:
+            return _send(wfile, {'rejected': True, 'error': 'Invalid request'})
+
+        if message.get('protocol') != PROTOCOL:
+            return _send(
+                wfile, {
+                    'rejected':
+                    True,
+                    'error':
+                    'Unsupported protocol {}'.format(message.get('protocol')),
+                })
+        if message.get('version') != VERSION:
+            return _send(
+                wfile, {
+                    'rejected':
+                    True,
+                    'error':
+                    'Daemon runs qtsass {}, client runs {}'.format(
+                        VERSION, message.get('version')),
+                })
+
+        command = message.get('command')
+        if command == 'ping':
+            return _send(wfile, {'done': True, 'ok': True})
+        if command == 'shutdown':
+            _send(wfile, {'done': True, 'ok': True})
+            threading.Thread(target=self.shutdown).start()
+            return
+        if command != 'compile':
+            return _send(wfile, {
+                'rejected': True,
+                'error': 'Unknown command {}'.format(command),
+            })
+
+        with self._lock:
+            self.requests += 1
+            try:
+                stats = self.compile(message, lambda m: _send(wfile, m))
+            except Exception as e:
+                _log.debug(
+                    'Failed to compile %s',
+                    message.get('input'),
+                    exc_info=True)
+                return _send(wfile, {
+                    'done': True,
+                    'ok': False,
+                    'error': str(e)
+                })
+
+        _send(
+            wfile, {
+                'done': True,
+                'ok': True,
+                'stats': stats.format() if stats is not None else None,
+            })
+
+    def compile(self, message, send):
+        """Compile the input of a compile request like the cli does.
+
+        :param message: Compile request.
+        :param send: Function sending a message back to the client.
+        :returns: CompileStats when profiling was requested
+        """
+        from qtsass.api import compile, compile_dirname, compile_filename
+        from qtsass.stats import CompileStats
+
+        # Files may have been created since the previous request
+        self.import_cache.invalidate_resolutions()
+
+        input = message['input']
+        output = message.get('output')
+        stats = CompileStats() if message.get('profile') else None
+        kwargs = {
+            'cache': self.cache,
+            'import_cache': self.import_cache,
+            'stats': stats,
+            'minify': message.get('minify', False),
+        }
+
+        if os.path.isfile(input) and not output:
+            with open(input, 'r') as f:
+                string = f.read()
+            css = compile(
+                string, include_paths=os.path.dirname(input), **kwargs)
+            send({'css': css})
+        elif os.path.isfile(input):
+            compile_filename(input, output, **kwargs)
+            send({'output': output})
+        elif os.path.isdir(input) and output:
+            workers = message.get('jobs', 1)
+            if workers != 1:
+                # The compile cache can not be shared with worker processes
+                del kwargs['cache']
+            results = compile_dirname(input, output, workers=workers, **kwargs)
+            for path in results:
+                send({'output': path})
+        elif os.path.isdir(input):
+            raise ValueError('missing required option: -o/--output')
+        else:
+            raise ValueError('input must be a file or a directory')
+
+        return stats
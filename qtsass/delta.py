@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Per-selector differences between two stylesheets.
+
+Used by watchers to tell callbacks which rules changed, so that an
+application can restyle only the affected widgets instead of calling
+setStyleSheet on the whole widget tree.
+
+.. code-block:: python
+
+    >>> from qtsass.delta import diff
+    >>> delta = diff('QWidget {color: red;}', 'QWidget {color: blue;}')
+    >>> delta.changed
+    {'QWidget': 'color: blue;'}
+"""
+
+# yapf: disable
+
+from __future__ import absolute_import
+
+# Standard library imports
+import re
+
+
+# yapf: enable
+
+# Constants
+_BRACES_PATTERN = re.compile(r'[{}]')
+_COMMENT_PATTERN = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+
+def parse_rules(css):
+    """Return a dict mapping the selectors of top level rules to their body.
+
+    Whitespace in selectors is normalized. The bodies of rules sharing a
+    selector are joined in order, and nested blocks like @media are kept
+    whole under their prelude.
+
+    :param css: CSS string
+    :returns: Dict mapping selectors to declarations
+    """
+    css = _COMMENT_PATTERN.sub('', css)
+    rules = {}
+    depth = 0
+    start = 0
+    selector = None
+    for match in _BRACES_PATTERN.finditer(css):
+        if match.group() == '{':
+            if not depth:
+                # Skip statements like @charset preceding the selector
+                prelude = css[start:match.start()].rsplit(';', 1)[-1]
+                selector = ' '.join(prelude.split())
+                start = match.end()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if not depth:
+                body = css[start:match.start()].strip()
+                if selector in rules:
+                    body = rules[selector] + '\n' + body
+                rules[selector] = body
+                start = match.end()
+    return rules
+
+
+class StyleDelta(object):
+    """Selectors added, removed or changed between two stylesheets.
+
+    A delta is false when both stylesheets have the same rules. The first
+    delta of an output, which has no previous output, lists all of its rules
+    as added.
+
+    :param css: The new CSS string.
+    :param added: Dict mapping added selectors to their declarations.
+    :param removed: Dict mapping removed selectors to their declarations.
+    :param changed: Dict mapping changed selectors to their new declarations.
+    """
+
+    def __init__(self, css, added, removed, changed):
+        """Store the new css and the differing rules."""
+        self.css = css
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def __bool__(self):
+        """Check if any rule differs."""
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self):
+        """Return a summary of the delta."""
+        return '<StyleDelta added={} removed={} changed={}>'.format(
+            sorted(self.added), sorted(self.removed), sorted(self.changed))
+
+    @property
+    def selectors(self):
+        """Get the sorted selectors of all added, removed or changed rules."""
+        return sorted(set(self.added) | set(self.removed) | set(self.changed))
+
+    @classmethod
+    def from_rules(cls, css, old_rules, new_rules):
+        """Create a StyleDelta from the results of two parse_rules calls.
+
+        :param css: The new CSS string.
+        :param old_rules: Rules of the previous css or None.
+        :param new_rules: Rules of css.
+        """
+        old_rules = old_rules or {}
+        added = {}
+        changed = {}
+        for selector, body in new_rules.items():
+            old_body = old_rules.get(selector)
+            if old_body is None:
+                added[selector] = body
+            elif old_body != body:
+                changed[selector] = body
+
+        removed = {
+            selector: body
+            for selector, body in old_rules.items()
+            if selector not in new_rules
+        }
+        return cls(css, added, removed, changed)
+
+
+def diff(old_css, new_css):
+    """Return the StyleDelta between two CSS strings.
+
+    :param old_css: Previous CSS string or None.
+    :param new_css: New CSS string.
+    """
+    old_rules = parse_rules(old_css) if old_css is not None else None
+    return StyleDelta.from_rules(new_css, old_rules, parse_rules(new_css))
@@ -10,12 +10,25 @@
 
 # yapf: disable
 
+# Standard library imports
+from functools import lru_cache
+from itertools import chain
+import threading
+
 # Third party imports
 import sass
 
 
 # yapf: enable
 
+# Constants
+COLOR_CACHE_SIZE = 4096
+GRADIENT_CACHE_SIZE = 1024
+NUMPY_MIN_STOPS = 64
+
+_numpy = None
+_color_lookups = threading.local()
+
 
 def rgba(r, g, b, a):
     """Convert r,g,b,a values to standard format.
@@ -27,7 +40,6 @@ def rgba(r, g, b, a):
     A percentage value 0% (fully transparent) to 100% (opaque) works
     in BOTH systems the same way!
     """
-    result = 'rgba({}, {}, {}, {}%)'
     if isinstance(r, sass.SassNumber):
         if a.unit == '%':
             alpha = a.value
@@ -36,14 +48,39 @@ def rgba(r, g, b, a):
             alpha = a.value / 2.55
         else:
             alpha = a.value * 100
-        return result.format(
+        return _rgba_string(
             int(r.value),
             int(g.value),
             int(b.value),
             int(alpha),
         )
     elif isinstance(r, float):
-        return result.format(int(r), int(g), int(b), int(a * 100))
+        return _rgba_string(int(r), int(g), int(b), int(a * 100))
+
+
+def _rgba_string(r, g, b, alpha):
+    """Return the qss of a normalized color, reusing palette colors."""
+    _color_lookups.count = getattr(_color_lookups, 'count', 0) + 1
+    return _cached_rgba_string(r, g, b, alpha)
+
+
+@lru_cache(maxsize=COLOR_CACHE_SIZE)
+def _cached_rgba_string(r, g, b, alpha):
+    """Format a color missing from the color table."""
+    _color_lookups.misses = getattr(_color_lookups, 'misses', 0) + 1
+    return 'rgba({}, {}, {}, {}%)'.format(r, g, b, alpha)
+
+
+def color_table_info():
+    """Return the (hits, misses) of the color table in the current thread.
+
+    Lookups are counted per thread, so the difference between two calls
+    around a compile only counts that compile's colors, even when other
+    threads compile at the same time. The table itself is shared.
+    """
+    count = getattr(_color_lookups, 'count', 0)
+    misses = getattr(_color_lookups, 'misses', 0)
+    return count - misses, misses
 
 
 def rgba_from_color(color):
@@ -59,6 +96,75 @@ def rgba_from_color(color):
     return rgba(color.r, color.g, color.b, color.a)
 
 
+def _get_numpy():
+    """Return numpy or None when it is not installed, importing it once."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy as _numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def rgba_from_colors(colors):
+    """
+    Conform a list of colors at once.
+
+    Returns the same strings as calling rgba_from_color on every color. The
+    channels of long lists of sass.SassColor are converted with numpy when it
+    is installed.
+
+    :param colors: List of sass.SassColor or other sass values
+    :returns: List of rgba strings
+    """
+    numpy = None
+    if len(colors) >= NUMPY_MIN_STOPS:
+        if all(type(color) is sass.SassColor for color in colors):
+            numpy = _get_numpy()
+
+    if numpy is None:
+        return [rgba_from_color(color) for color in colors]
+
+    channels = numpy.fromiter(
+        chain.from_iterable(colors),
+        dtype=float,
+        count=len(colors) * 4,
+    ).reshape(-1, 4)
+    channels[:, 3] *= 100
+    return [
+        _rgba_string(*values)
+        for values in channels.astype(numpy.int64).tolist()
+    ]
+
+
+def format_stops(stops):
+    """
+    Format gradient stops as qss, conforming their colors in one batch.
+
+    :param stops: Sequence of sass.SassList of a position and a color
+    :returns: Comma separated qss stops
+    """
+    pairs = [stop[0] for stop in stops]
+    colors = rgba_from_colors([color for _, color in pairs])
+    return ', '.join('stop: {} {}'.format(pos.value, color)
+                     for (pos, _), color in zip(pairs, colors))
+
+
+@lru_cache(maxsize=GRADIENT_CACHE_SIZE)
+def _cached_gradient(template, args, stops):
+    return template.format(*args, format_stops(stops))
+
+
+def _gradient(template, args, stops):
+    """Format a gradient, reusing the result of identical gradients."""
+    try:
+        return _cached_gradient(template, args, stops)
+    except TypeError:
+        # Unhashable sass values
+        return template.format(*args, format_stops(stops))
+
+
 def qlineargradient(x1, y1, x2, y2, stops):
     """
     Implement qss qlineargradient function for scss.
@@ -70,16 +176,12 @@ def qlineargradient(x1, y1, x2, y2, stops):
     :type stops: sass.SassList
     :return:
     """
-    stops_str = []
-    for stop in stops[0]:
-        pos, color = stop[0]
-        stops_str.append('stop: {} {}'.format(
-            pos.value,
-            rgba_from_color(color),
-        ))
     template = 'qlineargradient(x1: {}, y1: {}, x2: {}, y2: {}, {})'
-    return template.format(x1.value, y1.value, x2.value, y2.value,
-                           ', '.join(stops_str))
+    return _gradient(
+        template,
+        (x1.value, y1.value, x2.value, y2.value),
+        stops[0],
+    )
 
 
 def qradialgradient(spread, cx, cy, radius, fx, fy, stops):
@@ -95,15 +197,11 @@ def qradialgradient(spread, cx, cy, radius, fx, fy, stops):
     :type stops: sass.SassList
     :return:
     """
-    stops_str = []
-    for stop in stops[0]:
-        pos, color = stop[0]
-        stops_str.append('stop: {} {}'.format(
-            pos.value,
-            rgba_from_color(color),
-        ))
     template = ('qradialgradient('
                 'spread: {}, cx: {}, cy: {}, radius: {}, fx: {}, fy: {}, {}'
                 ')')
-    return template.format(spread, cx.value, cy.value, radius.value, fx.value,
-                           fy.value, ', '.join(stops_str))
+    return _gradient(
+        template,
+        (spread, cx.value, cy.value, radius.value, fx.value, fy.value),
+        stops[0],
+    )
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Dependency graph used for incremental compiles."""
+
+# yapf: disable
+
+from __future__ import absolute_import
+
+# Standard library imports
+import json
+import logging
+import os
+
+# Local imports
+from qtsass.cache import fingerprint
+
+
+# yapf: enable
+
+# Constants
+GRAPH_FORMAT = 1
+DEFAULT_GRAPH_FILENAME = '.qtsass-deps.json'
+
+# Logger setup
+_log = logging.getLogger(__name__)
+
+
+class DependencyGraph(object):
+    """Maps QtSASS entry files to the files they were compiled from.
+
+    Each entry records the output path, a key identifying the compile options
+    and the fingerprint of the entry file and every file it imported
+    transitively. An entry is fresh while all of those are unchanged.
+
+    :param path: Optional path of the json file used to persist the graph.
+    """
+
+    def __init__(self, path=None):
+        """Initialize the graph and load it from path if it exists."""
+        self.path = path
+        self._entries = {}
+        if path and os.path.isfile(path):
+            self.load()
+
+    def __contains__(self, entry):
+        """Check if an entry file is in the graph."""
+        return os.path.abspath(entry) in self._entries
+
+    def __len__(self):
+        """Return the number of entry files in the graph."""
+        return len(self._entries)
+
+    def load(self):
+        """Load the graph from disk, discarding unreadable data."""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            _log.debug('Failed to read dependency graph %s', self.path)
+            return
+
+        if data.get('format') == GRAPH_FORMAT:
+            self._entries = data.get('entries', {})
+
+    def save(self):
+        """Persist the graph to disk."""
+        if not self.path:
+            return
+
+        root = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.isdir(root):
+            os.makedirs(root)
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'format': GRAPH_FORMAT, 'entries': self._entries}, f)
+        os.replace(tmp_path, self.path)
+
+    def update(self, entry, output, dependencies, options=None):
+        """Record the dependencies of an entry file.
+
+        :param entry: Path to the QtSASS entry file.
+        :param output: Path to the css file compiled from entry.
+        :param dependencies: Paths of all files imported by entry.
+        :param options: Key identifying the compile options used.
+        """
+        entry = os.path.abspath(entry)
+        paths = set(os.path.abspath(p) for p in dependencies)
+        paths.add(entry)
+        self._entries[entry] = {
+            'output': os.path.abspath(output) if output else None,
+            'options': options,
+            'deps': {path: fingerprint(path)
+                     for path in sorted(paths)},
+        }
+
+    def is_fresh(self, entry, output, options=None):
+        """Check if entry and its dependencies are unchanged since update."""
+        record = self._entries.get(os.path.abspath(entry))
+        if record is None:
+            return False
+
+        if output:
+            output = os.path.abspath(output)
+            if record['output'] != output or not os.path.isfile(output):
+                return False
+
+        if record['options'] != options:
+            return False
+
+        for path, value in record['deps'].items():
+            if fingerprint(path) != value:
+                return False
+
+        return True
+
+    def dependents(self, paths):
+        """Return the entry files depending on any of paths."""
+        paths = set(os.path.abspath(p) for p in paths)
+        return set(entry for entry, record in self._entries.items()
+                   if not paths.isdisjoint(record['deps']))
+
+    def discard(self, entry):
+        """Remove an entry file from the graph."""
+        self._entries.pop(os.path.abspath(entry), None)
+
+    def prune(self, entries):
+        """Remove all entry files not in entries."""
+        keep = set(os.path.abspath(e) for e in entries)
+        for entry in list(self._entries):
+            if entry not in keep:
+                del self._entries[entry]
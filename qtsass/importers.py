@@ -14,6 +14,7 @@ from __future__ import absolute_import
 
 # Standard library imports
 import os
+import time
 
 # Local imports
 from qtsass.conformers import scss_conform
@@ -27,13 +28,86 @@ def norm_path(*parts):
     return os.path.normpath(os.path.join(*parts)).replace('\\', '/')
 
 
-def qss_importer(*include_paths):
+class ImportCache(object):
+    """Cache import resolutions and conformed file contents.
+
+    A single ImportCache may be shared by many compiles, for example all the
+    entry files of a compile_dirname run or every compile of a watcher
+    session.
+
+    Resolutions map an import name and include paths to the path found by
+    the importer, including imports that could not be resolved. They are
+    only invalidated explicitly, since creating a file may change how an
+    import resolves. Conformed contents are keyed on the path, mtime and
+    size of the file and are therefore reloaded whenever the file changes.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self.hits = 0
+        self.misses = 0
+        self._resolutions = {}
+        self._contents = {}
+
+    def resolve(self, import_file, include_paths, find_file):
+        """Return the cached resolution of import_file or call find_file."""
+        key = (import_file, tuple(include_paths), os.getcwd())
+        try:
+            return self._resolutions[key]
+        except KeyError:
+            path = self._resolutions[key] = find_file(import_file)
+            return path
+
+    def load(self, path):
+        """Return the conformed content of path and the number of bytes read.
+
+        The number of bytes read is 0 when the content came from the cache.
+        """
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._contents.get(path)
+        if cached is not None and cached[0] == key:
+            self.hits += 1
+            return cached[1], 0
+
+        self.misses += 1
+        with open(path, 'r') as f:
+            import_str = f.read()
+
+        conformed = scss_conform(import_str)
+        self._contents[path] = (key, conformed)
+        return conformed, stat.st_size
+
+    def invalidate_resolutions(self):
+        """Forget all import resolutions."""
+        self._resolutions.clear()
+
+    def invalidate(self, path=None):
+        """Forget all resolutions and the content of path or of all files."""
+        self.invalidate_resolutions()
+        if path is None:
+            self._contents.clear()
+        else:
+            self._contents.pop(path, None)
+
+
+def qss_importer(*include_paths,
+                 dependencies=None,
+                 stats=None,
+                 cache=None,
+                 source_map=None):
     """
     Return function which conforms imported qss files to valid scss.
 
     This fucntion is to be used as an importer for sass.compile.
 
     :param include_paths: Directorys containing scss, css, and sass files.
+    :param dependencies: Optional set collecting the paths of imported files.
+    :param stats: Optional CompileStats recording calls and bytes read.
+    :param cache: Optional ImportCache shared between compiles.
+    :param source_map: Optional SourceMapBuilder the imported files and their
+        offsets are added to. Imported files are then returned by their
+        absolute path and are not loaded from the cache.
     """
     include_paths
 
@@ -65,10 +139,47 @@ def qss_importer(*include_paths):
 
     def import_and_conform_file(import_file):
         """Return base file and conformed scss file."""
-        real_import_file = find_file(import_file)
-        with open(real_import_file, 'r') as f:
-            import_str = f.read()
-
-        return [(import_file, scss_conform(import_str))]
+        if stats is not None:
+            start = time.perf_counter()
+
+        if source_map is not None:
+            from qtsass.sourcemaps import OffsetMap
+
+            real_import_file = norm_path(
+                os.path.abspath(find_file(import_file)))
+            with open(real_import_file, 'r') as f:
+                import_str = f.read()
+            offsets = OffsetMap()
+            conformed = scss_conform(import_str, offsets)
+            size = len(import_str.encode('utf-8'))
+            source_map.add_source(real_import_file, import_str, conformed,
+                                  offsets)
+        elif cache is None:
+            real_import_file = find_file(import_file)
+            with open(real_import_file, 'r') as f:
+                import_str = f.read()
+            conformed = scss_conform(import_str)
+            size = len(import_str.encode('utf-8'))
+        else:
+            real_import_file = cache.resolve(import_file, include_paths,
+                                             find_file)
+            try:
+                conformed, size = cache.load(real_import_file)
+            except (OSError, TypeError):
+                # The cached resolution may point to a deleted file
+                cache.invalidate_resolutions()
+                real_import_file = cache.resolve(import_file, include_paths,
+                                                 find_file)
+                conformed, size = cache.load(real_import_file)
+
+        if dependencies is not None:
+            dependencies.add(os.path.abspath(real_import_file))
+
+        if stats is not None:
+            stats.record_import(time.perf_counter() - start, size)
+
+        if source_map is not None:
+            return [(real_import_file, conformed)]
+        return [(import_file, conformed)]
 
     return import_and_conform_file
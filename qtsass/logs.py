@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""qtsass logging setup, importable without importing sass."""
+
+# yapf: disable
+
+from __future__ import absolute_import
+
+# Standard library imports
+import logging
+import os
+
+
+# yapf: enable
+
+# Logger setup
+_log = logging.getLogger(__name__)
+
+
+def enable_logging(level=None, handler=None):
+    """Enable logging for qtsass.
+
+    Sets the qtsass logger's level to:
+        1. the provided logging level
+        2. logging.DEBUG if the QTSASS_DEBUG envvar is a True value
+        3. logging.WARNING
+
+    .. code-block:: python
+        >>> import logging
+        >>> import qtsass
+        >>> handler = logging.StreamHandler()
+        >>> formatter = logging.Formatter('%(level)-8s: %(name)s> %(message)s')
+        >>> handler.setFormatter(formatter)
+        >>> qtsass.enable_logging(level=logging.DEBUG, handler=handler)
+
+    :param level: Optional logging level
+    :param handler: Optional handler to add
+    """
+    if level is None:
+        debug = os.environ.get('QTSASS_DEBUG', False)
+        if debug in ('1', 'true', 'True', 'TRUE', 'on', 'On', 'ON'):
+            level = logging.DEBUG
+        else:
+            level = logging.WARNING
+
+    logger = logging.getLogger('qtsass')
+    logger.setLevel(level)
+    if handler:
+        logger.addHandler(handler)
+    _log.debug('logging level set to {}.'.format(level))
@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+r"""Minify Qt stylesheets.
+
+Qt parses a stylesheet every time it is set on a widget, so its size directly
+affects the time it takes to create windows. :func:`minify` produces the
+smallest stylesheet Qt parses to the same rules.
+
+.. code-block:: python
+
+    >>> from qtsass.minify import minify
+    >>> minify('QWidget {\n  color: rgba(255, 0, 0, 100%);\n}\n')
+    'QWidget{color:red}'
+
+Rules sharing a selector are only merged when no rule between them sets a
+property of the same family, like border and border-color, so the cascade
+is left intact.
+"""
+
+# yapf: disable
+
+from __future__ import absolute_import
+
+# Standard library imports
+import re
+
+
+# yapf: enable
+
+# Constants
+GRADIENTS = ('qlineargradient', 'qradialgradient', 'qconicalgradient')
+
+# Color names shorter than the hex form of their color
+SHORT_COLOR_NAMES = {
+    '#f00': 'red',
+    '#d2b48c': 'tan',
+    '#000080': 'navy',
+    '#008080': 'teal',
+    '#ffd700': 'gold',
+    '#808080': 'gray',
+    '#ffc0cb': 'pink',
+    '#dda0dd': 'plum',
+    '#fffafa': 'snow',
+    '#cd853f': 'peru',
+    '#f5deb3': 'wheat',
+    '#808000': 'olive',
+    '#faf0e6': 'linen',
+    '#f0e68c': 'khaki',
+    '#f0ffff': 'azure',
+    '#f5f5dc': 'beige',
+    '#ff7f50': 'coral',
+    '#fffff0': 'ivory',
+    '#008000': 'green',
+    '#800000': 'maroon',
+    '#800080': 'purple',
+    '#ffa500': 'orange',
+    '#c0c0c0': 'silver',
+    '#a0522d': 'sienna',
+    '#4b0082': 'indigo',
+    '#ee82ee': 'violet',
+    '#ff6347': 'tomato',
+    '#fa8072': 'salmon',
+    '#da70d6': 'orchid',
+    '#ffe4c4': 'bisque',
+}
+
+_STRING = r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\''
+_COMMENT_PATTERN = re.compile(r'({})|/\*.*?\*/'.format(_STRING), re.DOTALL)
+_BLOCK_PATTERN = re.compile(r'{}|[{{}};]'.format(_STRING))
+_PROTECTED_PATTERN = re.compile(r'{}|url\([^)]*\)'.format(_STRING),
+                                re.IGNORECASE)
+_SPACE_PATTERN = re.compile(r'\s+')
+_SELECTOR_PATTERN = re.compile(r'\s*([,>+~])\s*')
+_VALUE_PATTERN = re.compile(r'\s*([,:])\s*|(\()\s+|\s+(\))|\s*(!)\s*')
+_RGB_PATTERN = re.compile(
+    r'\brgba\((\d+),(\d+),(\d+),100%\)|\brgb\((\d+),(\d+),(\d+)\)')
+_HEX_PATTERN = re.compile(r'#([0-9a-fA-F]{6})(?![0-9a-zA-Z])')
+_NUMBER_PATTERN = re.compile(r'(?<![\w#.])(\d+)\.(\d*?)0+(?!\d)')
+_GRADIENT_PATTERN = re.compile(r'\b(?:{})\('.format('|'.join(GRADIENTS)))
+_DELIMITERS = re.compile(r'[(),]')
+_SEPARATOR_PATTERNS = {
+    separator: re.compile(r'{}|[()]|{}'.format(_STRING, separator))
+    for separator in (',', ';')
+}
+
+
+def _strip_comments(css):
+    return _COMMENT_PATTERN.sub(lambda m: m.group(1) or ' ', css)
+
+
+def _split_blocks(css):
+    """Yield the (prelude, body) of top level blocks and statements.
+
+    The body of statements like @charset is None.
+    """
+    depth = 0
+    start = 0
+    prelude = None
+    for match in _BLOCK_PATTERN.finditer(css):
+        char = match.group()
+        if char == '{':
+            if not depth:
+                prelude = css[start:match.start()]
+                start = match.end()
+            depth += 1
+        elif char == '}':
+            if not depth:
+                continue
+            depth -= 1
+            if not depth:
+                yield prelude, css[start:match.start()]
+                start = match.end()
+        elif char == ';' and not depth:
+            yield css[start:match.start()], None
+            start = match.end()
+
+
+def _split_top_level(string, separator):
+    """Split string at separator outside of strings and parentheses."""
+    parts = []
+    depth = 0
+    start = 0
+    for match in _SEPARATOR_PATTERNS[separator].finditer(string):
+        char = match.group()
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == separator and not depth:
+            parts.append(string[start:match.start()])
+            start = match.end()
+    parts.append(string[start:])
+    return parts
+
+
+def _map_unprotected(string, fn):
+    """Apply fn to the parts of string outside of strings and urls."""
+    parts = []
+    pos = 0
+    for match in _PROTECTED_PATTERN.finditer(string):
+        parts.append(fn(string[pos:match.start()]))
+        parts.append(match.group())
+        pos = match.end()
+    parts.append(fn(string[pos:]))
+    return ''.join(parts)
+
+
+def _minify_selector_part(selector):
+    selector = _SPACE_PATTERN.sub(' ', selector)
+    return _SELECTOR_PATTERN.sub(r'\1', selector)
+
+
+def minify_selector(selector):
+    """Return a selector without insignificant whitespace."""
+    return _map_unprotected(selector, _minify_selector_part).strip()
+
+
+def _hex(match):
+    channels = [int(c) for c in match.groups() if c is not None]
+    if any(c > 255 for c in channels):
+        return match.group()
+    return '#{:02x}{:02x}{:02x}'.format(*channels)
+
+
+def _short_hex(match):
+    value = match.group(1).lower()
+    if value[0::2] == value[1::2]:
+        value = value[0::2]
+    color = '#' + value
+    return SHORT_COLOR_NAMES.get(color, color)
+
+
+def _number(match):
+    integer, decimals = match.groups()
+    if decimals:
+        return integer + '.' + decimals
+    return integer
+
+
+def collapse_stops(gradient):
+    """Remove the stops of a gradient that do not change its colors.
+
+    A stop between two stops of the same color is dropped, as is a stop
+    identical to the previous one. The gradient must be minified.
+
+    :param gradient: Gradient function, qlineargradient(...)
+    :returns: The gradient without redundant stops
+    """
+    name, args = gradient[:-1].split('(', 1)
+    args = _split_top_level(args, ',')
+    stops = [i for i, arg in enumerate(args) if arg.startswith('stop:')]
+    colors = [args[i].split(' ', 1)[-1] for i in stops]
+
+    redundant = set()
+    for n in range(1, len(stops)):
+        if args[stops[n]] == args[stops[n - 1]]:
+            redundant.add(stops[n])
+        elif (n < len(stops) - 1
+              and colors[n - 1] == colors[n] == colors[n + 1]):
+            redundant.add(stops[n])
+
+    if not redundant:
+        return gradient
+    return '{}({})'.format(
+        name,
+        ','.join(arg for i, arg in enumerate(args) if i not in redundant))
+
+
+def _collapse_gradients(value):
+    match = _GRADIENT_PATTERN.search(value)
+    if match is None:
+        return value
+
+    parts = []
+    pos = 0
+    while match:
+        depth = 1
+        end = -1
+        for delimiter in _DELIMITERS.finditer(value, match.end()):
+            char = delimiter.group()
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+                if not depth:
+                    end = delimiter.end()
+                    break
+        if end < 0:
+            break
+        parts.append(value[pos:match.start()])
+        parts.append(collapse_stops(value[match.start():end]))
+        pos = end
+        match = _GRADIENT_PATTERN.search(value, pos)
+    parts.append(value[pos:])
+    return ''.join(parts)
+
+
+def _minify_value_part(value):
+    value = _SPACE_PATTERN.sub(' ', value)
+    value = _VALUE_PATTERN.sub(lambda m: ''.join(g for g in m.groups() if g),
+                               value)
+    # Most values hold no color or decimal, skip the patterns they can't match
+    if 'rgb' in value:
+        value = _RGB_PATTERN.sub(_hex, value)
+    if '#' in value:
+        value = _HEX_PATTERN.sub(_short_hex, value)
+    if '.' in value:
+        value = _NUMBER_PATTERN.sub(_number, value)
+    if 'gradient' in value:
+        value = _collapse_gradients(value)
+    return value
+
+
+def minify_value(value):
+    """Return a property value in its shortest form.
+
+    Whitespace is removed where insignificant, opaque colors are written in
+    their shortest form, trailing zeros of numbers are dropped and redundant
+    gradient stops are removed. Strings and urls are left untouched.
+    """
+    return _map_unprotected(value, _minify_value_part).strip()
+
+
+def _family(prop):
+    """Return the family of a property, properties sharing it interact."""
+    return prop.lower().split('-', 1)[0]
+
+
+def parse_declarations(body):
+    """Return the minified (property, value) pairs of a block of rules.
+
+    Declarations overridden by a later declaration of the same property are
+    dropped, unless they are !important and the later declaration is not.
+    """
+    declarations = []
+    for declaration in _split_top_level(body, ';'):
+        prop, sep, value = declaration.partition(':')
+        prop = prop.strip()
+        if not sep or not prop:
+            continue
+        value = minify_value(value)
+        if value:
+            declarations.append((prop, value))
+    return _drop_overridden(declarations)
+
+
+def _drop_overridden(declarations):
+    winners = {}
+    for i, (prop, value) in enumerate(declarations):
+        key = prop.lower()
+        prev = winners.get(key)
+        important = value.endswith('!important')
+        if (prev is None or important
+                or not declarations[prev][1].endswith('!important')):
+            winners[key] = i
+    keep = set(winners.values())
+    return [d for i, d in enumerate(declarations) if i in keep]
+
+
+def _format_declarations(declarations):
+    return ';'.join(
+        '{}:{}'.format(prop, value) for prop, value in declarations)
+
+
+def minify(qss):
+    """Return the smallest stylesheet Qt parses to the same rules as qss.
+
+    Comments and empty rules are removed, rules sharing a selector are
+    merged where the cascade allows it, overridden declarations are dropped
+    and values are shortened, see :func:`minify_value`.
+
+    :param qss: QSS string
+    :returns: Minified QSS string
+    """
+    rules = []
+    by_selector = {}
+    last_family = {}
+    for prelude, body in _split_blocks(_strip_comments(qss)):
+        prelude = prelude.strip()
+        if body is None or prelude.startswith('@'):
+            # Rules are not merged across at-rules
+            by_selector = {}
+            prelude = _SPACE_PATTERN.sub(' ', prelude)
+            if body is None:
+                if prelude:
+                    rules.append((prelude, None))
+            elif '{' in body:
+                rules.append((prelude, minify(body)))
+            else:
+                rules.append((prelude, parse_declarations(body)))
+            continue
+
+        selector = minify_selector(prelude)
+        declarations = parse_declarations(body)
+        if not selector or not declarations:
+            continue
+
+        families = set(_family(prop) for prop, _ in declarations)
+        i = by_selector.get(selector)
+        if i is None or any(last_family.get(f, -1) > i for f in families):
+            i = by_selector[selector] = len(rules)
+            rules.append((selector, declarations))
+        else:
+            rules[i] = (selector, _drop_overridden(rules[i][1] + declarations))
+        for family in families:
+            last_family[family] = max(last_family.get(family, -1), i)
+
+    output = []
+    for prelude, body in rules:
+        if body is None:
+            output.append(prelude + ';')
+        elif isinstance(body, str):
+            if body:
+                output.append('{}{{{}}}'.format(prelude, body))
+        elif body:
+            output.append('{}{{{}}}'.format(prelude,
+                                            _format_declarations(body)))
+    return ''.join(output)
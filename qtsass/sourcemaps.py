@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Source maps from compiled Qt stylesheets back to their QtSASS sources.
+
+libsass maps the css it generates to the conformed scss it was given, which
+no longer lines up with the QtSASS sources once gradients are rewritten. The
+conformers record an OffsetMap of every rewrite, and the maps of both conform
+stages are composed with the map generated by libsass.
+
+.. code-block:: python
+
+    >>> import qtsass
+    >>> source_map = qtsass.SourceMap()
+    >>> css = qtsass.compile_filename('dummy.scss', source_map=source_map)
+    >>> source_map.lookup(0, 0)
+    ('/path/to/dummy.scss', 2, 0)
+"""
+
+# yapf: disable
+
+from __future__ import absolute_import
+
+# Standard library imports
+from bisect import bisect_right
+import json
+import os
+
+# Local imports
+from qtsass.importers import norm_path
+
+
+# yapf: enable
+
+# Constants
+SOURCE_MAP_VERSION = 3
+DEFAULT_SOURCE = 'stdin'
+_BASE64 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+_BASE64_DIGITS = {char: digit for digit, char in enumerate(_BASE64)}
+
+
+def decode_mappings(mappings):
+    """Decode the mappings of a version 3 source map.
+
+    Segments without a source position are dropped.
+
+    :param mappings: Base64 VLQ encoded mappings string.
+    :returns: List of the (column, source, line, column) tuples of each
+        generated line.
+    """
+    lines = []
+    source = line = column = 0
+    for encoded_line in mappings.split(';'):
+        segments = []
+        generated = 0
+        for encoded in encoded_line.split(','):
+            if not encoded:
+                continue
+            fields = []
+            value = shift = 0
+            for char in encoded:
+                digit = _BASE64_DIGITS[char]
+                value += (digit & 31) << shift
+                if digit & 32:
+                    shift += 5
+                    continue
+                fields.append(-(value >> 1) if value & 1 else value >> 1)
+                value = shift = 0
+
+            generated += fields[0]
+            if len(fields) < 4:
+                continue
+            source += fields[1]
+            line += fields[2]
+            column += fields[3]
+            segments.append((generated, source, line, column))
+        lines.append(segments)
+    return lines
+
+
+def _encode_vlq(value):
+    value = (-value << 1) | 1 if value < 0 else value << 1
+    chars = []
+    while True:
+        digit = value & 31
+        value >>= 5
+        if value:
+            chars.append(_BASE64[digit | 32])
+        else:
+            chars.append(_BASE64[digit])
+            return ''.join(chars)
+
+
+def encode_mappings(lines):
+    """Encode the segments returned by decode_mappings."""
+    encoded_lines = []
+    prev_source = prev_line = prev_column = 0
+    for segments in lines:
+        encoded = []
+        prev_generated = 0
+        for generated, source, line, column in segments:
+            encoded.append(''.join([
+                _encode_vlq(generated - prev_generated),
+                _encode_vlq(source - prev_source),
+                _encode_vlq(line - prev_line),
+                _encode_vlq(column - prev_column),
+            ]))
+            prev_generated = generated
+            prev_source, prev_line, prev_column = source, line, column
+        encoded_lines.append(','.join(encoded))
+    return ';'.join(encoded_lines)
+
+
+class LineIndex(object):
+    """Converts between offsets and (line, column) positions of a string.
+
+    Lines and columns are zero based, columns count characters.
+    """
+
+    def __init__(self, string):
+        """Find the offset of every line of string."""
+        self.starts = [0]
+        pos = string.find('\n')
+        while pos >= 0:
+            self.starts.append(pos + 1)
+            pos = string.find('\n', pos + 1)
+
+    def offset(self, line, column):
+        """Return the offset of a position."""
+        return self.starts[min(line, len(self.starts) - 1)] + column
+
+    def position(self, offset):
+        """Return the (line, column) position of an offset."""
+        line = bisect_right(self.starts, offset) - 1
+        return line, offset - self.starts[line]
+
+
+class OffsetMap(object):
+    """Maps the offsets of a conformed string to the string it came from.
+
+    Filled by the conformers while rewriting, see
+    :func:`qtsass.conformers.scss_conform`. Text copied unchanged maps one to
+    one, while offsets inside rewritten text map to the start of the text it
+    replaced.
+    """
+
+    def __init__(self):
+        """Initialize a map of an unchanged string."""
+        self._outputs = [0]
+        self._inputs = [0]
+        self._copied = [True]
+
+    def add(self, output, input, copied):
+        """Start a segment at an output offset and its input offset.
+
+        :param output: Offset in the conformed string.
+        :param input: Offset in the string it was conformed from.
+        :param copied: True if the segment was copied unchanged.
+        """
+        if self._outputs[-1] == output:
+            # Replace the previous segment, which is empty
+            self._outputs.pop()
+            self._inputs.pop()
+            self._copied.pop()
+        self._outputs.append(output)
+        self._inputs.append(input)
+        self._copied.append(copied)
+
+    def to_input(self, offset):
+        """Return the input offset of an offset in the conformed string."""
+        i = bisect_right(self._outputs, offset) - 1
+        if self._copied[i]:
+            return self._inputs[i] + offset - self._outputs[i]
+        return self._inputs[i]
+
+    def to_output(self, offset):
+        """Return the offset in the conformed string of an input offset."""
+        i = bisect_right(self._inputs, offset) - 1
+        if self._copied[i]:
+            return self._outputs[i] + offset - self._inputs[i]
+        return self._outputs[i]
+
+
+class SourceMap(object):
+    """A version 3 source map of a stylesheet compiled by qtsass.
+
+    Pass an instance as source_map to :func:`qtsass.compile` or
+    :func:`qtsass.compile_filename`, which fill it with the positions of the
+    compiled stylesheet in the QtSASS sources it was compiled from. Lines and
+    columns are zero based.
+
+    :param source: Name of the compiled source, the path of the input file
+        when compiling a file.
+    :param file: Optional name of the compiled stylesheet.
+    """
+
+    def __init__(self, source=None, file=None):
+        """Initialize an empty source map."""
+        self.source = source
+        self.file = file
+        self.sources = []
+        self.lines = []
+
+    def lookup(self, line, column):
+        """Return the (source, line, column) a position was compiled from.
+
+        Returns None when the position is not mapped.
+        """
+        if line >= len(self.lines):
+            return None
+        segments = self.lines[line]
+        i = bisect_right(segments, (column, float('inf'))) - 1
+        if i < 0:
+            return None
+        _, source, source_line, source_column = segments[i]
+        return self.sources[source], source_line, source_column
+
+    def as_dict(self):
+        """Return the source map as a json serializable dict."""
+        data = {
+            'version': SOURCE_MAP_VERSION,
+            'sources': list(self.sources),
+            'names': [],
+            'mappings': encode_mappings(self.lines),
+        }
+        if self.file is not None:
+            data['file'] = self.file
+        return data
+
+    def to_json(self):
+        """Return the source map as a json string."""
+        return json.dumps(self.as_dict(), indent=2)
+
+
+class SourceMapBuilder(object):
+    """Composes the map generated by libsass with the conformer maps.
+
+    Used by :func:`qtsass.compile`. The entry source and every imported
+    file are added with the OffsetMap of their conformed scss, and the map
+    generated by libsass is loaded once compiled.
+
+    :param source_map: The SourceMap to fill.
+    """
+
+    def __init__(self, source_map):
+        """Initialize the builder of source_map."""
+        self.source_map = source_map
+        self._inputs = {}
+        self._sass_sources = []
+        self._sass_lines = []
+
+    def add_source(self, path, string, conformed, offsets):
+        """Add a source and the OffsetMap of its conformed scss."""
+        self._inputs[path] = (LineIndex(string), LineIndex(conformed), offsets)
+
+    def load_sass_map(self, sass_map, directory, entry):
+        """Load the source map generated by libsass.
+
+        :param sass_map: Source map json generated by libsass.
+        :param directory: Directory of the source map sources are relative to.
+        :param entry: Path of the file the entry source was compiled from.
+        """
+        data = json.loads(sass_map)
+        entry = norm_path(os.path.abspath(entry))
+        self._sass_sources = []
+        for source in data['sources']:
+            path = norm_path(os.path.abspath(os.path.join(directory, source)))
+            if path == entry:
+                path = self.source_map.source or DEFAULT_SOURCE
+            self._sass_sources.append(path)
+        self._sass_lines = decode_mappings(data['mappings'])
+
+    def build(self, css, qss, offsets):
+        """Fill the source map with the positions of the qss in the sources.
+
+        :param css: CSS generated by libsass.
+        :param qss: The conformed qss.
+        :param offsets: OffsetMap of qss to css.
+        """
+        css_index = LineIndex(css)
+        qss_index = LineIndex(qss)
+        sources = []
+        source_indexes = {}
+        lines = []
+        for line, segments in enumerate(self._sass_lines):
+            for column, source, source_line, source_column in segments:
+                path = self._sass_sources[source]
+                index = source_indexes.get(path)
+                if index is None:
+                    index = source_indexes[path] = len(sources)
+                    sources.append(path)
+
+                if path in self._inputs:
+                    string_index, scss_index, scss_offsets = self._inputs[path]
+                    offset = scss_offsets.to_input(
+                        scss_index.offset(source_line, source_column))
+                    source_line, source_column = string_index.position(offset)
+
+                qss_line, qss_column = qss_index.position(
+                    offsets.to_output(css_index.offset(line, column)))
+                while len(lines) <= qss_line:
+                    lines.append([])
+                segment = (qss_column, index, source_line, source_column)
+                qss_segments = lines[qss_line]
+                if not qss_segments or qss_segments[-1][0] != qss_column:
+                    qss_segments.append(segment)
+
+        self.source_map.sources = sources
+        self.source_map.lines = lines
+        return self.source_map
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Per-stage timings and counters collected while compiling."""
+
+# yapf: disable
+
+from __future__ import absolute_import
+
+# Standard library imports
+from contextlib import contextmanager
+import functools
+import time
+
+
+# yapf: enable
+
+# Constants
+STAGES = ('scss_conform', 'sass', 'qt_conform')
+
+
+class _NullMeasure(object):
+    """Context manager doing nothing, used when stats are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_null_measure = _NullMeasure()
+
+
+def measure(stats, stage):
+    """Return a context manager timing stage if stats is not None."""
+    if stats is None:
+        return _null_measure
+    return stats.measure(stage)
+
+
+class CompileStats(object):
+    """Collect timings and counters from one or more compiles.
+
+    Pass an instance to :func:`qtsass.compile` or any function forwarding
+    its keyword arguments. The same instance may be reused to accumulate
+    the statistics of several compiles.
+
+    .. code-block:: python
+
+        >>> import qtsass
+        >>> stats = qtsass.CompileStats()
+        >>> css = qtsass.compile_filename('dark.scss', stats=stats)
+        >>> print(stats.format())
+
+    Times are wall clock seconds. The sass stage includes the time spent in
+    importers and custom functions, which are also reported on their own.
+    """
+
+    def __init__(self):
+        """Initialize all counters to zero."""
+        self.compiles = 0
+        self.cache_hits = 0
+        self.input_size = 0
+        self.output_size = 0
+        self.timings = dict.fromkeys(STAGES + ('total', ), 0.0)
+        self.import_calls = 0
+        self.import_bytes = 0
+        self.import_time = 0.0
+        self.functions = {}
+        self.color_hits = 0
+        self.color_misses = 0
+
+    @property
+    def function_calls(self):
+        """Get the total number of custom function invocations."""
+        return sum(calls for calls, _ in self.functions.values())
+
+    @property
+    def function_time(self):
+        """Get the cumulative time spent in custom functions."""
+        return sum(seconds for _, seconds in self.functions.values())
+
+    @contextmanager
+    def measure(self, stage):
+        """Add the time spent in the with block to stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = (
+                self.timings.get(stage, 0.0) + time.perf_counter() - start)
+
+    def record_import(self, seconds, size):
+        """Record an importer call that read size bytes."""
+        self.import_calls += 1
+        self.import_bytes += size
+        self.import_time += seconds
+
+    def record_function(self, name, seconds):
+        """Record a custom function invocation."""
+        calls, total = self.functions.get(name, (0, 0.0))
+        self.functions[name] = (calls + 1, total + seconds)
+
+    def record_colors(self, before, after):
+        """Record the color table lookups between two color_table_info."""
+        self.color_hits += after[0] - before[0]
+        self.color_misses += after[1] - before[1]
+
+    def wrap_function(self, name, fn):
+        """Return fn wrapped to record its invocations under name."""
+        record_function = self.record_function
+
+        @functools.wraps(fn)
+        def timed(*args):
+            start = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                record_function(name, time.perf_counter() - start)
+
+        return timed
+
+    def merge(self, other):
+        """Add the statistics of another CompileStats to this one."""
+        self.compiles += other.compiles
+        self.cache_hits += other.cache_hits
+        self.input_size += other.input_size
+        self.output_size += other.output_size
+        for stage, seconds in other.timings.items():
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        self.import_calls += other.import_calls
+        self.import_bytes += other.import_bytes
+        self.import_time += other.import_time
+        for name, (calls, seconds) in other.functions.items():
+            prev_calls, prev_seconds = self.functions.get(name, (0, 0.0))
+            self.functions[name] = (prev_calls + calls, prev_seconds + seconds)
+        self.color_hits += other.color_hits
+        self.color_misses += other.color_misses
+
+    def as_dict(self):
+        """Return the statistics as a json serializable dict."""
+        return {
+            'compiles': self.compiles,
+            'cache_hits': self.cache_hits,
+            'input_size': self.input_size,
+            'output_size': self.output_size,
+            'timings': dict(self.timings),
+            'import_calls': self.import_calls,
+            'import_bytes': self.import_bytes,
+            'import_time': self.import_time,
+            'functions': {k: list(v)
+                          for k, v in self.functions.items()},
+            'color_hits': self.color_hits,
+            'color_misses': self.color_misses,
+        }
+
+    def format(self):
+        """Return a human readable breakdown of the statistics."""
+        ms = 1000.0
+        lines = [
+            '{:<24} {:>12}'.format('Stage', 'Time (ms)'),
+            '{:<24} {:>12.3f}'.format('scss_conform',
+                                      self.timings['scss_conform'] * ms),
+            '{:<24} {:>12.3f}'.format('sass', self.timings['sass'] * ms),
+            '{:<24} {:>12.3f}  {} calls, {} bytes read'.format(
+                '  importers', self.import_time * ms, self.import_calls,
+                self.import_bytes),
+            '{:<24} {:>12.3f}  {} calls'.format('  custom functions',
+                                                self.function_time * ms,
+                                                self.function_calls),
+            '{:<24} {:>12.3f}'.format('qt_conform',
+                                      self.timings['qt_conform'] * ms),
+            '{:<24} {:>12.3f}'.format('total', self.timings['total'] * ms),
+            '',
+            'Compiles: {} ({} cache hits)'.format(self.compiles,
+                                                  self.cache_hits),
+            'Input size: {} bytes'.format(self.input_size),
+            'Output size: {} bytes'.format(self.output_size),
+            'Color table: {} hits, {} misses'.format(self.color_hits,
+                                                     self.color_misses),
+        ]
+        if self.functions:
+            lines.append('')
+            lines.append('{:<24} {:>12} {:>10}'.format('Function', 'Time (ms)',
+                                                       'Calls'))
+            for name, (calls, seconds) in sorted(self.functions.items()):
+                lines.append('{:<24} {:>12.3f} {:>10}'.format(
+                    name, seconds * ms, calls))
+        return '\n'.join(lines)
@@ -9,7 +9,14 @@
 """The qtsass Watcher is responsible for watching and recompiling sass.
 
 The default Watcher is the QtWatcher. If Qt is unavailable we fallback to the
-PollingWatcher.
+InotifyWatcher on linux and to the PollingWatcher everywhere else. The
+QtWatcher itself receives changes from inotify when it is available.
+
+Watchers other than the PollingWatcher are imported on first access, so that
+Qt bindings are only probed when the QtWatcher or the default Watcher is used.
+
+Applications watching many directories may use the ScheduledWatcher, which is
+polled with every other ScheduledWatcher from a single WatchScheduler thread.
 """
 
 # yapf: disable
@@ -20,12 +27,39 @@ from __future__ import absolute_import
 from qtsass.watchers.polling import PollingWatcher
 
 
-try:
-    from qtsass.watchers.qt import QtWatcher
-except ImportError:
-    QtWatcher = None
+# yapf: enable
 
 
-# yapf: enable
+def _import_watcher(name):
+    """Import a Watcher implementation returning None when unavailable."""
+    if name == 'AsyncWatcher':
+        from qtsass.watchers.aio import AsyncWatcher
+        return AsyncWatcher
+    if name == 'ScheduledWatcher':
+        from qtsass.watchers.scheduler import ScheduledWatcher
+        return ScheduledWatcher
+
+    try:
+        if name == 'InotifyWatcher':
+            from qtsass.watchers.inotify import InotifyWatcher
+            return InotifyWatcher
+        from qtsass.watchers.qt import QtWatcher
+        return QtWatcher
+    except ImportError:
+        return None
+
+
+def __getattr__(name):
+    """Import Watcher implementations on first access."""
+    if name in ('AsyncWatcher', 'InotifyWatcher', 'QtWatcher',
+                'ScheduledWatcher'):
+        value = _import_watcher(name)
+    elif name == 'Watcher':
+        value = (__getattr__('QtWatcher') or __getattr__('InotifyWatcher')
+                 or PollingWatcher)
+    else:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(
+            __name__, name))
 
-Watcher = QtWatcher or PollingWatcher
+    globals()[name] = value
+    return value
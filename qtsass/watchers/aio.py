@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Contains the asyncio implementation of the Watcher api."""
+
+# yapf: disable
+
+from __future__ import absolute_import
+
+# Standard library imports
+import asyncio
+import functools
+import logging
+
+# Local imports
+from qtsass.watchers import snapshots
+from qtsass.watchers.api import (
+    DEFAULT_DEBOUNCE,
+    compiler_kwargs,
+    drop_outputs,
+    merge_changes,
+    output_destination,
+    retry,
+)
+
+
+# yapf: enable
+
+# Constants
+RETRIES = 5
+RETRY_INTERVAL = 0.1
+
+# Logger setup
+_log = logging.getLogger(__name__)
+
+
+class AsyncWatcher(object):
+    """Polls a directory from the event loop and compiles on changes.
+
+    Iterate over the watcher to receive a tuple of the changes and the
+    compiled css for each batch of changes. Changes detected within the
+    debounce quiet window are coalesced into a single batch. Batches that
+    fail to compile are logged and their changes are carried into the next
+    batch.
+
+    .. code-block:: python
+
+        >>> watcher = AsyncWatcher('./scss', qtsass.compile_dirname,
+        ...                        args=('./scss', './css'))
+        >>> async for changes, css in watcher:
+        ...     print(changes)
+
+    Snapshots are taken in the loop's default executor, so scanning the
+    tree never blocks the event loop. Compilers that are coroutine
+    functions are awaited, other compilers are called in executor.
+
+    :param watch_dir: Directory to watch.
+    :param compiler: Compile function or coroutine function.
+    :param args: Positional arguments to pass to the compiler.
+    :param kwargs: Keyword arguments to pass to the compiler.
+    :param interval: Number of seconds to sleep between polls.
+    :param debounce: Quiet window used to coalesce changes.
+    :param executor: Optional concurrent.futures.Executor to compile in.
+    :param fingerprints: Optional FingerprintStore used to ignore changes of
+        files whose contents did not change.
+    """
+
+    def __init__(self,
+                 watch_dir,
+                 compiler,
+                 args=None,
+                 kwargs=None,
+                 interval=1,
+                 debounce=DEFAULT_DEBOUNCE,
+                 executor=None,
+                 fingerprints=None):
+        """Store initialization values and take the initial snapshot."""
+        self._watch_dir = watch_dir
+        self._compiler = compiler
+        self._args = args or ()
+        self._kwargs = kwargs or {}
+        self._interval = interval
+        self._debounce = debounce
+        self._executor = executor
+        self._log = _log
+        self._snapshot_depth = 2
+        self._snapshot = snapshots.take(self._watch_dir, self._snapshot_depth)
+        self._destination = output_destination(self._args)
+        self._fingerprints = fingerprints
+        if fingerprints is not None:
+            fingerprints.seed(watch_dir, self._snapshot_depth, self)
+        self._stopped = False
+        self._wakeup = None
+        self._carried = None
+
+    def __aiter__(self):
+        """Return self, the watcher is its own async iterator."""
+        return self
+
+    async def __anext__(self):
+        """Wait for the next batch of changes and compile it."""
+        while True:
+            changes = await self.wait()
+            if changes is None:
+                raise StopAsyncIteration
+
+            changes = merge_changes(self._carried, changes)
+            self._carried = None
+            try:
+                css = await self.compile(changes)
+            except Exception:
+                self._log.exception('Failed to compile...')
+                self._carried = changes
+                continue
+            return changes, css
+
+    def stop(self):
+        """Stop watching, ending iteration.
+
+        Must be called from the thread running the event loop.
+        """
+        self._stopped = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _sleep(self, seconds):
+        """Sleep for seconds or until the watcher is stopped."""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def poll(self):
+        """Take a new snapshot and return the changes since the last one.
+
+        Changes of the watcher's own outputs are ignored, like
+        :meth:`qtsass.watchers.api.Watcher.on_change` does. Blocks while
+        scanning the tree, :meth:`wait` calls it in executor.
+        """
+        next_snapshot = snapshots.take(
+            self._watch_dir,
+            self._snapshot_depth,
+            prev=self._snapshot,
+        )
+        changes = snapshots.diff(self._snapshot, next_snapshot)
+        self._snapshot = next_snapshot
+        changes = drop_outputs(self._destination, changes)
+        if changes and self._fingerprints is not None:
+            changes = self._fingerprints.filter(changes, self)
+        return changes
+
+    async def wait(self):
+        """Return the next batch of changes or None once stopped."""
+        changes = {}
+        while not self._stopped:
+            await self._sleep(self._debounce if changes else self._interval)
+            if self._stopped:
+                break
+
+            loop = asyncio.get_running_loop()
+            new_changes = await loop.run_in_executor(None, self.poll)
+            if new_changes:
+                changes.update(new_changes)
+            elif changes:
+                return changes
+        return None
+
+    @retry(RETRIES, RETRY_INTERVAL)
+    async def compile(self, changes=None):
+        """Call the compiler, retrying when it fails.
+
+        The compiler kwargs are prepared by
+        :func:`qtsass.watchers.api.compiler_kwargs`.
+
+        :param changes: Dict mapping changed paths to the kind of change.
+        """
+        kwargs = compiler_kwargs(self._kwargs, changes)
+        self._log.debug(
+            'Compiling sass...%s(*%s, **%s)',
+            self._compiler,
+            self._args,
+            kwargs,
+        )
+        if asyncio.iscoroutinefunction(self._compiler):
+            return await self._compiler(*self._args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            functools.partial(self._compiler, *self._args, **kwargs),
+        )
@@ -14,26 +14,63 @@ from __future__ import absolute_import
 
 # Standard library imports
 import functools
+import hashlib
+import inspect
 import logging
+import os
+import threading
 import time
 
+# Local imports
+from qtsass.importers import norm_path
+
 
 _log = logging.getLogger(__name__)
 
+# Constants
+DEFAULT_DEBOUNCE = 0.1
+
+
+class CompileCancelled(Exception):
+    """Raised when a compile is superseded by newer changes."""
+
 
 def retry(n, interval=0.1):
     """Retry a function or method n times before raising an exception.
 
+    Coroutine functions are retried without blocking the event loop.
+
     :param n: Number of times to retry
     :param interval: Time to sleep before attempts
     """
     def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def attempt_async(*args, **kwargs):
+                import asyncio
+
+                attempts = 0
+                while True:
+                    try:
+                        return await fn(*args, **kwargs)
+                    except CompileCancelled:
+                        raise
+                    except Exception:
+                        attempts += 1
+                        if n <= attempts:
+                            raise
+                        await asyncio.sleep(interval)
+
+            return attempt_async
+
         @functools.wraps(fn)
         def attempt(*args, **kwargs):
             attempts = 0
             while True:
                 try:
                     return fn(*args, **kwargs)
+                except CompileCancelled:
+                    raise
                 except Exception:
                     attempts += 1
                     if n <= attempts:
@@ -47,6 +84,87 @@ def retry(n, interval=0.1):
 # yapf: enable
 
 
+def merge_changes(carried, changes):
+    """Merge changes carried over from an undispatched compile into changes.
+
+    An empty batch of changes stands for a full compile, so merging with
+    an empty batch yields an empty batch.
+
+    :param carried: Dict of carried changes or None when nothing is carried.
+    :param changes: Dict mapping changed paths to the kind of change.
+    :returns: Dict mapping changed paths to the kind of change.
+    """
+    if carried is None:
+        return changes
+    if not carried or not changes:
+        return {}
+    merged = dict(carried)
+    merged.update(changes)
+    return merged
+
+
+def compiler_kwargs(kwargs, changes=None):
+    """Prepare the keyword arguments of a compile triggered by changes.
+
+    Import resolutions of an ImportCache passed to the compiler are
+    invalidated, since files may have been created or deleted. When kwargs
+    contain changed_paths, it is set to the paths of the changes so the
+    compiler may compile only what changed.
+
+    :param kwargs: Keyword arguments to pass to the compiler.
+    :param changes: Dict mapping changed paths to the kind of change.
+    :returns: Keyword arguments to pass to the compiler.
+    """
+    import_cache = kwargs.get('import_cache')
+    if import_cache is not None:
+        import_cache.invalidate_resolutions()
+
+    if 'changed_paths' in kwargs:
+        kwargs = dict(kwargs, changed_paths=set(changes or ()) or None)
+    return kwargs
+
+
+def output_destination(args):
+    """Return the normalized destination of (source, destination) args.
+
+    Returns None when args are not such a pair, as passed by qtsass.watch.
+    """
+    if len(args) == 2 and isinstance(args[1], str):
+        return norm_path(os.path.abspath(args[1]))
+    return None
+
+
+def is_output(destination, path):
+    """Return True if path is an output written to destination.
+
+    The destination file, the css files in the destination directory and
+    the temporary files written while replacing them are outputs.
+
+    :param destination: Path returned by :func:`output_destination`.
+    :param path: Changed path.
+    """
+    if destination is None:
+        return False
+
+    path = norm_path(os.path.abspath(path))
+    if path.endswith('.tmp'):
+        # Written by _open_atomic as <output>.<pid>.<thread>.tmp
+        path = path[:-len('.tmp')].rsplit('.', 2)[0]
+    if path == destination:
+        return True
+    return path.endswith('.css') and path.startswith(destination + '/')
+
+
+def drop_outputs(destination, changes):
+    """Return changes without the outputs written to destination."""
+    if not changes or destination is None:
+        return changes
+    return {
+        path: kind
+        for path, kind in changes.items() if not is_output(destination, path)
+    }
+
+
 class Watcher(object):
     """Watcher base class.
 
@@ -58,16 +176,58 @@ class Watcher(object):
     Watcher implementations must inherit from this base class. Subclasses
     should perform any setup required in the setup method, rather than
     overriding __init__.
+
+    Changes reported within the debounce quiet window are coalesced into a
+    single compile. Changes arriving while a compile is running cancel it:
+    its result is not dispatched and a new compile follows once the quiet
+    window has passed.
+
+    When skip_unchanged is True, outputs identical to the previously
+    dispatched ones are not dispatched again. Callbacks connected with
+    delta=True are only called when the rules of an output changed.
+
+    When args are a (source, destination) pair, as passed by qtsass.watch,
+    changes of the watcher's own outputs are ignored, see :meth:`is_output`.
+
+    Changes of a compile that is cancelled, superseded or fails are carried
+    into the next compile, so their outputs are not left undispatched.
+
+    When a :class:`qtsass.watchers.fingerprints.FingerprintStore` is passed
+    as fingerprints, changes of files whose contents did not change are
+    ignored. The store is seeded with the watched files on construction.
     """
 
-    def __init__(self, watch_dir, compiler, args=None, kwargs=None):
+    def __init__(self,
+                 watch_dir,
+                 compiler,
+                 args=None,
+                 kwargs=None,
+                 debounce=DEFAULT_DEBOUNCE,
+                 skip_unchanged=False,
+                 fingerprints=None):
         """Store initialization values and call Watcher.setup."""
         self._watch_dir = watch_dir
         self._compiler = compiler
         self._args = args or ()
         self._kwargs = kwargs or {}
         self._callbacks = set()
+        self._delta_callbacks = set()
+        self._skip_unchanged = skip_unchanged
+        self._outputs = {}
+        self._outputs_lock = threading.Lock()
         self._log = _log
+        self._debounce = debounce
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._timer = None
+        self._generation = 0
+        self._compile_generation = 0
+        self._compile_lock = threading.Lock()
+        self._carried = None
+        self._destination = output_destination(self._args)
+        self._fingerprints = fingerprints
+        if fingerprints is not None:
+            fingerprints.seed(watch_dir, consumer=self)
         self.setup()
 
     def setup(self):
@@ -91,56 +251,213 @@ class Watcher(object):
         return NotImplemented
 
     @retry(5)
-    def compile(self):
-        """Call the Watcher's compiler."""
+    def compile(self, changes=None):
+        """Call the Watcher's compiler.
+
+        The compiler kwargs are prepared by :func:`compiler_kwargs`.
+
+        :param changes: Dict mapping changed paths to the kind of change.
+        """
+        if self._generation != self._compile_generation:
+            raise CompileCancelled()
+
+        kwargs = compiler_kwargs(self._kwargs, changes)
+
         self._log.debug(
             'Compiling sass...%s(*%s, **%s)',
             self._compiler,
             self._args,
-            self._kwargs,
+            kwargs,
         )
-        return self._compiler(*self._args, **self._kwargs)
+        return self._compiler(*self._args, **kwargs)
 
-    def compile_and_dispatch(self):
-        """Compile and dispatch the resulting css to connected callbacks."""
+    def compile_and_dispatch(self, changes=None):
+        """Compile and dispatch the resulting css to connected callbacks.
+
+        :param changes: Dict mapping changed paths to the kind of change.
+        """
         self._log.debug('Compiling and dispatching....')
 
-        try:
-            css = self.compile()
-        except Exception:
-            self._log.exception('Failed to compile...')
-            return
+        with self._compile_lock:
+            changes = merge_changes(self._carried, changes)
+            self._carried = None
+            generation = self._compile_generation = self._generation
+            try:
+                css = self.compile(changes)
+            except CompileCancelled:
+                self._log.debug('Compile cancelled by newer changes...')
+                self._carried = changes or {}
+                return
+            except Exception:
+                self._log.exception('Failed to compile...')
+                self._carried = changes or {}
+                return
+
+            # Checked while holding the lock, so the carried changes are
+            # seen by the compile of the newer changes.
+            if generation != self._generation:
+                self._log.debug(
+                    'Discarding compile superseded by newer changes')
+                self._carried = changes or {}
+                return
 
         self.dispatch(css)
 
     def dispatch(self, css):
-        """Dispatch css to connected callbacks."""
-        self._log.debug('Dispatching callbacks...')
-        for callback in self._callbacks:
-            callback(css)
+        """Dispatch css to connected callbacks.
+
+        Callbacks connected with delta=True are passed a StyleDelta, or a
+        dict mapping css files to StyleDeltas when css is a dict.
+        """
+        deltas = None
+        if self._skip_unchanged or self._delta_callbacks:
+            changed, deltas = self._diff_outputs(css)
+            if self._skip_unchanged:
+                css = changed
+
+        if self._skip_unchanged and css is None:
+            self._log.debug('Output unchanged, skipping dispatch...')
+        else:
+            self._log.debug('Dispatching callbacks...')
+            for callback in self._callbacks:
+                callback(css)
+
+        if deltas:
+            self._log.debug('Dispatching style deltas...')
+            for callback in self._delta_callbacks:
+                callback(deltas)
+
+    def _diff_outputs(self, output):
+        """Compare output to the previously dispatched output.
+
+        Outputs are compared by their sha1 digest, and the rules of each
+        output are only kept while delta callbacks are connected.
+
+        :param output: CSS string or dict mapping css files to css.
+        :returns: Tuple of the changed output, None when nothing changed,
+            and of the StyleDelta of the output or a dict of StyleDeltas.
+        """
+        from qtsass.delta import StyleDelta, parse_rules
+
+        is_dict = isinstance(output, dict)
+        items = output.items() if is_dict else [(None, output)]
+        changed = {}
+        deltas = {}
+        with self._outputs_lock:
+            for key, css in items:
+                if not isinstance(css, str):
+                    changed[key] = css
+                    continue
+
+                digest = hashlib.sha1(css.encode('utf-8')).digest()
+                prev_digest, prev_rules = self._outputs.get(key, (None, None))
+                if digest == prev_digest:
+                    continue
+
+                changed[key] = css
+                rules = None
+                if self._delta_callbacks:
+                    rules = parse_rules(css)
+                    delta = StyleDelta.from_rules(css, prev_rules, rules)
+                    if delta:
+                        deltas[key] = delta
+                self._outputs[key] = (digest, rules)
 
-    def on_change(self):
+        if is_dict:
+            return changed or None, deltas
+        return changed.get(None), deltas.get(None)
+
+    def is_output(self, path):
+        """Return True if path is an output of the Watcher's compiler.
+
+        Writing outputs must not trigger a new compile, see
+        :func:`is_output`.
+        """
+        return is_output(self._destination, path)
+
+    def on_change(self, changes=None):
         """Call when a change is detected.
 
-        Subclasses must call this method when they detect a change. Subclasses
-        may also override this method in order to manually compile and dispatch
+        Subclasses must call this method when they detect a change. Changes
+        are collected until no new change arrives for the debounce interval
+        and are then passed to :meth:`process_changes` as a single batch.
+
+        :param changes: Dict mapping changed paths to the kind of change.
+        """
+        if changes and self._destination is not None:
+            changes = drop_outputs(self._destination, changes)
+            if not changes:
+                self._log.debug('Only outputs changed, ignoring changes...')
+                return
+
+        if changes and self._fingerprints is not None:
+            changes = self._fingerprints.filter(changes, self)
+            if not changes:
+                self._log.debug('Contents unchanged, ignoring changes...')
+                return
+
+        self._log.debug('Change detected...')
+        with self._pending_lock:
+            self._generation += 1
+            self._pending.update(changes or {})
+            if not self._debounce:
+                changes, self._pending = self._pending, {}
+            else:
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._timer = threading.Timer(self._debounce, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+                return
+
+        self.process_changes(changes)
+
+    def _flush(self):
+        with self._pending_lock:
+            changes, self._pending = self._pending, {}
+            self._timer = None
+        self.process_changes(changes)
+
+    def cancel_pending(self):
+        """Drop changes waiting for the debounce interval to pass.
+
+        Subclasses should call this method when they are stopped.
+        """
+        with self._pending_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending = {}
+
+    def process_changes(self, changes):
+        """Call with a batch of coalesced changes.
+
+        Compiles and dispatches the result to connected callbacks. Subclasses
+        may override this method in order to manually compile and dispatch
         callbacks. For example, a Qt implementation may use signals and slots
         to ensure that compiling and executing callbacks happens in the main
         GUI thread.
+
+        :param changes: Dict mapping changed paths to the kind of change.
         """
-        self._log.debug('Change detected...')
-        self.compile_and_dispatch()
+        self.compile_and_dispatch(changes)
 
-    def connect(self, fn):
+    def connect(self, fn, delta=False):
         """Connect a callback to this Watcher.
 
         All callbacks are called when a change is detected. Callbacks are
-        passed the compiled css.
+        passed the compiled css. When delta is True the callback is passed
+        a :class:`qtsass.delta.StyleDelta` of the rules that changed since
+        the previous dispatch instead, and is only called when rules changed.
         """
         self._log.debug('Connecting callback: %s', fn)
-        self._callbacks.add(fn)
+        if delta:
+            self._delta_callbacks.add(fn)
+        else:
+            self._callbacks.add(fn)
 
     def disconnect(self, fn):
         """Disconnect a callback from this Watcher."""
         self._log.debug('Disconnecting callback: %s', fn)
         self._callbacks.discard(fn)
+        self._delta_callbacks.discard(fn)
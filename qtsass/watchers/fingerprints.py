@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Content hashes used to ignore changes that leave a file's bytes intact.
+
+Touching a file, or a git checkout restoring a file with the same contents,
+changes its mtime and is reported as a change by every watcher. A
+FingerprintStore records a crc32 of the contents of each watched file along
+with its stat fingerprint, and filters out the changes of files whose
+contents hash the same as before. Files are only read again when their stat
+fingerprint changed.
+
+.. code-block:: python
+
+    >>> from qtsass.watchers.fingerprints import FingerprintStore
+    >>> store = FingerprintStore('.qtsass-fingerprints.json')
+    >>> watcher = qtsass.watch('./scss', './css', fingerprints=store)
+
+When a path is given the hashes are persisted there, so a restarted watcher
+does not need to read the files that did not change since it last ran.
+"""
+
+# yapf: disable
+
+from __future__ import absolute_import
+
+# Standard library imports
+from stat import S_ISDIR
+import json
+import logging
+import os
+import threading
+import weakref
+import zlib
+
+# Local imports
+from qtsass.importers import norm_path
+from qtsass.watchers import snapshots
+
+
+# yapf: enable
+
+# Constants
+STORE_FORMAT = 1
+READ_SIZE = 1 << 16
+
+# Logger setup
+_log = logging.getLogger(__name__)
+
+
+def content_hash(path):
+    """Return the crc32 of the contents of a file."""
+    crc = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(READ_SIZE)
+            if not chunk:
+                return crc
+            crc = zlib.crc32(chunk, crc)
+
+
+def _key(path):
+    return norm_path(os.path.abspath(path))
+
+
+class FingerprintStore(object):
+    """Maps files to their stat fingerprint and the hash of their contents.
+
+    The same store may be shared by several watchers. Files are hashed once
+    for all of them, but each watcher passes itself as consumer and is
+    reported a change until it saw the new contents itself.
+
+    :param path: Optional json file the hashes are loaded from and saved to.
+    """
+
+    def __init__(self, path=None):
+        """Initialize the store, loading the hashes saved at path."""
+        self.path = path
+        self.hashed = 0
+        self.ignored = 0
+        self._entries = {}
+        self._reported = {}
+        self._consumers = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    def __len__(self):
+        """Return the number of files with a known hash."""
+        return len(self._entries)
+
+    def __contains__(self, path):
+        """Check if the hash of a file is known."""
+        return _key(path) in self._entries
+
+    @property
+    def stats(self):
+        """Get a dict counting the files hashed and the changes ignored."""
+        return {
+            'hashed': self.hashed,
+            'ignored': self.ignored,
+            'size': len(self._entries),
+        }
+
+    def _reported_to(self, consumer):
+        """Return the dict of the hashes last reported to consumer."""
+        if consumer is None:
+            return self._reported
+        return self._consumers.setdefault(consumer, {})
+
+    def seed(self, dir_or_file, depth=2, consumer=None):
+        """Hash the files of a directory whose fingerprint is not known.
+
+        Watchers seed the store when they are created, so that the first
+        change of a file can be compared to its previous contents.
+
+        :param dir_or_file: Path to the watched file or directory.
+        :param depth: Number of directory levels to descend into.
+        :param consumer: Optional watcher the contents are seeded for.
+        """
+        snapshot = snapshots.take(dir_or_file, depth)
+        modified = False
+        with self._lock:
+            reported = self._reported_to(consumer)
+            for path, fp in snapshot.items():
+                if path in snapshot.listings:
+                    continue
+                key = _key(path)
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == fp:
+                    digest = entry[1]
+                else:
+                    digest = self._update(key, path, fp)
+                    modified |= digest is not None
+                if digest is not None:
+                    reported[key] = digest
+        if modified:
+            self.save()
+
+    def filter(self, changes, consumer=None):
+        """Return the changes without files whose contents did not change.
+
+        Contents are compared to the ones last reported to consumer. Only
+        changes of files whose previous hash is known are ignored. Created
+        and deleted files are always reported.
+
+        :param changes: Dict mapping changed paths to the kind of change.
+        :param consumer: Optional watcher the changes are filtered for.
+        """
+        filtered = {}
+        modified = False
+        with self._lock:
+            reported = self._reported_to(consumer)
+            for path, change in changes.items():
+                key = _key(path)
+                previous = reported.pop(key, None)
+                if change == 'Deleted':
+                    modified |= self._entries.pop(key, None) is not None
+                    filtered[path] = change
+                    continue
+
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    modified |= self._entries.pop(key, None) is not None
+                    filtered[path] = change
+                    continue
+                if S_ISDIR(stat.st_mode):
+                    filtered[path] = change
+                    continue
+
+                fp = snapshots.fingerprint(stat)
+                entry = self._entries.get(key)
+                if entry is None or entry[0] != fp:
+                    modified = True
+                    digest = self._update(key, path, fp)
+                else:
+                    digest = entry[1]
+                if digest is not None:
+                    reported[key] = digest
+                if (change != 'Changed' or previous is None
+                        or digest != previous):
+                    filtered[path] = change
+                    continue
+
+                self.ignored += 1
+                _log.debug('Contents of %s unchanged, ignoring...', path)
+
+        if modified:
+            self.save()
+        return filtered
+
+    def _update(self, key, path, fp):
+        """Hash path and store its hash, returning None if it is unreadable."""
+        try:
+            digest = content_hash(path)
+        except OSError:
+            self._entries.pop(key, None)
+            return None
+        self.hashed += 1
+        self._entries[key] = (fp, digest)
+        return digest
+
+    def clear(self):
+        """Forget all hashes."""
+        with self._lock:
+            self._entries.clear()
+            self._reported.clear()
+            self._consumers.clear()
+        self.save()
+
+    def load(self):
+        """Load the hashes saved at path, ignoring unreadable files."""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('format') != STORE_FORMAT:
+                return
+            entries = {
+                key: (tuple(value[:3]), value[3])
+                for key, value in data['entries'].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError, IndexError):
+            _log.debug('Failed to read fingerprints %s', self.path)
+            return
+
+        with self._lock:
+            self._entries.update(entries)
+
+    def save(self):
+        """Save the hashes to path, if the store has a path."""
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                'format': STORE_FORMAT,
+                'entries': {
+                    key: list(fp) + [digest]
+                    for key, (fp, digest) in self._entries.items()
+                },
+            }
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        tmp_path = '{}.{}.{}.tmp'.format(self.path, os.getpid(),
+                                         threading.get_ident())
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            _log.debug('Failed to save fingerprints %s', self.path)
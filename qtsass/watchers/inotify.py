@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Contains the inotify implementation of the Watcher api.
+
+Importing this module raises an ImportError when inotify is unavailable.
+"""
+
+# yapf: disable
+
+from __future__ import absolute_import
+
+# Standard library imports
+import atexit
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+# Local imports
+from qtsass.importers import norm_path
+from qtsass.watchers import snapshots
+from qtsass.watchers.polling import PollingWatcher
+
+
+# yapf: enable
+
+if not sys.platform.startswith('linux'):
+    raise ImportError('inotify is only available on linux')
+
+_libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+if not hasattr(_libc, 'inotify_init1'):
+    raise ImportError('libc does not provide inotify')
+
+_libc.inotify_init1.argtypes = [ctypes.c_int]
+_libc.inotify_add_watch.argtypes = [
+    ctypes.c_int,
+    ctypes.c_char_p,
+    ctypes.c_uint32,
+]
+_libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+# Constants from sys/inotify.h
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM
+              | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+              | IN_MOVE_SELF | IN_ONLYDIR)
+PARENT_MASK = IN_CREATE | IN_MOVED_TO | IN_ONLYDIR
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def _check(result):
+    if result < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+    return result
+
+
+class InotifyWatcher(PollingWatcher):
+    """Receives change events from the linux kernel using inotify.
+
+    Watches the same directories as the PollingWatcher, down to a depth of 2
+    levels, but sleeps until the kernel reports a change. Events arriving
+    within a short latency window are coalesced into a single call to
+    on_change. The parent directory is watched as well so that a deleted
+    watch_dir is picked up again once it is recreated.
+
+    Like the PollingWatcher's snapshots, only files with one of the
+    snapshots.EXTENSIONS are reported, so temporary files are ignored.
+
+    Falls back to polling when inotify fails to start, for example when the
+    user's inotify watch limit is exhausted.
+    """
+
+    latency = 0.05
+    max_latency = 1.0
+
+    def setup(self):
+        """Set up the InotifyWatcher.
+
+        No file descriptors are created until the watcher is started.
+        """
+        self._snapshot_depth = 2
+        self._root = norm_path(os.path.abspath(self._watch_dir))
+        self._base_depth = len(self._root.split('/'))
+        self._polling = False
+        self._fd = None
+        self._wake_r = self._wake_w = None
+        self._wds = {}
+        self._paths = {}
+        self._parent_wd = None
+        self._thread = None
+        self._shutdown = threading.Event()
+
+    def start(self):
+        """Start watching for kernel events."""
+        try:
+            self._fd = _check(_libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC))
+            self._add_parent_watch()
+            self._add_watches(self._root)
+        except OSError as e:
+            self._log.warning('inotify failed (%s), falling back to polling',
+                              e)
+            self._close()
+            self._polling = True
+            PollingWatcher.setup(self)
+            return PollingWatcher.start(self)
+
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self.run)
+        self._thread.daemon = True
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop watching for kernel events."""
+        if self._polling:
+            return PollingWatcher.stop(self)
+
+        if self._thread is None or self._shutdown.is_set():
+            return
+
+        self.cancel_pending()
+        self._shutdown.set()
+        os.write(self._wake_w, b'x')
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            self._wake_r = self._wake_w = None
+
+    def join(self):
+        """Wait for the watcher thread to finish.
+
+        You should always call stop before join.
+        """
+        if self._polling:
+            return PollingWatcher.join(self)
+
+        if self._thread is not None:
+            self._thread.join()
+
+    def run(self):
+        """Read kernel events and call on_change for each batch of changes.
+
+        When polling, take a new snapshot instead, like the PollingWatcher.
+        """
+        if self._polling:
+            return PollingWatcher.run(self)
+
+        try:
+            while not self._shutdown.is_set():
+                changes = {}
+                if not self._wait(None):
+                    break
+                self._read(changes)
+
+                # Coalesce events arriving within the latency window
+                deadline = time.time() + self.max_latency
+                while time.time() < deadline and self._wait(self.latency):
+                    if self._shutdown.is_set():
+                        break
+                    self._read(changes)
+
+                if self._shutdown.is_set():
+                    break
+
+                if changes and os.path.isdir(self._root):
+                    self.on_change(changes)
+        finally:
+            self._close()
+
+    def _wait(self, timeout):
+        """Return True when events are ready, False on timeout or shutdown."""
+        ready, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+        return self._fd in ready and not self._shutdown.is_set()
+
+    def _read(self, changes):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return
+            raise
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            self._handle(wd, mask, os.fsdecode(name), changes)
+
+    def _handle(self, wd, mask, name, changes):
+        if mask & IN_Q_OVERFLOW:
+            self._log.debug('inotify queue overflow, rescanning...')
+            self._add_watches(self._root)
+            changes[self._root] = 'Changed'
+            return
+
+        if wd == self._parent_wd:
+            path = norm_path(os.path.dirname(self._root), name)
+            if path == self._root:
+                self._add_watches(self._root)
+                changes[path] = 'Created'
+            return
+
+        dirname = self._paths.get(wd)
+        if dirname is None:
+            return
+
+        if mask & IN_IGNORED:
+            self._forget(wd)
+            return
+
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            changes[dirname] = 'Deleted'
+            return
+
+        if not mask & IN_ISDIR and not name.endswith(snapshots.EXTENSIONS):
+            return
+
+        path = norm_path(dirname, name)
+        if mask & (IN_CREATE | IN_MOVED_TO):
+            changes[path] = 'Created'
+            if mask & IN_ISDIR:
+                self._add_watches(path)
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            changes[path] = 'Deleted'
+        else:
+            changes.setdefault(path, 'Changed')
+
+    def _add_parent_watch(self):
+        parent = os.path.dirname(self._root)
+        self._parent_wd = _check(
+            _libc.inotify_add_watch(self._fd, os.fsencode(parent),
+                                    PARENT_MASK))
+
+    def _add_watches(self, path):
+        """Watch path and its subdirectories down to the snapshot depth."""
+        for root, subdirs, _ in os.walk(path):
+            root = norm_path(root)
+            if len(root.split('/')) - self._base_depth >= self._snapshot_depth:
+                subdirs[:] = []
+
+            try:
+                wd = _check(
+                    _libc.inotify_add_watch(self._fd, os.fsencode(root),
+                                            WATCH_MASK))
+            except OSError as e:
+                if e.errno in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise
+            self._wds[root] = wd
+            self._paths[wd] = root
+
+    def _forget(self, wd):
+        path = self._paths.pop(wd, None)
+        if path is not None and self._wds.get(path) == wd:
+            del self._wds[path]
+
+    def _close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self._wds.clear()
+        self._paths.clear()
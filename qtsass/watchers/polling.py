@@ -15,6 +15,7 @@ from __future__ import absolute_import, print_function
 # Standard library imports
 import atexit
 import threading
+import time
 
 # Local imports
 from qtsass.watchers import snapshots
@@ -24,19 +25,103 @@ from qtsass.watchers.api import Watcher
 # yapf: enable
 
 
+class FixedInterval(object):
+    """Polling policy sleeping the same interval between all polls.
+
+    :param interval: Number of seconds to sleep between polls.
+    """
+
+    def __init__(self, interval=1):
+        """Initialize the policy."""
+        self.interval = interval
+
+    def next_interval(self, changed, cost):
+        """Return the number of seconds to sleep before the next poll.
+
+        :param changed: True if the previous poll detected a change.
+        :param cost: Number of seconds the previous poll took.
+        """
+        return self.interval
+
+    @property
+    def state(self):
+        """Get a dict describing the current state of the policy."""
+        return {'interval': self.interval}
+
+
+class AdaptiveInterval(object):
+    """Polling policy backing off while idle and polling fast after changes.
+
+    The interval is multiplied by factor after every poll without changes,
+    up to maximum, and snaps back to minimum as soon as a change is detected.
+    The interval is never shorter than cost_ratio times the duration of the
+    previous poll, so polling a large tree uses a bounded share of the cpu.
+
+    A larger maximum polls less while idle, at the cost of noticing the first
+    change after an idle period up to maximum seconds late. The default keeps
+    that latency at the 1 second interval of FixedInterval.
+
+    :param minimum: Number of seconds to sleep after a change.
+    :param maximum: Maximum number of seconds to sleep while idle.
+    :param factor: Backoff factor applied after each poll without changes.
+    :param cost_ratio: Minimum ratio of the interval to the poll duration.
+    """
+
+    def __init__(self, minimum=0.5, maximum=1, factor=1.5, cost_ratio=10):
+        """Initialize the policy at the minimum interval."""
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.cost_ratio = cost_ratio
+        self.interval = minimum
+        self.idle_polls = 0
+        self.cost = 0.0
+
+    def next_interval(self, changed, cost):
+        """Return the number of seconds to sleep before the next poll.
+
+        :param changed: True if the previous poll detected a change.
+        :param cost: Number of seconds the previous poll took.
+        """
+        self.cost = cost
+        if changed:
+            self.idle_polls = 0
+            self.interval = self.minimum
+        else:
+            self.idle_polls += 1
+            self.interval = min(self.interval * self.factor, self.maximum)
+        return max(self.interval, cost * self.cost_ratio)
+
+    @property
+    def state(self):
+        """Get a dict describing the current state of the policy."""
+        return {
+            'interval': max(self.interval, self.cost * self.cost_ratio),
+            'idle_polls': self.idle_polls,
+            'cost': self.cost,
+        }
+
+
 class PollingThread(threading.Thread):
-    """A thread that fires a callback at an interval."""
+    """A thread that fires a callback at an interval.
+
+    The callback returns True when it detected a change. The time to sleep
+    between calls is chosen by a polling policy, such as FixedInterval or
+    AdaptiveInterval, from the result and the duration of the last call.
+    """
 
-    def __init__(self, callback, interval):
+    def __init__(self, callback, interval=1, policy=None):
         """Initialize the thread.
 
         :param callback: Callback function to repeat.
         :param interval: Number of seconds to sleep between calls.
+        :param policy: Optional polling policy overriding interval.
         """
         super(PollingThread, self).__init__()
         self.daemon = True
         self.callback = callback
-        self.interval = interval
+        self.policy = policy or FixedInterval(interval)
+        self.interval = self.policy.state['interval']
         self._shutdown = threading.Event()
         self._stopped = threading.Event()
         self._started = threading.Event()
@@ -58,12 +143,16 @@ class PollingThread(threading.Thread):
         return self._shutdown.is_set()
 
     def stop(self):
-        """Set the shutdown event for this thread and wait for it to stop."""
+        """Set the shutdown event for this thread and wait for it to stop.
+
+        Does not wait when called from the thread itself.
+        """
         if not self.started and not self.shutdown:
             return
 
         self._shutdown.set()
-        self._stopped.wait()
+        if threading.current_thread() is not self:
+            self._stopped.wait()
 
     def run(self):
         """Threads main loop."""
@@ -71,7 +160,10 @@ class PollingThread(threading.Thread):
             self._started.set()
 
             while True:
-                self.callback()
+                start = time.perf_counter()
+                changed = self.callback()
+                cost = time.perf_counter() - start
+                self.interval = self.policy.next_interval(bool(changed), cost)
                 if self._shutdown.wait(self.interval):
                     break
 
@@ -88,39 +180,72 @@ class PollingWatcher(Watcher):
     a dedicated scss directory. That could lead to snapshots taking too long
     to build and diff. It's probably safe to assume that users aren't nesting
     scss deeper than a couple of levels.
+
+    Only directories and files with one of the snapshots.EXTENSIONS are
+    stat'd, and directories unchanged since the previous poll are not listed
+    again.
+
+    When scheduler is set to a WatchScheduler the watcher is polled by the
+    scheduler's thread instead of its own PollingThread.
+
+    The interval between polls adapts to activity, see AdaptiveInterval.
+    Subclasses may override create_policy to use another polling policy.
     """
 
+    scheduler = None
+
     def setup(self):
         """Set up the PollingWatcher.
 
         A PollingThread is created but not started.
         """
         self._snapshot_depth = 2
-        self._snapshot = snapshots.take(self._watch_dir, self._snapshot_depth)
-        self._thread = PollingThread(self.run, interval=1)
+        self._scheduler = self.scheduler
+        if self._scheduler is None:
+            self._snapshot = snapshots.take(self._watch_dir,
+                                            self._snapshot_depth)
+            self.policy = self.create_policy()
+            self._thread = PollingThread(self.run, policy=self.policy)
+
+    def create_policy(self):
+        """Return the polling policy of this watcher's PollingThread."""
+        return AdaptiveInterval()
 
     def start(self):
-        """Start the PollingThread."""
+        """Start the PollingThread or add the watcher to its scheduler."""
+        if self._scheduler is not None:
+            return self._scheduler.add(self)
         self._thread.start()
 
     def stop(self):
-        """Stop the PollingThread."""
-        self._thread.stop()
+        """Stop the PollingThread and drop pending changes."""
+        if self._scheduler is not None:
+            self._scheduler.remove(self)
+        else:
+            self._thread.stop()
+        self.cancel_pending()
 
     def join(self):
         """Wait for the PollingThread to finish.
 
         You should always call stop before join.
         """
-        self._thread.join()
+        if self._scheduler is None:
+            self._thread.join()
 
     def run(self):
         """Take a new snapshot and call on_change when a change is detected.
 
-        Called repeatedly by the PollingThread.
+        Called repeatedly by the PollingThread. Returns True when a change
+        was detected.
         """
-        next_snapshot = snapshots.take(self._watch_dir, self._snapshot_depth)
+        next_snapshot = snapshots.take(
+            self._watch_dir,
+            self._snapshot_depth,
+            prev=self._snapshot,
+        )
         changes = snapshots.diff(self._snapshot, next_snapshot)
+        self._snapshot = next_snapshot
         if changes:
-            self._snapshot = next_snapshot
-            self.on_change()
+            self.on_change(changes)
+        return bool(changes)
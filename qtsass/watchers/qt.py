@@ -16,6 +16,12 @@ from __future__ import absolute_import
 from qtsass.watchers.polling import PollingWatcher
 
 
+try:
+    from qtsass.watchers.inotify import InotifyWatcher as BaseWatcher
+except ImportError:
+    BaseWatcher = PollingWatcher
+
+
 # We cascade through Qt bindings here rather than relying on a comprehensive
 # Qt compatability library like qtpy or Qt.py. This prevents us from forcing a
 # specific compatability library on users.
@@ -55,16 +61,17 @@ if not QT_BINDING:
 class QtDispatcher(QObject):
     """Used by QtWatcher to dispatch callbacks in the main ui thread."""
 
-    signal = Signal()
+    signal = Signal(object)
 
 
-class QtWatcher(PollingWatcher):
+class QtWatcher(BaseWatcher):
     """The Qt implementation of the Watcher api.
 
-    Subclasses PollingWatcher but dispatches :meth:`compile_and_dispatch`
-    using a Qt Signal to ensure that these calls are executed in the main ui
-    thread. We aren't using a QFileSystemWatcher because it fails to report
-    changes in certain circumstances.
+    Subclasses InotifyWatcher, or PollingWatcher when inotify is unavailable,
+    but dispatches :meth:`compile_and_dispatch` using a Qt Signal to ensure
+    that these calls are executed in the main ui thread. We aren't using a
+    QFileSystemWatcher because it fails to report changes in certain
+    circumstances.
     """
 
     _qt_binding = QT_BINDING
@@ -82,15 +89,13 @@ class QtWatcher(PollingWatcher):
             self._qtdispatcher.signal.connect(self.compile_and_dispatch)
         return self._qtdispatcher
 
-    def on_change(self):
-        """Call when a change is detected."""
-        self._log.debug('Change detected...')
-
+    def process_changes(self, changes):
+        """Call with a batch of coalesced changes."""
         # If a QApplication event loop has not been started
         # call compile_and_dispatch in the current thread.
         if not QApplication.instance():
-            return super(PollingWatcher, self).compile_and_dispatch()
+            return self.compile_and_dispatch(changes)
 
         # Create and use a QtDispatcher to ensure compile and any
         # connected callbacks get executed in the main gui thread.
-        self.qtdispatcher.signal.emit()
+        self.qtdispatcher.signal.emit(changes)
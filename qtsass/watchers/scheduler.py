@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Poll the directories of many watchers from a single thread.
+
+Every PollingWatcher polls its directory from its own thread. An application
+watching many directories can use the ScheduledWatcher instead, which is
+polled by a WatchScheduler shared by all ScheduledWatchers.
+
+.. code-block:: python
+
+    >>> from qtsass.watchers.scheduler import ScheduledWatcher
+    >>> watchers = [
+    ...     qtsass.watch(root, root, Watcher=ScheduledWatcher)
+    ...     for root in theme_roots
+    ... ]
+    >>> for watcher in watchers:
+    ...     watcher.start()
+"""
+
+# yapf: disable
+
+from __future__ import absolute_import
+
+# Standard library imports
+import os
+import threading
+
+# Local imports
+from qtsass.importers import norm_path
+from qtsass.watchers import snapshots
+from qtsass.watchers.polling import (
+    FixedInterval,
+    PollingThread,
+    PollingWatcher,
+)
+
+
+# yapf: enable
+
+# Constants
+DEFAULT_INTERVAL = 1
+
+
+def _level(path, root):
+    """Return the number of path components of path below root or -1."""
+    if path == root:
+        return 0
+    prefix = root if root.endswith('/') else root + '/'
+    if not path.startswith(prefix):
+        return -1
+    return len(path[len(prefix):].split('/'))
+
+
+def plan_roots(roots):
+    """Return the roots to snapshot to cover every (root, depth) of roots.
+
+    A root inside another root is covered by it when the other root's
+    snapshot descends deep enough to include it.
+
+    :param roots: Iterable of (absolute root, depth) tuples.
+    :returns: Dict mapping each (root, depth) to the (root, depth) covering it
+    """
+    ordered = sorted(set(roots), key=lambda r: (len(r[0].split('/')), -r[1]))
+    polled = []
+    plan = {}
+    for root, depth in ordered:
+        for polled_root, polled_depth in polled:
+            level = _level(root, polled_root)
+            if level >= 0 and level + depth <= polled_depth:
+                plan[(root, depth)] = (polled_root, polled_depth)
+                break
+        else:
+            polled.append((root, depth))
+            plan[(root, depth)] = (root, depth)
+    return plan
+
+
+class WatchScheduler(object):
+    """Polls the directories of many PollingWatchers from one thread.
+
+    Watchers watching the same directory, or a directory covered by the
+    snapshot of another watched directory, share a single snapshot. Each
+    poll takes one snapshot per polled directory and passes each watcher the
+    changes below its own directory, so the thread count and the number of
+    wakeups do not grow with the number of watchers.
+
+    :param interval: Number of seconds to sleep between polls.
+    :param policy: Optional polling policy overriding interval, see
+        :class:`qtsass.watchers.polling.AdaptiveInterval`.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, policy=None):
+        """Initialize a scheduler without watchers."""
+        self.policy = policy or FixedInterval(interval)
+        self._lock = threading.RLock()
+        self._watchers = {}
+        self._plan = {}
+        self._snapshots = {}
+        self._thread = None
+
+    @property
+    def watchers(self):
+        """Get the list of scheduled watchers."""
+        with self._lock:
+            return list(self._watchers)
+
+    @property
+    def roots(self):
+        """Get the sorted (root, depth) tuples that are polled."""
+        with self._lock:
+            return sorted(self._snapshots)
+
+    def add(self, watcher):
+        """Start polling the directory of a watcher.
+
+        The polling thread is started with the first watcher.
+        """
+        root = norm_path(os.path.abspath(watcher._watch_dir))
+        with self._lock:
+            self._watchers[watcher] = (root, watcher._snapshot_depth)
+            self._update_plan()
+            if self._thread is None:
+                self._thread = PollingThread(self.poll, policy=self.policy)
+                self._thread.start()
+
+    def remove(self, watcher):
+        """Stop polling the directory of a watcher.
+
+        The polling thread is stopped with the last watcher.
+        """
+        with self._lock:
+            if self._watchers.pop(watcher, None) is None:
+                return
+            self._update_plan()
+            thread = None
+            if not self._watchers:
+                thread, self._thread = self._thread, None
+
+        if thread is not None:
+            thread.stop()
+
+    def _update_plan(self):
+        """Plan the polled roots, snapshotting newly polled roots."""
+        self._plan = plan_roots(self._watchers.values())
+        polled = set(self._plan.values())
+        for key in list(self._snapshots):
+            if key not in polled:
+                del self._snapshots[key]
+        for key in polled:
+            if key not in self._snapshots:
+                self._snapshots[key] = snapshots.take(*key)
+
+    def poll(self):
+        """Snapshot every polled root and pass changes to their watchers.
+
+        Called repeatedly by the scheduler's PollingThread. Returns True when
+        a change was detected.
+        """
+        with self._lock:
+            changes = {}
+            for key, prev in list(self._snapshots.items()):
+                next_snapshot = snapshots.take(key[0], key[1], prev=prev)
+                root_changes = snapshots.diff(prev, next_snapshot)
+                self._snapshots[key] = next_snapshot
+                if root_changes:
+                    dirs = set(prev.listings) | set(next_snapshot.listings)
+                    changes[key] = (root_changes, dirs)
+
+            dispatches = []
+            for watcher, (root, depth) in self._watchers.items():
+                key = self._plan[(root, depth)]
+                if key not in changes:
+                    continue
+                watcher_changes = self._filter(watcher, root, depth,
+                                               *changes[key])
+                if watcher_changes:
+                    dispatches.append((watcher, watcher_changes))
+
+        for watcher, watcher_changes in dispatches:
+            watcher.on_change(watcher_changes)
+        return bool(changes)
+
+    @staticmethod
+    def _filter(watcher, root, depth, changes, dirs):
+        """Return the changes a watcher's own snapshot would report.
+
+        Paths are relative to the watch_dir of the watcher, as given.
+        """
+        prefix = norm_path(watcher._watch_dir)
+        filtered = {}
+        for path, change in changes.items():
+            level = _level(path, root)
+            if level < 0:
+                continue
+            # Files are one level below their directory
+            max_level = depth if path in dirs else depth + 1
+            if level > max_level:
+                continue
+            filtered[prefix + path[len(root):]] = change
+        return filtered
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def default_scheduler():
+    """Return the WatchScheduler shared by all ScheduledWatchers."""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = WatchScheduler()
+        return _default_scheduler
+
+
+class ScheduledWatcher(PollingWatcher):
+    """A PollingWatcher polled by the shared default WatchScheduler.
+
+    Subclasses may set scheduler to another WatchScheduler.
+    """
+
+    @property
+    def scheduler(self):
+        """Get the default WatchScheduler."""
+        return default_scheduler()
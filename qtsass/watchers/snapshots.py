@@ -6,14 +6,27 @@
 # Licensed under the terms of the MIT License
 # (See LICENSE.txt for details)
 # -----------------------------------------------------------------------------
-"""Contains the fallback implementation of the Watcher api."""
+"""Filesystem snapshots used by the polling implementation of the Watcher api.
+
+A snapshot maps paths to a fingerprint (mtime_ns, size, inode) taken from a
+single stat call. Only directories and files with one of the snapshot
+extensions are included, so unrelated files cost a directory entry but no
+stat call.
+
+Passing the previous snapshot to :func:`take` reuses the listing of every
+directory whose own fingerprint did not change, which saves listing
+unchanged directories again. The files in those directories are still
+stat'd since modifying a file does not change its directory's mtime.
+"""
 
 # yapf: disable
 
 from __future__ import absolute_import, print_function
 
 # Standard library imports
+from stat import S_ISDIR
 import os
+import time
 
 # Local imports
 from qtsass.importers import norm_path
@@ -21,44 +34,137 @@ from qtsass.importers import norm_path
 
 # yapf: enable
 
-
-def take(dir_or_file, depth=3):
-    """Return a dict mapping files and folders to their mtimes."""
-    if os.path.isfile(dir_or_file):
-        path = norm_path(dir_or_file)
-        return {path: os.path.getmtime(path)}
-
-    if not os.path.isdir(dir_or_file):
-        return {}
-
-    snapshot = {}
-    base_depth = len(norm_path(dir_or_file).split('/'))
-
-    for root, subdirs, files in os.walk(dir_or_file):
-
-        path = norm_path(root)
-        if len(path.split('/')) - base_depth == depth:
-            subdirs[:] = []
-
-        snapshot[path] = os.path.getmtime(path)
-        for f in files:
-            path = norm_path(root, f)
-            snapshot[path] = os.path.getmtime(path)
-
+# Constants
+EXTENSIONS = ('.scss', '.sass', '.css', '.qss')
+
+# Listings of directories modified this close to the previous snapshot are
+# not reused, since a file created in the same mtime tick would be missed.
+RACY_NS = 2 * 10**9
+
+
+def fingerprint(stat):
+    """Return the fingerprint of an os.stat_result."""
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class Snapshot(dict):
+    """Maps files and directories to their fingerprints.
+
+    :attr listings: Maps directories to the names of their relevant files and
+        of the subdirectories that were scanned.
+    :attr time_ns: Time the snapshot was started at.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize an empty snapshot."""
+        super(Snapshot, self).__init__(*args, **kwargs)
+        self.listings = {}
+        self.time_ns = int(time.time() * 10**9)
+
+
+def _join(root, name):
+    if root.endswith('/'):
+        return root + name
+    return root + '/' + name
+
+
+def _scan(snapshot, prev, path, stat, level, depth, extensions):
+    """Add path, a directory, and its contents to snapshot."""
+    fp = snapshot[path] = fingerprint(stat)
+
+    listing = None
+    if (prev is not None and prev.get(path) == fp
+            and fp[0] < prev.time_ns - RACY_NS):
+        listing = prev.listings.get(path)
+
+    if listing is not None:
+        files, subdirs = listing
+        for name in files:
+            child = _join(path, name)
+            try:
+                snapshot[child] = fingerprint(os.stat(child))
+            except OSError:
+                continue
+        for name in subdirs:
+            child = _join(path, name)
+            try:
+                child_stat = os.stat(child)
+            except OSError:
+                continue
+            _scan(snapshot, prev, child, child_stat, level + 1, depth,
+                  extensions)
+        snapshot.listings[path] = listing
+        return
+
+    files = []
+    subdirs = []
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        entries = []
+
+    for entry in entries:
+        try:
+            if entry.is_dir():
+                if level < depth:
+                    subdirs.append((entry.name, entry.stat()))
+            elif entry.is_file():
+                if extensions is None or entry.name.endswith(extensions):
+                    snapshot[_join(path,
+                                   entry.name)] = fingerprint(entry.stat())
+                    files.append(entry.name)
+        except OSError:
+            # The entry was deleted while scanning
+            continue
+
+    for name, child_stat in subdirs:
+        _scan(snapshot, prev, _join(path, name), child_stat, level + 1, depth,
+              extensions)
+
+    snapshot.listings[path] = (
+        tuple(files),
+        tuple(name for name, _ in subdirs),
+    )
+
+
+def take(dir_or_file, depth=3, extensions=EXTENSIONS, prev=None):
+    """Return a Snapshot of a file or of a directory and its contents.
+
+    :param dir_or_file: Path to the file or directory.
+    :param depth: Number of directory levels to descend into.
+    :param extensions: Extensions of the files to include, None for all.
+    :param prev: Previous snapshot of dir_or_file to reuse listings from.
+    """
+    snapshot = Snapshot()
+    path = norm_path(dir_or_file)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return snapshot
+
+    if S_ISDIR(stat.st_mode):
+        _scan(snapshot, prev, path, stat, 0, depth, extensions)
+    else:
+        snapshot[path] = fingerprint(stat)
     return snapshot
 
 
 def diff(prev_snapshot, next_snapshot):
-    """Return a dict containing changes between two snapshots."""
+    """Return a dict containing changes between two snapshots.
+
+    Directories are only reported when created or deleted, a change to their
+    contents is reported as changes to the files themselves.
+    """
+    listings = getattr(next_snapshot, 'listings', {})
     changes = {}
-    for path in set(prev_snapshot.keys()) | set(next_snapshot.keys()):
-        if path in prev_snapshot and path not in next_snapshot:
-            changes[path] = 'Deleted'
-        elif path not in prev_snapshot and path in next_snapshot:
+    for path, fp in next_snapshot.items():
+        prev_fp = prev_snapshot.get(path)
+        if prev_fp is None:
             changes[path] = 'Created'
-        else:
-            prev_mtime = prev_snapshot[path]
-            next_mtime = next_snapshot[path]
-            if next_mtime > prev_mtime:
-                changes[path] = 'Changed'
+        elif prev_fp != fp and path not in listings:
+            changes[path] = 'Changed'
+
+    for path in prev_snapshot:
+        if path not in next_snapshot:
+            changes[path] = 'Deleted'
     return changes
@@ -54,7 +54,9 @@ setup(
     maintainer_email='qtsass@spyder-ide.org',
     url='https://github.com/spyder-ide/qtsass',
     license='MIT',
-    packages=find_packages(exclude=['contrib', 'docs', 'tests*']),
+    packages=find_packages(
+        exclude=['benchmarks*', 'contrib', 'docs', 'tests*'],
+    ),
     entry_points={
         'console_scripts': [
             'qtsass = qtsass.cli:main'
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Test qtsass asyncio api."""
+
+from __future__ import absolute_import
+
+# Standard library imports
+import asyncio
+import shutil
+import threading
+
+# Third party imports
+import pytest
+import sass
+
+# Local imports
+from qtsass import aio
+from qtsass.watchers.aio import AsyncWatcher
+import qtsass
+
+# Local imports
+from . import example, touch
+
+
+def test_compile():
+    """aio.compile returns the same css as compile."""
+
+    string = 'QWidget:!hover {background: rgba(127, 127, 127, 50%);}'
+    css = asyncio.run(aio.compile(string))
+    assert css == qtsass.compile(string)
+
+
+def test_compile_filename(tmpdir):
+    """aio.compile_filename writes the output file."""
+
+    output = tmpdir.join('dummy.css')
+    css = asyncio.run(
+        aio.compile_filename(example('dummy.scss'), output.strpath))
+    assert output.read() == css == qtsass.compile_filename(
+        example('dummy.scss'))
+
+
+def test_compile_dirname(tmpdir):
+    """aio.compile_dirname compiles every entry file."""
+
+    serial = tmpdir.join('serial')
+    concurrent = tmpdir.join('concurrent')
+    qtsass.compile_dirname(example('complex'), serial.strpath)
+    results = asyncio.run(aio.compile_dirname(
+        example('complex'), concurrent.strpath, concurrency=2))
+
+    assert sorted(results) == [
+        concurrent.join('dark.css').strpath,
+        concurrent.join('light.css').strpath,
+    ]
+    for name in ('dark.css', 'light.css'):
+        assert concurrent.join(name).read() == serial.join(name).read()
+
+
+def test_compile_dirname_raises(tmpdir):
+    """aio.compile_dirname reports every file that failed to compile."""
+
+    src = tmpdir.mkdir('src')
+    src.join('ok.scss').write('QWidget {color: red;}')
+    src.join('bad1.scss').write('QWidget {color: red;')
+    src.join('bad2.scss').write('QWidget {color: red;')
+    output = tmpdir.join('output')
+
+    with pytest.raises(sass.CompileError) as exc_info:
+        asyncio.run(aio.compile_dirname(src.strpath, output.strpath))
+
+    assert 'Failed to compile 2 file(s)' in str(exc_info.value)
+    assert output.join('ok.css').check()
+
+
+def test_watch(tmpdir):
+    """aio.watch yields changes and compiled css until stopped."""
+
+    src = tmpdir.join('src')
+    shutil.copytree(example('complex'), src.strpath)
+    output = tmpdir.join('output')
+    qtsass.compile_dirname(src.strpath, output.strpath)
+
+    async def run():
+        watcher = aio.watch(src.strpath, output.strpath, interval=0.05)
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.2, touch, src.join('dark.scss'))
+
+        batches = []
+        async for changes, css in watcher:
+            batches.append((changes, css))
+            watcher.stop()
+        return batches
+
+    batches = asyncio.run(asyncio.wait_for(run(), 10))
+    assert len(batches) == 1
+    changes, css = batches[0]
+    assert src.join('dark.scss').strpath.replace('\\', '/') in changes
+    assert sorted(css) == sorted([
+        output.join('dark.css').strpath,
+        output.join('light.css').strpath,
+    ])
+
+
+def test_watch_polls_in_executor(tmpdir, monkeypatch):
+    """AsyncWatcher scans the tree outside of the event loop thread."""
+
+    threads = set()
+    poll = AsyncWatcher.poll
+
+    def record_poll(self):
+        threads.add(threading.get_ident())
+        return poll(self)
+
+    monkeypatch.setattr(AsyncWatcher, 'poll', record_poll)
+
+    async def run():
+        watcher = AsyncWatcher(tmpdir.strpath, lambda: None, interval=0.01)
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.1, watcher.stop)
+        async for _ in watcher:
+            pass
+
+    asyncio.run(asyncio.wait_for(run(), 10))
+    assert threads
+    assert threading.get_ident() not in threads
+
+
+def test_watch_carries_failed_changes(tmpdir):
+    """AsyncWatcher compiles the changes of a failed batch with the next."""
+
+    calls = []
+
+    async def compiler(changed_paths=None):
+        calls.append(changed_paths)
+        if len(calls) <= 5:
+            raise ValueError('Failed to compile')
+        return changed_paths
+
+    a = tmpdir.join('a.scss')
+    b = tmpdir.join('b.scss')
+
+    async def run():
+        watcher = AsyncWatcher(tmpdir.strpath, compiler,
+                               kwargs={'changed_paths': None},
+                               interval=0.05, debounce=0.05)
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.1, a.write, 'QWidget {color: red;}')
+        loop.call_later(1.2, b.write, 'QWidget {color: red;}')
+        async for changes, css in watcher:
+            watcher.stop()
+            return css
+
+    css = asyncio.run(asyncio.wait_for(run(), 10))
+    assert len(calls) == 6
+    assert css == {
+        a.strpath.replace('\\', '/'),
+        b.strpath.replace('\\', '/'),
+    }
+
+
+def test_watch_ignores_own_outputs(tmpdir):
+    """aio.watch ignores outputs written next to the watched file."""
+
+    shutil.copy2(example('dummy.scss'), tmpdir.strpath)
+    input = tmpdir.join('dummy.scss')
+    output = tmpdir.join('dummy.css')
+
+    async def run():
+        watcher = aio.watch(input.strpath, output.strpath, interval=0.05)
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.2, touch, input)
+        loop.call_later(1.5, watcher.stop)
+
+        batches = []
+        async for changes, css in watcher:
+            batches.append(changes)
+        return batches
+
+    batches = asyncio.run(asyncio.wait_for(run(), 10))
+    assert len(batches) == 1
+    assert list(batches[0]) == [input.strpath.replace('\\', '/')]
+    assert output.check()
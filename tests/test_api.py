@@ -13,12 +13,16 @@ from __future__ import absolute_import
 # Standard library imports
 from os.path import exists
 import logging
+import shutil
+import time
 
 # Third party imports
 import pytest
 import sass
 
 # Local imports
+from qtsass.graph import DependencyGraph
+from qtsass.importers import ImportCache
 import qtsass
 
 # Local imports
@@ -138,6 +142,51 @@ def test_compile_filename(tmpdir):
     assert exists(output.strpath)
 
 
+def test_compile_filename_stream(tmpdir):
+    """compile_filename streams the same css to output_file."""
+
+    output = tmpdir.join('dark.css')
+    stats = qtsass.CompileStats()
+    css = qtsass.compile_filename(
+        example('complex', 'dark.scss'),
+        output.strpath,
+        stream=True,
+        stats=stats,
+    )
+    assert css is None
+    assert output.read() == qtsass.compile_filename(
+        example('complex', 'dark.scss'))
+    assert stats.output_size == len(output.read().encode('utf-8'))
+    assert tmpdir.listdir() == [output]
+
+    with pytest.raises(ValueError):
+        qtsass.compile_filename(example('dummy.scss'), stream=True)
+
+
+def test_compile_filename_atomic(tmpdir):
+    """compile_filename leaves output_file untouched when writing fails."""
+
+    output = tmpdir.join('dummy.css')
+    output.write('QWidget {}')
+
+    class Unwritable(object):
+
+        def __str__(self):
+            raise RuntimeError('Failed to write')
+
+    with pytest.raises(RuntimeError):
+        with qtsass.api._open_atomic(output.strpath) as css_file:
+            css_file.write('QFrame {}')
+            css_file.write(str(Unwritable()))
+
+    assert output.read() == 'QWidget {}'
+    assert tmpdir.listdir() == [output]
+
+    qtsass.compile_filename(example('dummy.scss'), output.strpath)
+    assert output.read() == qtsass.compile_filename(example('dummy.scss'))
+    assert tmpdir.listdir() == [output]
+
+
 def test_compile_filename_no_save():
     """compile_filename simple."""
 
@@ -180,3 +229,196 @@ def test_watch_raises_ValueError(tmpdir):
 
     with pytest.raises(ValueError):
         _ = qtsass.watch('does_not_exist', 'does_not_exist')
+
+
+def test_compile_dirname_incremental(tmpdir):
+    """compile_dirname incremental only recompiles changed entry files."""
+
+    src = tmpdir.join('src')
+    shutil.copytree(example('complex'), src.strpath)
+    output = tmpdir.join('output')
+
+    qtsass.compile_dirname(src.strpath, output.strpath, incremental=True)
+    assert exists(output.join('.qtsass-deps.json').strpath)
+    dark_mtime = output.join('dark.css').mtime()
+    light_mtime = output.join('light.css').mtime()
+
+    # A whitespace change recompiles dark.scss but output is not rewritten
+    time.sleep(0.01)
+    src.join('dark.scss').write(src.join('dark.scss').read() + '\n')
+    qtsass.compile_dirname(src.strpath, output.strpath, incremental=True)
+    assert output.join('dark.css').mtime() == dark_mtime
+    assert output.join('light.css').mtime() == light_mtime
+
+    # Changing a partial recompiles all entry files that import it
+    src.join('widgets', '_qwidget.scss').write('QFrame {color: red;}\n', 'a')
+    qtsass.compile_dirname(src.strpath, output.strpath, incremental=True)
+    assert 'QFrame' in output.join('dark.css').read()
+    assert 'QFrame' in output.join('light.css').read()
+
+
+def test_compile_dirname_incremental_ignores_api_objects(tmpdir):
+    """compile_dirname incremental options do not depend on api objects."""
+
+    output = tmpdir.join('output')
+
+    results = qtsass.compile_dirname(
+        example('complex'),
+        output.strpath,
+        incremental=True,
+        cache=qtsass.CompileCache(),
+        import_cache=ImportCache(),
+        stats=qtsass.CompileStats(),
+    )
+    assert len(results) == 2
+
+    results = qtsass.compile_dirname(
+        example('complex'), output.strpath, incremental=True)
+    assert results == {}
+
+
+def test_compile_dirname_changed_paths(tmpdir):
+    """compile_dirname only compiles entry files affected by changed_paths."""
+
+    src = tmpdir.join('src')
+    shutil.copytree(example('complex'), src.strpath)
+    output = tmpdir.join('output')
+    graph = DependencyGraph()
+
+    results = qtsass.compile_dirname(src.strpath, output.strpath, graph=graph)
+    assert len(results) == 2
+    assert len(graph) == 2
+
+    # Changing an entry file only compiles that entry file
+    dark = src.join('dark.scss').strpath
+    results = qtsass.compile_dirname(
+        src.strpath, output.strpath, graph=graph, changed_paths=[dark])
+    assert list(results) == [output.join('dark.css').strpath]
+
+    # Changing a partial compiles the entry files importing it
+    partial = src.join('widgets', '_qwidget.scss').strpath
+    results = qtsass.compile_dirname(
+        src.strpath, output.strpath, graph=graph, changed_paths=[partial])
+    assert len(results) == 2
+
+    # A new entry file is compiled even when it is not among changed_paths
+    src.join('new.scss').write('QWidget {color: red;}')
+    results = qtsass.compile_dirname(
+        src.strpath, output.strpath, graph=graph, changed_paths=[dark])
+    assert sorted(results) == sorted([
+        output.join('dark.css').strpath,
+        output.join('new.css').strpath,
+    ])
+
+
+def test_compile_dirname_workers(tmpdir):
+    """compile_dirname compiles entry files in a process pool."""
+
+    serial = tmpdir.join('serial')
+    parallel = tmpdir.join('parallel')
+    qtsass.compile_dirname(example('complex'), serial.strpath)
+    qtsass.compile_dirname(example('complex'), parallel.strpath, workers=2)
+
+    for name in ('dark.css', 'light.css'):
+        assert parallel.join(name).read() == serial.join(name).read()
+
+
+def test_compile_dirname_workers_raises(tmpdir):
+    """compile_dirname reports every file that failed to compile."""
+
+    src = tmpdir.mkdir('src')
+    src.join('ok.scss').write('QWidget {color: red;}')
+    src.join('bad1.scss').write('QWidget {color: red;')
+    src.join('bad2.scss').write('QWidget {color: red;')
+    output = tmpdir.join('output')
+
+    with pytest.raises(sass.CompileError) as excinfo:
+        qtsass.compile_dirname(src.strpath, output.strpath, workers=2)
+
+    assert 'bad1.scss' in str(excinfo.value)
+    assert 'bad2.scss' in str(excinfo.value)
+    assert exists(output.join('ok.css').strpath)
+
+
+def test_import_cache(tmpdir):
+    """ImportCache conforms shared partials once across compiles."""
+
+    src = tmpdir.join('src')
+    shutil.copytree(example('complex'), src.strpath)
+    cache = ImportCache()
+
+    dark = qtsass.compile_filename(src.join('dark.scss').strpath,
+                                   import_cache=cache)
+    qtsass.compile_filename(src.join('light.scss').strpath,
+                            import_cache=cache)
+    assert cache.misses == 5
+    assert cache.hits == 5
+
+    # Modified files are reloaded
+    src.join('widgets', '_qwidget.scss').write('QFrame {color: red;}\n', 'a')
+    css = qtsass.compile_filename(src.join('dark.scss').strpath,
+                                  import_cache=cache)
+    assert cache.misses == 6
+    assert css != dark and 'QFrame' in css
+
+
+def test_compile_variants():
+    """compile_variants matches compiling one entry file per variant."""
+
+    variables = {
+        'dark': {
+            'background': 'rgb(35, 35, 35)',
+            '$primary': 'rgb(255, 255, 255)',
+        },
+        'light': {},
+    }
+    cache = ImportCache()
+    stats = qtsass.CompileStats()
+    dependencies = set()
+    css = qtsass.compile_variants(
+        example('complex', 'light.scss'),
+        variables,
+        import_cache=cache,
+        stats=stats,
+        dependencies=dependencies,
+    )
+
+    assert css == {
+        'dark': qtsass.compile_filename(example('complex', 'dark.scss')),
+        'light': qtsass.compile_filename(example('complex', 'light.scss')),
+    }
+    assert cache.misses == 5
+    assert cache.hits == 5
+    assert stats.compiles == 2
+    assert len(dependencies) == 5
+
+    parallel = qtsass.compile_variants(
+        example('complex', 'light.scss'), variables, workers=2)
+    assert parallel == css
+
+
+def test_compile_variants_raises():
+    """compile_variants reports every variant that failed to compile."""
+
+    variables = {'ok': {}, 'bad': {'background': '$missing'}}
+    for workers in (1, 2):
+        with pytest.raises(sass.CompileError) as excinfo:
+            qtsass.compile_variants(
+                example('complex', 'light.scss'), variables, workers=workers)
+        assert 'bad' in str(excinfo.value)
+
+
+def test_sass_value():
+    """sass_value converts python values to sass literals."""
+
+    assert qtsass.api.declare_variables({
+        'defaults': {'radius': 2, 'flat': True, 'font': None},
+        'sizes': [1.5, '2px'],
+        'single': ('red',),
+    }) == (
+        '$defaults: (radius: 2, flat: true, font: null);\n'
+        '$sizes: (1.5, 2px);\n'
+        '$single: (red,);\n'
+    )
+    with pytest.raises(ValueError):
+        qtsass.api.sass_value(object())
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Test qtsass precompiled bundles."""
+
+from __future__ import absolute_import
+
+# Standard library imports
+from subprocess import check_output
+import shutil
+import sys
+
+# Third party imports
+import pytest
+
+# Local imports
+from qtsass.bundle import (
+    BUNDLE_FORMAT,
+    HEADER,
+    MAGIC,
+    Bundle,
+    BundleError,
+    StaleBundleError,
+    load_stylesheet,
+    write_bundle,
+)
+import qtsass
+
+# Local imports
+from . import PROJECT_DIR, example
+
+
+@pytest.fixture
+def themes(tmpdir):
+    """Copy the complex example to tmpdir."""
+
+    src = tmpdir.join('src')
+    shutil.copytree(example('complex'), src.strpath)
+    return src
+
+
+def test_write_and_load(themes, tmpdir):
+    """Bundles return the css of every variant."""
+
+    path = tmpdir.join('theme.qssb').strpath
+    names = write_bundle(path, [themes.strpath, example('dummy.scss')])
+    assert names == ['dark', 'dummy', 'light']
+
+    with Bundle(path) as bundle:
+        assert bundle.variants == names
+        assert 'dark' in bundle
+        for name in ('dark', 'light'):
+            expected = qtsass.compile_filename(themes.join(name + '.scss'))
+            assert bundle.load(name) == expected
+        with pytest.raises(BundleError):
+            bundle.load('missing')
+
+
+def test_stale_variant(themes, tmpdir):
+    """Variants are stale when one of their sources changed."""
+
+    path = tmpdir.join('theme.qssb').strpath
+    write_bundle(path, [themes.strpath])
+    partial = themes.join('widgets', '_qwidget.scss')
+    partial.write('QFrame {color: red;}\n', 'a')
+
+    with Bundle(path) as bundle:
+        assert not bundle.is_fresh('dark')
+        with pytest.raises(StaleBundleError):
+            bundle.load('dark')
+        assert 'QFrame' not in bundle.load('dark', verify=False)
+
+    # load_stylesheet compiles stale variants
+    assert 'QFrame' in load_stylesheet(path, 'dark')
+
+
+def test_missing_sources(themes, tmpdir):
+    """Bundles shipped without their sources are fresh."""
+
+    path = tmpdir.join('theme.qssb').strpath
+    write_bundle(path, [themes.strpath])
+    shipped = tmpdir.mkdir('app').join('theme.qssb')
+    shutil.copy(path, shipped.strpath)
+    shutil.rmtree(themes.strpath)
+
+    with Bundle(shipped.strpath) as bundle:
+        assert bundle.is_fresh('dark')
+        assert bundle.load('dark')
+
+
+def test_invalid_bundle(tmpdir):
+    """Invalid bundles raise BundleError unless a source is given."""
+
+    path = tmpdir.join('theme.qssb')
+    path.write('not a bundle')
+    with pytest.raises(BundleError):
+        Bundle(path.strpath)
+
+    with pytest.raises(BundleError):
+        load_stylesheet(path.strpath, 'dummy')
+
+    css = load_stylesheet(path.strpath, 'dummy', source=example('dummy.scss'))
+    assert css == qtsass.compile_filename(example('dummy.scss'))
+
+
+@pytest.mark.parametrize('header', (
+    b'{"format": ',
+    b'\xff\xfe',
+    '{{"format": {}, "variants": {{}}}}'.format(BUNDLE_FORMAT).encode(),
+    '{{"format": {}, "version": "1"}}'.format(BUNDLE_FORMAT).encode(),
+    b'[]',
+))
+def test_corrupt_header(tmpdir, header):
+    """Bundles with a corrupt header fall back to the source."""
+
+    path = tmpdir.join('theme.qssb')
+    path.write_binary(HEADER.pack(MAGIC, len(header)) + header)
+    with pytest.raises(BundleError):
+        Bundle(path.strpath)
+
+    css = load_stylesheet(path.strpath, 'dummy', source=example('dummy.scss'))
+    assert css == qtsass.compile_filename(example('dummy.scss'))
+
+
+def test_load_does_not_import_sass(tmpdir):
+    """Loading a fresh variant does not import sass."""
+
+    path = tmpdir.join('theme.qssb').strpath
+    write_bundle(path, [example('dummy.scss')])
+    code = (
+        'import sys\n'
+        'from qtsass.bundle import load_stylesheet\n'
+        'assert load_stylesheet({!r}, "dummy")\n'
+        'print("sass" in sys.modules)\n'
+    ).format(path)
+    output = check_output([sys.executable, '-c', code], cwd=PROJECT_DIR)
+    assert output.decode('utf-8').strip() == 'False'
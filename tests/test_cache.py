@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Test qtsass compile cache."""
+
+from __future__ import absolute_import
+
+# Standard library imports
+from subprocess import check_output
+import os
+import shutil
+import sys
+
+# Local imports
+from qtsass.cache import CompileCache, make_key
+import qtsass
+
+# Local imports
+from . import PROJECT_DIR, example
+
+
+SOURCE_STR = """
+QWidget {
+    background: rgba(127, 127, 127, 100%);
+}
+"""
+
+
+def test_cache_hit_and_miss():
+    """CompileCache returns cached css for identical input."""
+
+    cache = CompileCache()
+    css = qtsass.compile(SOURCE_STR, cache=cache)
+    assert cache.stats['misses'] == 1
+
+    assert qtsass.compile(SOURCE_STR, cache=cache) == css
+    assert cache.stats['hits'] == 1
+
+    # Different kwargs produce a different key
+    qtsass.compile(SOURCE_STR, cache=cache, output_style='compressed')
+    assert cache.stats['misses'] == 2
+    assert len(cache) == 2
+
+
+def test_cache_eviction():
+    """CompileCache evicts least recently used entries."""
+
+    cache = CompileCache(maxsize=2)
+    for i in range(3):
+        qtsass.compile('QWidget {{width: {}px;}}'.format(i), cache=cache)
+
+    assert cache.stats['evictions'] == 1
+    assert len(cache) == 2
+
+
+def test_cache_invalidate():
+    """CompileCache.invalidate removes entries."""
+
+    cache = CompileCache()
+    qtsass.compile(SOURCE_STR, cache=cache)
+    qtsass.compile('QWidget {color: red;}', cache=cache)
+
+    cache.invalidate(SOURCE_STR)
+    assert len(cache) == 1
+
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_cache_tracks_imports(tmpdir):
+    """CompileCache entries are invalidated when an import changes."""
+
+    src = tmpdir.join('complex').strpath
+    shutil.copytree(example('complex'), src)
+    cache = CompileCache()
+
+    qtsass.compile_filename(os.path.join(src, 'dark.scss'), cache=cache)
+    qtsass.compile_filename(os.path.join(src, 'dark.scss'), cache=cache)
+    assert cache.stats['hits'] == 1
+
+    partial = os.path.join(src, 'widgets', '_qwidget.scss')
+    with open(partial, 'a') as f:
+        f.write('QFrame { color: red; }\n')
+
+    css = qtsass.compile_filename(os.path.join(src, 'dark.scss'), cache=cache)
+    assert cache.stats['misses'] == 2
+    assert 'QFrame' in css
+
+
+def test_cache_directory(tmpdir):
+    """CompileCache persists entries to disk."""
+
+    directory = tmpdir.join('cache').strpath
+    css = qtsass.compile(SOURCE_STR, cache=CompileCache(directory=directory))
+    assert len(os.listdir(directory)) == 1
+
+    cache = CompileCache(directory=directory)
+    assert qtsass.compile(SOURCE_STR, cache=cache) == css
+    assert cache.stats['hits'] == 1
+
+    cache.invalidate()
+    assert not os.listdir(directory)
+
+
+def test_cache_keys_functions_by_code_and_closure():
+    """Functions with the same name but other code or closures differ."""
+
+    def make_function(value):
+        return lambda: value
+
+    functions = [make_function(value) for value in ('red', 'blue')]
+    keys = {make_key(SOURCE_STR, {'custom_functions': [f]})
+            for f in functions}
+    assert len(keys) == 2
+
+    def color():
+        return 'red'
+
+    key = make_key(SOURCE_STR, {'custom_functions': [color]})
+    assert key == make_key(SOURCE_STR, {'custom_functions': [color]})
+
+    def color():  # noqa: F811
+        return 'blue'
+
+    assert key != make_key(SOURCE_STR, {'custom_functions': [color]})
+
+
+def test_cache_keys_are_stable_across_processes():
+    """Keys of module level functions do not depend on the process."""
+
+    code = (
+        'from qtsass.cache import make_key\n'
+        'from qtsass.conformers import scss_conform\n'
+        'print(make_key("", {"custom_functions": [scss_conform]}))'
+    )
+    keys = {
+        check_output([sys.executable, '-c', code], cwd=PROJECT_DIR).strip()
+        for _ in range(2)
+    }
+    assert len(keys) == 1
+
+
+def test_cache_skips_unkeyable_kwargs():
+    """Compiles passing objects that can not be keyed are not cached."""
+
+    class Color(object):
+
+        def __call__(self):
+            return 'red'
+
+    kwargs = {'custom_functions': {'color': Color()}}
+    assert make_key(SOURCE_STR, kwargs) is None
+
+    cache = CompileCache()
+    qtsass.compile(SOURCE_STR, cache=cache, **kwargs)
+    qtsass.compile(SOURCE_STR, cache=cache, **kwargs)
+    assert cache.stats == {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0}
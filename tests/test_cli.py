@@ -17,6 +17,9 @@ from subprocess import PIPE, Popen
 import sys
 import time
 
+# Third party imports
+import pytest
+
 # Local imports
 from . import PROJECT_DIR, await_condition, example, touch
 
@@ -229,3 +232,108 @@ def test_dir_missing_output():
     proc = invoke_with_result([example('complex')])
     assert proc.code == 1
     assert 'Error: missing required option' in proc.stdout
+
+
+def test_compile_complex_jobs(tmpdir):
+    """CLI compile complex example with multiple processes."""
+
+    input = example('complex')
+    output = tmpdir.mkdir('output')
+    args = [input, '-o', output.strpath, '-j', '2']
+    result = invoke_with_result(args)
+
+    assert result.code == 0
+    assert exists(output.join('light.css').strpath)
+    assert exists(output.join('dark.css').strpath)
+
+
+def test_negative_jobs(tmpdir):
+    """CLI rejects a negative number of jobs."""
+
+    output = tmpdir.mkdir('output')
+    args = [example('complex'), '-o', output.strpath, '-j', '-1']
+    result = invoke_with_result(args)
+
+    assert result.code == 2
+    assert '-j/--jobs: must be 0 or a positive number' in result.stderr
+    assert not exists(output.join('dark.css').strpath)
+
+
+def test_compile_dummy_minify(tmpdir):
+    """CLI compile dummy example to a minified file."""
+
+    output = tmpdir.join('dummy.css')
+    args = [example('dummy.scss'), '-o', output.strpath, '--minify']
+    result = invoke_with_result(args)
+
+    assert result.code == 0
+    assert '\n' not in output.read()
+
+
+def test_compile_dummy_profile():
+    """CLI compile dummy example with profiling."""
+
+    args = [example('dummy.scss'), '--profile']
+    result = invoke_with_result(args)
+
+    assert result.code == 0
+    assert 'scss_conform' in result.stderr
+    assert 'qlineargradient' in result.stderr
+
+
+@pytest.mark.skipif(sys.platform.startswith('win'),
+                    reason='Requires unix domain sockets')
+def test_serve(tmpdir):
+    """CLI forwards compiles to a qtsass serve daemon."""
+
+    sock = tmpdir.join('qtsass.sock').strpath
+    proc = invoke(['serve', '--socket', sock])
+    if not await_condition(lambda: exists(sock)):
+        assert False, format_result(kill(proc))
+
+    try:
+        local = invoke_with_result([example('dummy.scss')])
+        forwarded = invoke_with_result([example('dummy.scss'), '-s', sock])
+        assert forwarded.code == 0
+        assert forwarded.stdout == local.stdout
+
+        output = tmpdir.join('output')
+        args = [example('complex'), '-o', output.strpath, '-s', sock]
+        assert invoke_with_result(args).code == 0
+        assert exists(output.join('dark.css').strpath)
+
+        result = invoke_with_result(['serve', '--stop', '--socket', sock])
+        assert result.code == 0
+        proc.communicate(timeout=10)
+        assert not exists(sock)
+    finally:
+        if proc.poll() is None:
+            kill(proc)
+
+
+def test_socket_without_daemon(tmpdir):
+    """CLI compiles locally when no daemon is listening."""
+
+    sock = tmpdir.join('missing.sock').strpath
+    result = invoke_with_result([example('dummy.scss'), '--socket', sock])
+    assert result.code == 0
+    assert result.stdout
+
+
+def test_daemon_flag_keeps_input(tmpdir):
+    """CLI --daemon flag does not consume the input argument."""
+
+    result = invoke_with_result(['--daemon', example('dummy.scss')])
+    assert result.code == 0
+    assert result.stdout
+
+
+def test_bundle(tmpdir):
+    """CLI bundles a directory of entry files."""
+
+    output = tmpdir.join('theme.qssb')
+    args = ['bundle', example('complex'), '-o', output.strpath]
+    result = invoke_with_result(args)
+
+    assert result.code == 0
+    assert exists(output.strpath)
@@ -16,9 +16,15 @@ import unittest
 
 # Local imports
 from qtsass.conformers import (
+    Conformer,
+    ConformerEngine,
     NotConformer,
     QLinearGradientConformer,
     QRadialGradientConformer,
+    conformers,
+    iter_qt_conform,
+    qt_conform,
+    scss_conform,
 )
 
 
@@ -272,5 +278,71 @@ class TestQRadialGradientConformer(unittest.TestCase):
                          self.css_float_coords_str)
 
 
+class TestConformerEngine(unittest.TestCase):
+
+    qss_str = dedent("""
+    QWidget:!enabled {
+        background: qlineargradient(x1: 0, y1: 1, stop: 0 red, stop: 1 blue);
+        border-color: qradialgradient(
+            spread: pad,
+            cy: 1,
+            stop: 0 rgba(0, 1, 2, 30%),
+            stop: 1 blue
+        );
+    }
+    """)
+
+    def chain_to_scss(self, qss):
+        for conformer in conformers:
+            qss = conformer.to_scss(qss)
+        return qss
+
+    def test_matches_chained_conformers(self):
+        """ConformerEngine matches running each conformer in turn."""
+
+        qss_str = self.qss_str * 50
+        self.assertEqual(scss_conform(qss_str), self.chain_to_scss(qss_str))
+
+    def test_round_trip(self):
+        """ConformerEngine roundtrip."""
+
+        qss_str = 'QWidget:!enabled, QFrame:!flat {}'
+        self.assertEqual(qt_conform(scss_conform(qss_str)), qss_str)
+
+    def test_unbalanced_parens(self):
+        """ConformerEngine leaves unterminated gradients untouched."""
+
+        qss_str = 'QWidget:!enabled { a: qlineargradient(x1: 0, stop: 0 red'
+        self.assertEqual(
+            scss_conform(qss_str),
+            'QWidget:_qnot_enabled { a: qlineargradient(x1: 0, stop: 0 red',
+        )
+
+    def test_conformer_without_tokens(self):
+        """ConformerEngine applies conformers without tokens to all input."""
+
+        class UpperConformer(Conformer):
+
+            def to_scss(self, qss):
+                return qss.upper()
+
+            def to_qss(self, css):
+                return css.lower()
+
+        engine = ConformerEngine([NotConformer(), UpperConformer()])
+        self.assertEqual(engine.to_scss('a:!b'), 'A:_QNOT_B')
+        self.assertEqual(engine.to_qss('A:_QNOT_B'), 'a:!b')
+
+    def test_iter_qss(self):
+        """ConformerEngine.iter_qss yields qt_conform split after rules."""
+
+        css_str = 'QWidget:_qnot_enabled, QFrame:_qnot_flat {}\n' * 50
+        chunks = list(iter_qt_conform(css_str, chunk_size=100))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(chunk.endswith('}') for chunk in chunks[:-1]))
+        self.assertEqual(''.join(chunks), qt_conform(css_str))
+        self.assertEqual(list(iter_qt_conform('')), [])
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
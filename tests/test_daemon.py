@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Test qtsass compile daemon."""
+
+from __future__ import absolute_import
+
+# Standard library imports
+import os
+import socket
+import stat
+import threading
+
+# Third party imports
+import pytest
+
+# Local imports
+from qtsass import daemon
+import qtsass
+
+# Local imports
+from . import await_condition, example
+
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, 'AF_UNIX'),
+    reason='Requires unix domain sockets',
+)
+
+
+@pytest.fixture
+def server(tmpdir):
+    """Run a Daemon in a thread."""
+
+    d = daemon.Daemon(tmpdir.join('qtsass.sock').strpath)
+    thread = threading.Thread(target=d.serve_forever)
+    thread.daemon = True
+    thread.start()
+    assert await_condition(lambda: daemon.ping(d.path))
+    yield d
+    d.shutdown()
+    thread.join()
+
+
+def compile_request(path, **message):
+    message.setdefault('output', None)
+    return list(daemon.request(path, dict(message, command='compile')))
+
+
+def test_daemon_socket_permissions(server):
+    """Daemon socket is only accessible to the user running it."""
+
+    assert stat.S_IMODE(os.stat(server.path).st_mode) == 0o600
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='Requires os.getuid')
+def test_daemon_rejects_other_users(server, monkeypatch):
+    """Clients and daemons running as different users reject each other."""
+
+    uid = os.getuid()
+    monkeypatch.setattr(os, 'getuid', lambda: uid + 1)
+    with pytest.raises(daemon.DaemonError) as exc_info:
+        compile_request(server.path, input=example('dummy.scss'))
+    assert 'another user' in str(exc_info.value)
+    assert server.requests == 0
+
+
+def test_default_socket_path(tmpdir, monkeypatch):
+    """The default socket lives in a directory private to the user."""
+
+    monkeypatch.setenv('XDG_RUNTIME_DIR', tmpdir.strpath)
+    assert daemon.default_socket_path() == tmpdir.join('qtsass.sock').strpath
+
+    monkeypatch.delenv('XDG_RUNTIME_DIR')
+    path = daemon.default_socket_path()
+    assert os.path.basename(os.path.dirname(path)).startswith('qtsass-')
+
+
+def test_daemon_compile(server):
+    """Daemon compiles a file and sends back the css."""
+
+    responses = compile_request(server.path, input=example('dummy.scss'))
+    assert responses[0]['css'] == qtsass.compile_filename(
+        example('dummy.scss'))
+    assert responses[-1] == {'done': True, 'ok': True, 'stats': None}
+
+    # The second request is served from the warm compile cache
+    compile_request(server.path, input=example('dummy.scss'))
+    assert server.cache.hits == 1
+    assert server.requests == 2
+
+
+def test_daemon_compile_dirname(server, tmpdir):
+    """Daemon compiles a directory and sends back every output."""
+
+    output = tmpdir.join('output')
+    responses = compile_request(
+        server.path, input=example('complex'), output=output.strpath)
+    assert sorted(r['output'] for r in responses[:-1]) == [
+        output.join('dark.css').strpath,
+        output.join('light.css').strpath,
+    ]
+    assert output.join('dark.css').check()
+
+
+def test_daemon_compile_error(server, tmpdir):
+    """Daemon reports compile errors."""
+
+    bad = tmpdir.join('bad.scss')
+    bad.write('QWidget {color: red;')
+    responses = compile_request(server.path, input=bad.strpath)
+    assert responses[-1]['done']
+    assert not responses[-1]['ok']
+    assert 'Invalid CSS' in responses[-1]['error']
+
+
+def test_daemon_rejects_other_versions(server):
+    """Daemon rejects clients running another qtsass version."""
+
+    with pytest.raises(daemon.DaemonError):
+        compile_request(
+            server.path, input=example('dummy.scss'), version='0.0.0')
+
+
+def test_daemon_stop(server):
+    """Daemon stops when asked to."""
+
+    daemon.stop(server.path)
+    assert await_condition(lambda: not daemon.ping(server.path))
+
+
+def test_request_without_daemon(tmpdir):
+    """Requests raise DaemonError when no daemon is listening."""
+
+    with pytest.raises(daemon.DaemonError):
+        compile_request(tmpdir.join('missing.sock').strpath, input='x.scss')
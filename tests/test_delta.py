@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Test qtsass style deltas."""
+
+from __future__ import absolute_import
+
+# Local imports
+from qtsass.delta import diff, parse_rules
+import qtsass
+
+# Local imports
+from . import example
+
+
+def test_parse_rules():
+    """parse_rules maps normalized selectors to their declarations."""
+
+    css = (
+        '@charset "utf-8";\n'
+        '/* QFrame { color: red; } */\n'
+        'QWidget,\n  QFrame {\n  color: red; }\n'
+        '@media print { QLabel { color: blue; } }\n'
+        'QWidget, QFrame { border: none; }\n'
+    )
+    assert parse_rules(css) == {
+        'QWidget, QFrame': 'color: red;\nborder: none;',
+        '@media print': 'QLabel { color: blue; }',
+    }
+
+
+def test_diff():
+    """diff reports added, removed and changed selectors."""
+
+    old = qtsass.compile_filename(example('complex', 'light.scss'))
+    new = qtsass.compile_filename(example('complex', 'dark.scss'))
+
+    assert not diff(old, old)
+    delta = diff(old, new)
+    assert delta
+    assert not delta.added and not delta.removed
+    assert delta.selectors == sorted(delta.changed)
+    assert delta.css == new
+
+    first = diff(None, new)
+    assert sorted(first.added) == sorted(parse_rules(new))
@@ -11,9 +11,14 @@
 from __future__ import absolute_import
 
 # Standard library imports
+from unittest import mock
 import unittest
 
+# Third party imports
+import sass
+
 # Local imports
+from qtsass import functions
 from qtsass.api import compile
 
 
@@ -74,5 +79,59 @@ class TestQRadialGradientFunc(BaseCompileTest):
         )
 
 
+class TestBatchedStops(unittest.TestCase):
+    def stops(self, n):
+        return tuple(
+            sass.SassList([
+                sass.SassNumber(i / float(n), ''),
+                sass.SassColor(float(i % 256), 128.0, 255.0, (i % 10) / 9.0),
+            ], sass.SASS_SEPARATOR_SPACE) for i in range(n)
+        )
+
+    def test_rgba_from_colors(self):
+        colors = [stop[0][1] for stop in self.stops(200)]
+        colors.append('rgba(5, 6, 7, 80%)')
+        for batch in (colors[:2], colors[:-1], colors):
+            self.assertEqual(
+                functions.rgba_from_colors(batch),
+                [functions.rgba_from_color(color) for color in batch],
+            )
+
+    def test_rgba_from_colors_numpy_and_python(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest('Requires numpy')
+
+        colors = [stop[0][1] for stop in self.stops(300)]
+        with mock.patch.object(functions, '_numpy', numpy):
+            vectorized = functions.rgba_from_colors(colors)
+        with mock.patch.object(functions, '_numpy', False):
+            python = functions.rgba_from_colors(colors)
+
+        self.assertEqual(vectorized, python)
+        self.assertEqual(
+            python, [functions.rgba_from_color(color) for color in colors])
+
+    def test_format_stops(self):
+        stops = self.stops(2)
+        self.assertEqual(
+            functions.format_stops(stops),
+            'stop: 0.0 rgba(0, 128, 255, 0%), '
+            'stop: 0.5 rgba(1, 128, 255, 11%)',
+        )
+
+    def test_identical_gradients_are_reused(self):
+        coords = [sass.SassNumber(v, '') for v in (0, 0, 0, 1)]
+        stops = sass.SassList(self.stops(100), sass.SASS_SEPARATOR_COMMA)
+        expected = functions.qlineargradient(*(coords + [stops]))
+
+        hits = functions._cached_gradient.cache_info().hits
+        result = functions.qlineargradient(*(coords + [stops]))
+        self.assertEqual(result, expected)
+        self.assertEqual(functions._cached_gradient.cache_info().hits,
+                         hits + 1)
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
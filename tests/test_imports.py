@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Test that heavy modules are only imported when used."""
+
+from __future__ import absolute_import
+
+# Standard library imports
+from subprocess import check_output
+import json
+import sys
+
+# Third party imports
+import pytest
+
+# Local imports
+from . import PROJECT_DIR
+
+
+QT_MODULES = ['PySide2', 'PyQt5', 'PySide', 'PyQt4', 'qtsass.watchers.qt']
+HEAVY_MODULES = [
+    'sass',
+    'qtsass.api',
+    'qtsass.watchers',
+    'asyncio',
+    'inspect',
+    'pprint',
+] + QT_MODULES
+
+
+def imported_modules(statement):
+    """Return the modules imported by running statement in a new process."""
+
+    code = '{}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))'
+    output = check_output(
+        [sys.executable, '-c', code.format(statement)],
+        cwd=PROJECT_DIR,
+    )
+    return set(json.loads(output.decode('utf-8').splitlines()[-1]))
+
+
+@pytest.mark.parametrize('statement', [
+    'import qtsass',
+    'import qtsass.cli',
+    'from qtsass import daemon; daemon.ping("missing.sock")',
+    'from qtsass import bundle',
+])
+def test_lazy_imports(statement):
+    """Light entry points do not import sass, watchers or Qt bindings."""
+
+    modules = imported_modules(statement)
+    assert not modules & set(HEAVY_MODULES)
+
+
+def test_polling_watcher_does_not_probe_qt():
+    """Importing the PollingWatcher does not probe Qt bindings."""
+
+    modules = imported_modules('from qtsass.watchers import PollingWatcher')
+    assert not modules & set(QT_MODULES + ['asyncio'])
+
+
+def test_lazy_attributes():
+    """Public names are imported on first access."""
+
+    modules = imported_modules(
+        'import qtsass; qtsass.compile("QWidget {color: red;}")')
+    assert 'sass' in modules
+    assert 'qtsass.watchers' not in modules
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Test qtsass minify."""
+
+from __future__ import absolute_import
+
+# Third party imports
+import pytest
+
+# Local imports
+from qtsass.minify import collapse_stops, minify, minify_value
+import qtsass
+
+# Local imports
+from . import example
+
+
+def test_minify_value():
+    """minify_value shortens colors and numbers and keeps strings."""
+
+    assert minify_value(' 1px  solid rgba(0, 0, 128, 100%) ') == (
+        '1px solid navy')
+    assert minify_value('rgba(255, 0, 0, 50%)') == 'rgba(255,0,0,50%)'
+    assert minify_value('#FFFFFF') == '#fff'
+    assert minify_value('#80ffffff') == '#80ffffff'
+    assert minify_value('1.50px 0.0 2.05') == '1.5px 0 2.05'
+    assert minify_value('green !important') == 'green!important'
+    assert minify_value('"Noto  Sans, 1.0"') == '"Noto  Sans, 1.0"'
+    assert minify_value('url(:/icons/x.0.png)') == 'url(:/icons/x.0.png)'
+
+
+def test_collapse_stops():
+    """collapse_stops drops stops that do not change the gradient."""
+
+    gradient = ('qlineargradient(x1:0,y1:0,x2:1,y2:1,stop:0 red,'
+                'stop:0.5 red,stop:0.75 red,stop:1 blue,stop:1 blue)')
+    assert collapse_stops(gradient) == (
+        'qlineargradient(x1:0,y1:0,x2:1,y2:1,stop:0 red,stop:0.75 red,'
+        'stop:1 blue)')
+    assert minify_value(
+        'qradialgradient(cx: 0.5, cy: 0.5, radius: 1, fx: 0.5, fy: 0.5, '
+        'stop: 0 #ffffff, stop: 0.5 #ffffff, stop: 1 #ffffff)'
+    ) == ('qradialgradient(cx:0.5,cy:0.5,radius:1,fx:0.5,fy:0.5,'
+          'stop:0 #fff,stop:1 #fff)')
+
+
+def test_minify_rules():
+    """minify merges rules and drops overridden declarations."""
+
+    qss = '''
+        @charset "UTF-8";
+        /* QLabel { color: red; } */
+        QWidget { color: red; color: blue; }
+        QFrame {}
+        QPushButton , QToolButton > QLabel { border: none; }
+        QWidget { background: black; color: white; }
+        QLabel { border: 1px solid red; color: red !important; }
+        QLabel { border-color: blue; color: blue; }
+        QWidget { border: none; }
+    '''
+    assert minify(qss) == (
+        '@charset "UTF-8";'
+        'QWidget{background:black;color:white}'
+        'QPushButton,QToolButton>QLabel{border:none}'
+        'QLabel{border:1px solid red;color:red!important;border-color:blue}'
+        'QWidget{border:none}'
+    )
+
+
+def test_compile_minify(tmpdir):
+    """compile and compile_filename produce minified css."""
+
+    string = 'QWidget {\n  color: rgba(255, 0, 0, 100%);\n}\n'
+    cache = qtsass.CompileCache()
+    assert qtsass.compile(string, cache=cache) != 'QWidget{color:red}'
+    assert qtsass.compile(string, cache=cache, minify=True) == (
+        'QWidget{color:red}')
+
+    output = tmpdir.join('dark.css').strpath
+    css = qtsass.compile_filename(example('complex', 'dark.scss'))
+    minified = qtsass.compile_filename(
+        example('complex', 'dark.scss'), minify=True)
+    assert len(minified) < len(css)
+    qtsass.compile_filename(
+        example('complex', 'dark.scss'), output, stream=True, minify=True)
+    assert tmpdir.join('dark.css').read() == minified
+
+    with pytest.raises(ValueError):
+        qtsass.compile(string, minify=True, source_map=qtsass.SourceMap())
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Test qtsass source maps."""
+
+from __future__ import absolute_import
+
+# Standard library imports
+import json
+
+# Third party imports
+import pytest
+
+# Local imports
+from qtsass.conformers import qt_conform, scss_conform
+from qtsass.importers import norm_path
+from qtsass.sourcemaps import (
+    OffsetMap,
+    SourceMap,
+    decode_mappings,
+    encode_mappings,
+)
+import qtsass
+
+# Local imports
+from . import example
+
+
+def test_mappings_round_trip():
+    """encode_mappings reverses decode_mappings."""
+
+    mappings = 'AAAA,OAAO,CAAC;EACN,UAAU,EAAE,qHACkB,GAC/B;;AACD,MAAM'
+    lines = decode_mappings(mappings)
+    assert lines[0] == [(0, 0, 0, 0), (7, 0, 0, 7), (8, 0, 0, 8)]
+    assert lines[2] == []
+    assert encode_mappings(lines) == mappings
+
+
+def test_conform_offsets():
+    """Conformers record the offsets of their output in their input."""
+
+    qss = 'QLabel:!hover {background: qlineargradient(stop: 0 red);} a'
+    offsets = OffsetMap()
+    scss = scss_conform(qss, offsets)
+
+    # Text before, inside and after rewritten text
+    assert offsets.to_input(scss.index('{')) == qss.index('{')
+    assert offsets.to_input(scss.index('0 red')) == qss.index('qlinear')
+    assert offsets.to_input(scss.index('} a')) == qss.index('} a')
+
+    offsets = OffsetMap()
+    assert qt_conform(scss, offsets) == qss
+    assert offsets.to_input(qss.index('{')) == scss.index('{')
+    assert offsets.to_output(scss.index('} a')) == qss.index('} a')
+
+
+def test_compile_source_map():
+    """compile maps the qss to the positions of the QtSASS source."""
+
+    string = (
+        'QWidget { background: qlineargradient(x1: 0, y1: 0, x2: 1, y2: 1, '
+        'stop: 0 red, stop: 1 blue); color: red; }\n'
+        'QCheckBox:!checked { border: none; }\n'
+    )
+    source_map = SourceMap()
+    css = qtsass.compile(
+        string, source_map=source_map, output_style='compact')
+    lines = css.splitlines()
+
+    assert source_map.sources == ['stdin']
+    column = lines[0].index('color')
+    assert source_map.lookup(0, column) == (
+        'stdin', 0, string.index('color'))
+    column = lines[2].index('border')
+    assert source_map.lookup(2, column) == (
+        'stdin', 1, string.splitlines()[1].index('border'))
+
+    data = json.loads(source_map.to_json())
+    assert data['version'] == 3
+    assert decode_mappings(data['mappings']) == source_map.lines
+
+
+def test_compile_filename_source_map(tmpdir):
+    """compile_filename maps imported files to their paths."""
+
+    source_map = SourceMap()
+    css = qtsass.compile_filename(
+        example('complex', 'dark.scss'),
+        source_map=source_map,
+        output_style='expanded',
+    )
+    widget = norm_path(example('complex', 'widgets', '_qwidget.scss'))
+    assert norm_path(example('complex', 'dark.scss')) in source_map.sources
+    assert source_map.lookup(css.splitlines().index('QWidget {'), 0) == (
+        widget, 0, 0)
+
+    with pytest.raises(ValueError):
+        qtsass.compile_filename(
+            example('dummy.scss'),
+            tmpdir.join('dummy.css').strpath,
+            stream=True,
+            source_map=SourceMap(),
+        )
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2015 Yann Lanthony
+# Copyright (c) 2017-2018 Spyder Project Contributors
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Test qtsass compile stats."""
+
+from __future__ import absolute_import
+
+# Standard library imports
+import threading
+
+# Local imports
+from qtsass.functions import color_table_info
+from qtsass.stats import CompileStats
+import qtsass
+
+# Local imports
+from . import example
+
+
+def test_compile_stats():
+    """compile records stage timings and custom function calls."""
+
+    stats = CompileStats()
+    css = qtsass.compile_filename(example('dummy.scss'), stats=stats)
+
+    assert stats.compiles == 1
+    assert stats.output_size == len(css)
+    assert stats.timings['sass'] > 0
+    assert stats.timings['total'] >= stats.timings['sass']
+    assert stats.functions['qlineargradient'][0] == 2
+    assert stats.function_calls == 3
+    assert 'qlineargradient' in stats.format()
+
+
+def test_compile_stats_imports():
+    """compile records importer calls and bytes read."""
+
+    stats = CompileStats()
+    qtsass.compile_filename(example('complex', 'dark.scss'), stats=stats)
+    assert stats.import_calls == 5
+    assert stats.import_bytes > 0
+
+
+def test_compile_stats_colors():
+    """compile records lookups of the memoized color table."""
+
+    string = 'QWidget {{ {} }}'.format(' '.join(
+        'c{}: rgba(1, 2, 3, 0.5);'.format(i) for i in range(10)))
+    stats = CompileStats()
+    css = qtsass.compile(string, stats=stats)
+
+    assert css.count('rgba(1, 2, 3, 50%)') == 10
+    assert stats.color_hits + stats.color_misses == 10
+    assert stats.color_hits >= 9
+    assert 'Color table: ' in stats.format()
+
+
+def test_compile_stats_colors_per_thread():
+    """Color table lookups of other threads are not counted."""
+
+    string = 'QWidget { color: rgba(4, 5, 6, 0.5); }'
+    before = color_table_info()
+    thread_stats = CompileStats()
+    thread = threading.Thread(
+        target=qtsass.compile,
+        args=(string, ),
+        kwargs={'stats': thread_stats},
+    )
+    thread.start()
+    thread.join()
+
+    assert color_table_info() == before
+    assert thread_stats.color_hits + thread_stats.color_misses == 1
+
+
+def test_compile_dirname_stats(tmpdir):
+    """compile_dirname accumulates stats from worker processes."""
+
+    stats = CompileStats()
+    qtsass.compile_dirname(
+        example('complex'),
+        tmpdir.strpath,
+        workers=2,
+        stats=stats,
+    )
+    assert stats.compiles == 2
+    assert stats.import_calls == 10
+
+
+def test_merge():
+    """CompileStats.merge adds counters together."""
+
+    a = CompileStats()
+    a.record_function('rgba', 0.5)
+    b = CompileStats()
+    b.record_function('rgba', 0.25)
+    b.record_import(0.1, 10)
+    b.record_colors((0, 0), (3, 1))
+    a.merge(b)
+
+    assert a.functions['rgba'] == (2, 0.75)
+    assert a.import_bytes == 10
+    assert (a.color_hits, a.color_misses) == (3, 1)
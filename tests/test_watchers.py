@@ -15,16 +15,32 @@ from os.path import dirname, exists
 import os
 import shutil
 import sys
+import threading
 import time
 
 # Third party imports
 import pytest
 
 # Local imports
-#Local imports
-from qtsass import compile_filename
-from qtsass.watchers import PollingWatcher, QtWatcher
-from qtsass.watchers.api import retry
+from qtsass import compile_filename, watch
+from qtsass.watchers import (
+    InotifyWatcher,
+    PollingWatcher,
+    QtWatcher,
+    snapshots,
+)
+from qtsass.watchers.api import Watcher, retry
+from qtsass.watchers.fingerprints import FingerprintStore
+from qtsass.watchers.polling import (
+    AdaptiveInterval,
+    FixedInterval,
+    PollingThread,
+)
+from qtsass.watchers.scheduler import (
+    ScheduledWatcher,
+    WatchScheduler,
+    plan_roots,
+)
 
 # Local imports
 from . import EXAMPLES_DIR, await_condition, example, touch
@@ -40,13 +56,14 @@ class CallCounter(object):
 
 
 @pytest.mark.parametrize(
-    'Watcher', (PollingWatcher, QtWatcher),
+    'Watcher', (PollingWatcher, InotifyWatcher, QtWatcher),
 )
 @pytest.mark.flaky(max_runs=3)
 def test_watchers(Watcher, tmpdir):
     """Stress test Watcher implementations"""
 
     # Skip when QtWatcher is None - when Qt is not installed.
+    # Skip when InotifyWatcher is None - when not on linux.
     if not Watcher:
         return
 
@@ -98,6 +115,33 @@ def test_watchers(Watcher, tmpdir):
     assert c.count == 2
 
 
+@pytest.mark.parametrize('Watcher', (PollingWatcher, InotifyWatcher))
+def test_watchers_ignore_own_outputs(Watcher, tmpdir):
+    """Watchers ignore outputs written next to the watched file."""
+
+    # Skip when InotifyWatcher is None - when not on linux.
+    if not Watcher:
+        return
+
+    shutil.copy2(example('dummy.scss'), tmpdir.strpath)
+    input = tmpdir.join('dummy.scss').strpath
+    output = tmpdir.join('dummy.css').strpath
+
+    c = CallCounter()
+    w = watch(input, output, Watcher=Watcher)
+    w.connect(c)
+    w.start()
+
+    touch(input)
+    assert await_condition(lambda: c.count == 1)
+    time.sleep(2)
+
+    w.stop()
+    w.join()
+    assert c.count == 1
+    assert sorted(os.listdir(tmpdir.strpath)) == ['dummy.css', 'dummy.scss']
+
+
 @pytest.mark.skipif(sys.platform.startswith('linux') or not QtWatcher,
                     reason="Fails on linux")
 def test_qtwatcher(tmpdir):
@@ -163,3 +207,437 @@ def test_retry():
     # Most obvious case
     with pytest.raises(ValueError):
         fails()
+
+
+@pytest.mark.skipif(not InotifyWatcher, reason="Requires inotify")
+def test_inotify_watcher_falls_back_to_polling(tmpdir, monkeypatch):
+    """InotifyWatcher falls back to polling when inotify fails."""
+    from qtsass.watchers import inotify
+
+    class FailingLibc(object):
+        def inotify_init1(self, flags):
+            return -1
+
+    monkeypatch.setattr(inotify, '_libc', FailingLibc())
+
+    watch_dir = tmpdir.join('src').strpath
+    os.makedirs(watch_dir)
+    shutil.copy2(example('dummy.scss'), watch_dir)
+    input = tmpdir.join('src/dummy.scss').strpath
+    output = tmpdir.join('build/dummy.css').strpath
+
+    w = InotifyWatcher(
+        watch_dir=watch_dir,
+        compiler=compile_filename,
+        args=(input, output),
+    )
+    w.start()
+    assert w._polling
+
+    touch(input)
+    assert await_condition(lambda: exists(output))
+
+    w.stop()
+    w.join()
+
+
+class ManualWatcher(Watcher):
+    """Watcher driven by calling on_change directly."""
+
+    def setup(self):
+        self.batches = []
+
+    def process_changes(self, changes):
+        self.batches.append(changes)
+        super(ManualWatcher, self).process_changes(changes)
+
+
+def test_debounce_coalesces_changes():
+    """Watcher coalesces changes within the debounce window."""
+
+    compiler = CallCounter()
+    w = ManualWatcher('.', compiler, debounce=0.1)
+    c = CallCounter()
+    w.connect(c)
+
+    w.on_change({'a.scss': 'Changed'})
+    w.on_change({'b.scss': 'Created'})
+    w.on_change({'a.scss': 'Changed'})
+    assert await_condition(lambda: c.count == 1)
+    time.sleep(0.2)
+
+    assert compiler.count == 1
+    assert c.count == 1
+    assert w.batches == [{'a.scss': 'Changed', 'b.scss': 'Created'}]
+
+
+def test_watcher_passes_changed_paths():
+    """Watcher passes changed paths to compilers accepting changed_paths."""
+
+    calls = []
+
+    def compiler(changed_paths=None):
+        calls.append(changed_paths)
+
+    w = ManualWatcher('.', compiler, kwargs={'changed_paths': None},
+                      debounce=0)
+    w.on_change({'a.scss': 'Changed', 'b.scss': 'Deleted'})
+    w.on_change()
+    assert calls == [{'a.scss', 'b.scss'}, None]
+
+
+def test_newer_changes_cancel_compile():
+    """Watcher discards a compile superseded by newer changes."""
+
+    started = threading.Event()
+    results = []
+
+    def compiler():
+        results.append(len(results))
+        if len(results) == 1:
+            started.set()
+            time.sleep(0.3)
+        return results[-1]
+
+    w = ManualWatcher('.', compiler, debounce=0.05)
+    dispatched = []
+    w.connect(dispatched.append)
+
+    w.on_change({'a.scss': 'Changed'})
+    assert started.wait(2)
+    w.on_change({'a.scss': 'Changed'})
+
+    assert await_condition(lambda: dispatched)
+    time.sleep(0.4)
+    assert results == [0, 1]
+    assert dispatched == [1]
+
+
+def test_superseded_changes_are_carried():
+    """Watcher compiles changes of superseded compiles with newer ones."""
+
+    started = threading.Event()
+    calls = []
+
+    def compiler(changed_paths=None):
+        calls.append(changed_paths)
+        if len(calls) == 1:
+            started.set()
+            time.sleep(0.3)
+        return {path + '.css': path for path in changed_paths}
+
+    w = ManualWatcher('.', compiler, kwargs={'changed_paths': None},
+                      debounce=0.05)
+    dispatched = []
+    w.connect(dispatched.append)
+
+    w.on_change({'a.scss': 'Changed'})
+    assert started.wait(2)
+    w.on_change({'b.scss': 'Changed'})
+
+    assert await_condition(lambda: dispatched)
+    time.sleep(0.4)
+    assert calls == [{'a.scss'}, {'a.scss', 'b.scss'}]
+    assert dispatched == [{'a.scss.css': 'a.scss', 'b.scss.css': 'b.scss'}]
+
+
+def test_skip_unchanged_outputs():
+    """Watcher only dispatches outputs differing from the previous ones."""
+
+    outputs = iter([
+        'QWidget {color: red;}',
+        'QWidget {color: red;}',
+        'QWidget {color: blue;}',
+    ])
+    w = ManualWatcher('.', lambda: next(outputs), debounce=0,
+                      skip_unchanged=True)
+    dispatched = []
+    w.connect(dispatched.append)
+    for _ in range(3):
+        w.on_change({'a.scss': 'Changed'})
+
+    assert dispatched == ['QWidget {color: red;}', 'QWidget {color: blue;}']
+
+
+def test_skip_unchanged_dict_outputs():
+    """Watcher drops the unchanged entries of dict outputs."""
+
+    outputs = iter([
+        {'a.css': 'A {}', 'b.css': 'B {}'},
+        {'a.css': 'A {}', 'b.css': 'B {a: 1;}'},
+        {'a.css': 'A {}'},
+    ])
+    w = ManualWatcher('.', lambda: next(outputs), debounce=0,
+                      skip_unchanged=True)
+    dispatched = []
+    w.connect(dispatched.append)
+    for _ in range(3):
+        w.on_change({'a.scss': 'Changed'})
+
+    assert dispatched == [
+        {'a.css': 'A {}', 'b.css': 'B {}'},
+        {'b.css': 'B {a: 1;}'},
+    ]
+
+
+def test_delta_callbacks():
+    """Watcher passes per-selector deltas to delta callbacks."""
+
+    outputs = iter([
+        'QWidget {color: red;}\nQFrame {border: none;}',
+        'QWidget {color: red;}\nQFrame {border: none;}\n',
+        'QWidget {color: blue;}\nQLabel {color: red;}',
+    ])
+    w = ManualWatcher('.', lambda: next(outputs), debounce=0)
+    dispatched = []
+    deltas = []
+    w.connect(dispatched.append)
+    w.connect(deltas.append, delta=True)
+    for _ in range(3):
+        w.on_change({'a.scss': 'Changed'})
+
+    assert len(dispatched) == 3
+    assert len(deltas) == 2
+    assert deltas[0].selectors == ['QFrame', 'QWidget']
+    assert deltas[1].added == {'QLabel': 'color: red;'}
+    assert deltas[1].removed == {'QFrame': 'border: none;'}
+    assert deltas[1].changed == {'QWidget': 'color: blue;'}
+    assert deltas[1].css == 'QWidget {color: blue;}\nQLabel {color: red;}'
+
+    w.disconnect(deltas.append)
+    assert not w._delta_callbacks
+
+
+def test_plan_roots():
+    """plan_roots polls roots covering the roots nested inside them."""
+
+    plan = plan_roots([
+        ('/a', 2), ('/a/b', 1), ('/a/b/c', 1), ('/a', 1), ('/ab', 2),
+    ])
+    assert plan == {
+        ('/a', 2): ('/a', 2),
+        ('/a', 1): ('/a', 2),
+        ('/a/b', 1): ('/a', 2),
+        ('/a/b/c', 1): ('/a/b/c', 1),
+        ('/ab', 2): ('/ab', 2),
+    }
+
+
+def test_scheduled_watchers(tmpdir):
+    """ScheduledWatchers share a single polling thread and snapshot."""
+
+    scheduler = WatchScheduler(interval=0.05)
+
+    class FastWatcher(ScheduledWatcher):
+        pass
+
+    FastWatcher.scheduler = scheduler
+
+    src = tmpdir.mkdir('src')
+    src.mkdir('widgets').join('_a.scss').write('')
+    absolute_changes = []
+    relative_changes = []
+    absolute = FastWatcher(src.strpath, None, debounce=0)
+    relative = FastWatcher(os.path.relpath(src.strpath), None, debounce=0)
+    absolute.compile = absolute_changes.append
+    relative.compile = relative_changes.append
+
+    threads = threading.active_count()
+    absolute.start()
+    relative.start()
+    assert threading.active_count() == threads + 1
+    assert scheduler.roots == [(src.strpath.replace('\\', '/'), 2)]
+
+    touch(src.join('widgets', '_a.scss').strpath)
+    assert await_condition(lambda: absolute_changes and relative_changes)
+    path = os.path.join('widgets', '_a.scss')
+    assert absolute_changes == [{
+        os.path.join(src.strpath, path).replace('\\', '/'): 'Changed',
+    }]
+    assert relative_changes == [{
+        os.path.relpath(src.join(path).strpath).replace('\\', '/'):
+            'Changed',
+    }]
+
+    relative.stop()
+    absolute.stop()
+    assert scheduler.watchers == []
+    assert scheduler.roots == []
+    assert await_condition(lambda: threading.active_count() == threads)
+
+
+def test_adaptive_interval():
+    """AdaptiveInterval backs off while idle and snaps back on change."""
+
+    policy = AdaptiveInterval(minimum=0.5, maximum=4, factor=2)
+    assert policy.state == {'interval': 0.5, 'idle_polls': 0, 'cost': 0.0}
+
+    intervals = [policy.next_interval(False, 0.001) for _ in range(5)]
+    assert intervals == [1, 2, 4, 4, 4]
+    assert policy.state['idle_polls'] == 5
+
+    assert policy.next_interval(True, 0.001) == 0.5
+    assert policy.state['idle_polls'] == 0
+
+    # Expensive polls lengthen the interval
+    assert policy.next_interval(True, 0.2) == 2.0
+    assert policy.state == {'interval': 2.0, 'idle_polls': 0, 'cost': 0.2}
+
+    # The default backoff does not exceed the fixed 1 second interval
+    policy = AdaptiveInterval()
+    intervals = [policy.next_interval(False, 0.001) for _ in range(5)]
+    assert max(intervals) == FixedInterval().interval
+
+
+def test_polling_thread_policy():
+    """PollingThread sleeps the interval chosen by its policy."""
+
+    results = [True, False, False]
+    calls = []
+
+    def callback():
+        calls.append(time.perf_counter())
+        return results.pop(0) if results else False
+
+    policy = AdaptiveInterval(minimum=0.05, maximum=0.2, factor=2)
+    thread = PollingThread(callback, policy=policy)
+    thread.start()
+    assert await_condition(lambda: len(calls) >= 4)
+    thread.stop()
+
+    assert policy.state['idle_polls'] >= 2
+    assert calls[2] - calls[1] >= 0.1
+    assert calls[3] - calls[2] >= 0.2
+
+
+def test_fingerprint_store(tmpdir):
+    """FingerprintStore ignores changes that leave the contents intact."""
+
+    tmpdir.join('a.scss').write('a')
+    tmpdir.join('b.scss').write('b')
+    a = tmpdir.join('a.scss').strpath
+    b = tmpdir.join('b.scss').strpath
+    c = tmpdir.join('c.scss').strpath
+    path = tmpdir.join('cache', 'fingerprints.json').strpath
+
+    store = FingerprintStore(path)
+    store.seed(tmpdir.strpath)
+    assert store.stats == {'hashed': 2, 'ignored': 0, 'size': 2}
+
+    touch(a)
+    tmpdir.join('b.scss').write('bb')
+    tmpdir.join('c.scss').write('c')
+    changes = {a: 'Changed', b: 'Changed', c: 'Created'}
+    assert store.filter(changes) == {b: 'Changed', c: 'Created'}
+    assert store.ignored == 1
+
+    # A restarted watcher only hashes files modified since the last save
+    restarted = FingerprintStore(path)
+    assert len(restarted) == 3
+    restarted.seed(tmpdir.strpath)
+    assert restarted.hashed == 0
+
+    tmpdir.join('c.scss').remove()
+    assert restarted.filter({c: 'Deleted'}) == {c: 'Deleted'}
+    assert c not in FingerprintStore(path)
+
+
+def test_fingerprints_watcher(tmpdir):
+    """Watchers passed a FingerprintStore skip touched files."""
+
+    tmpdir.join('a.scss').write('a')
+    a = tmpdir.join('a.scss').strpath
+    compiled = []
+    w = Watcher(tmpdir.strpath, compiled.append, debounce=0,
+                fingerprints=FingerprintStore())
+    w.compile = compiled.append
+
+    touch(a)
+    w.on_change({a: 'Changed'})
+    assert compiled == []
+
+    tmpdir.join('a.scss').write('b')
+    w.on_change({a: 'Changed'})
+    assert compiled == [{a: 'Changed'}]
+
+
+def test_fingerprints_shared_by_watchers(tmpdir):
+    """Watchers sharing a FingerprintStore are each reported a change."""
+
+    tmpdir.join('a.scss').write('a')
+    a = tmpdir.join('a.scss').strpath
+    store = FingerprintStore()
+    compiled = []
+    watchers = []
+    for _ in range(2):
+        w = Watcher(tmpdir.strpath, compiled.append, debounce=0,
+                    fingerprints=store)
+        w.compile = compiled.append
+        watchers.append(w)
+
+    tmpdir.join('a.scss').write('b')
+    for w in watchers:
+        w.on_change({a: 'Changed'})
+    assert compiled == [{a: 'Changed'}, {a: 'Changed'}]
+    assert store.hashed == 2
+
+    touch(a)
+    for w in watchers:
+        w.on_change({a: 'Changed'})
+    assert len(compiled) == 2
+
+
+def test_snapshots_take_and_diff(tmpdir):
+    """Snapshots only include relevant files and diff their fingerprints."""
+
+    tmpdir.join('a.scss').write('a')
+    tmpdir.join('notes.txt').write('notes')
+    tmpdir.mkdir('sub').join('_b.scss').write('b')
+    root = tmpdir.strpath.replace('\\', '/')
+
+    prev = snapshots.take(root)
+    assert sorted(prev) == [root, root + '/a.scss', root + '/sub',
+                            root + '/sub/_b.scss']
+
+    # Same mtime but a different size is still a change
+    stat = os.stat(root + '/a.scss')
+    tmpdir.join('a.scss').write('aa')
+    os.utime(root + '/a.scss', ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    tmpdir.join('c.scss').write('c')
+    tmpdir.join('sub', '_b.scss').remove()
+
+    assert snapshots.diff(prev, snapshots.take(root)) == {
+        root + '/a.scss': 'Changed',
+        root + '/c.scss': 'Created',
+        root + '/sub/_b.scss': 'Deleted',
+    }
+
+
+def test_snapshots_reuse_unchanged_listings(tmpdir, monkeypatch):
+    """Snapshots skip listing directories unchanged since prev."""
+
+    tmpdir.join('a.scss').write('a')
+    tmpdir.mkdir('sub').join('_b.scss').write('b')
+    root = tmpdir.strpath.replace('\\', '/')
+    old = time.time() - 60
+    for path in (root, root + '/sub'):
+        os.utime(path, (old, old))
+    prev = snapshots.take(root)
+
+    scanned = []
+    scandir = os.scandir
+    monkeypatch.setattr(
+        os, 'scandir', lambda path: scanned.append(path) or scandir(path))
+
+    tmpdir.join('sub', '_b.scss').write('bb')
+    changes = snapshots.diff(prev, snapshots.take(root, prev=prev))
+    assert changes == {root + '/sub/_b.scss': 'Changed'}
+    assert scanned == []
+
+    tmpdir.join('sub', '_c.scss').write('c')
+    changes = snapshots.diff(prev, snapshots.take(root, prev=prev))
+    assert changes == {
+        root + '/sub/_b.scss': 'Changed',
+        root + '/sub/_c.scss': 'Created',
+    }
+    assert scanned == [root + '/sub']